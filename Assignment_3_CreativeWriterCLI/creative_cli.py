@@ -1,16 +1,16 @@
 #!/usr/bin/env python3
 
-# Load .env from project tree root (searches upward)
-try:
-    from dotenv import load_dotenv, find_dotenv
-    load_dotenv(find_dotenv(usecwd=True), override=False)
-except Exception:
-    pass
-
 import os
 import sys
 import argparse
-from openai import OpenAI
+from pathlib import Path
+
+# Shared OpenAI client (repo root /aiclient): pooled async client, RPM/TPM limiter, retries, usage
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from aiclient import add_client_args, client_from_args, load_env, print_usage
+
+# Load .env from project tree root (searches upward)
+load_env()
 
 DEFAULT_SYSTEM = (
     "You are a creative writer who optimizes for SEO without sounding robotic.\n"
@@ -33,6 +33,7 @@ def main():
     p.add_argument("--top-p", type=float, default=1.0)
     p.add_argument("--presence-penalty", type=float, default=0.4)
     p.add_argument("--frequency-penalty", type=float, default=0.3)
+    add_client_args(p)
     args = p.parse_args()
 
     if not os.environ.get("OPENAI_API_KEY"):
@@ -55,20 +56,27 @@ def main():
         {"role": "user", "content": user_msg},
     ]
 
-    client = OpenAI()
+    import asyncio  # lazy: keeps --help and arg errors fast
+    client = client_from_args(args)
+
+    # Produce variants concurrently (the shared limiter keeps them under RPM/TPM)
+    async def variants():
+        return await asyncio.gather(*(
+            client.achat(
+                model=args.model,
+                messages=messages,
+                temperature=args.temperature,
+                top_p=args.top_p,
+                presence_penalty=args.presence_penalty,
+                frequency_penalty=args.frequency_penalty,
+            )
+            for _ in range(args.n)
+        ))
 
-    # Produce variants
-    for i in range(args.n):
-        resp = client.chat.completions.create(
-            model=args.model,
-            messages=messages,
-            temperature=args.temperature,
-            top_p=args.top_p,
-            presence_penalty=args.presence_penalty,
-            frequency_penalty=args.frequency_penalty,
-        )
+    for i, resp in enumerate(asyncio.run(variants())):
         text = resp.choices[0].message.content.strip()
         print(f"\n--- Variant {i+1} ---\n{text}")
+    print_usage(client, args)
 
 if __name__ == "__main__":
     main()
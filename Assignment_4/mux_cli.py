@@ -5,25 +5,19 @@ mux_cli.py — Barebones multi-source → LLM CLI (with output length controls)
 Sources: .txt, URL (http/https), .csv, .docx, .pdf
 Defaults: if no --query → summarize; output → stdout (or --out FILE)
 
-Env:  OPENAI_API_KEY in env (loaded via python-dotenv if .env present)
-Deps: pip install 'openai>=1.40.0,<2.0.0' requests beautifulsoup4 python-docx pypdf python-dotenv
+Env:  OPENAI_API_KEY in env (loaded from .env if present, see aiclient.load_env)
+Deps: pip install 'openai>=1.40.0,<2.0.0' requests beautifulsoup4 python-docx pypdf
 """
 
 import os, sys, argparse, csv, io, re
 from pathlib import Path
 from typing import List, Tuple
-import requests
-from bs4 import BeautifulSoup
-from docx import Document as DocxDocument
-from pypdf import PdfReader
-from openai import OpenAI
-
-# --- .env support from project root (search upward from CWD) ---
-try:
-    from dotenv import load_dotenv, find_dotenv
-    load_dotenv(find_dotenv(usecwd=True), override=False)
-except Exception:
-    pass
+# requests/bs4/docx/pypdf/openai imported lazily where needed (fast --help / .txt runs)
+
+# --- shared OpenAI client + .env support (search upward from CWD, then repo root) ---
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from aiclient import add_client_args, client_from_args, load_env, print_usage
+load_env()
 
 def is_url(s: str) -> bool:
     return s.lower().startswith(("http://", "https://"))
@@ -40,10 +34,12 @@ def read_csv_file(path: Path) -> str:
     return out.getvalue()
 
 def read_docx_file(path: Path) -> str:
+    from docx import Document as DocxDocument
     doc = DocxDocument(path)
     return "\n".join(p.text for p in doc.paragraphs)
 
 def read_pdf_file(path: Path) -> str:
+    from pypdf import PdfReader
     reader = PdfReader(str(path))
     texts = []
     for page in reader.pages:
@@ -54,6 +50,8 @@ def read_pdf_file(path: Path) -> str:
     return "\n".join(texts)
 
 def read_url(url: str) -> str:
+    import requests
+    from bs4 import BeautifulSoup
     headers = {
         "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15) AppleWebKit/537.36 "
                       "(KHTML, like Gecko) Chrome/120.0 Safari/537.36"
@@ -150,6 +148,7 @@ def main():
                     help="Max characters per source before sending to LLM")
     ap.add_argument("--total-chars", type=int, default=12000,
                     help="Global max characters across all sources")
+    add_client_args(ap)
 
     args = ap.parse_args()
 
@@ -174,8 +173,8 @@ def main():
     length_to_tokens = {"short": 250, "medium": 700, "long": 1400}
     max_tokens = args.max_tokens if args.max_tokens is not None else length_to_tokens[args.length]
 
-    client = OpenAI()
-    resp = client.chat.completions.create(
+    client = client_from_args(args)
+    resp = client.chat(
         model=args.model,
         messages=messages,
         temperature=args.temperature,
@@ -188,6 +187,7 @@ def main():
         Path(args.out).write_text(out, encoding="utf-8")
     else:
         print(out)
+    print_usage(client, args)
 
 if __name__ == "__main__":
     main()
@@ -10,12 +10,17 @@ Käyttö:
   python img2txt2img.py --image path/to/input.jpg --pollinations --size 1024x682
 """
 
+from __future__ import annotations
+
 import argparse, base64, datetime, os, sys, re
 from pathlib import Path
-from typing import Optional
-import requests
-from openai import OpenAI
-from PIL import Image, ImageDraw, ImageFont  # placeholderia varten
+from typing import Optional, TYPE_CHECKING
+
+# yhteinen OpenAI-asiakas (repon juuren aiclient); requests / openai / PIL tuodaan vasta tarvittaessa
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from aiclient import add_client_args, client_from_args, load_env, print_usage
+if TYPE_CHECKING:
+    from aiclient import AIClient
 
 # -----------------------
 # Helpers
@@ -34,7 +39,7 @@ def b64_data_uri(image_path: Path) -> str:
     b64 = base64.b64encode(image_path.read_bytes()).decode("ascii")
     return f"data:{mime};base64,{b64}"
 
-def describe_image(client: OpenAI, image_path: Path, model: str) -> str:
+def describe_image(client: AIClient, image_path: Path, model: str) -> str:
     """Suomenkielinen, neutraali kuvaus kuvasta."""
     data_uri = b64_data_uri(image_path)
     system = "Olet avustaja, joka kuvailee kuvan ytimekkäästi ja tarkasti suomeksi."
@@ -42,7 +47,7 @@ def describe_image(client: OpenAI, image_path: Path, model: str) -> str:
         {"type": "text", "text": "Kuvaile tämä kuva 3–6 lauseella, neutraalisti ja informatiivisesti."},
         {"type": "image_url", "image_url": {"url": data_uri}},
     ]
-    resp = client.chat.completions.create(
+    resp = client.chat(
         model=model,
         messages=[
             {"role": "system", "content": system},
@@ -70,21 +75,24 @@ def build_generation_prompt(description_fi: str) -> str:
     return base_prompt + description_fi
 
 
-def generate_image_openai(client: OpenAI, prompt: str, model: str, size: str, seed: Optional[int]) -> bytes:
+def generate_image_openai(client: AIClient, prompt: str, model: str, size: str, seed: Optional[int]) -> bytes:
     kwargs = {"model": model, "prompt": prompt, "size": size}
     if seed is not None:
         kwargs["seed"] = seed
-    result = client.images.generate(**kwargs)
+    result = client.images(**kwargs)
     b64 = result.data[0].b64_json
     return base64.b64decode(b64)
 
+POLLINATIONS_BASE = os.getenv("POLLINATIONS_BASE", "https://image.pollinations.ai")
+
 def generate_image_pollinations(prompt: str, size: str) -> bytes:
     """Text→image Pollinationsista (ei avainta)."""
+    import requests
     try:
         w, h = [int(x) for x in size.lower().split("x")]
     except Exception:
         w, h = 1024, 1024
-    url = "https://image.pollinations.ai/prompt/" + requests.utils.quote(prompt)
+    url = f"{POLLINATIONS_BASE}/prompt/" + requests.utils.quote(prompt)
     url = f"{url}?width={w}&height={h}"
     r = requests.get(url, timeout=60)
     r.raise_for_status()
@@ -95,6 +103,7 @@ def save_png(raw: bytes, out_png: Path):
 
 def generate_placeholder(prompt: str, out_png: Path, size: str = "1024x1024"):
     """Hätävara: tekstikuva (ei pitäisi enää tarvita, mutta jätetään varalle)."""
+    from PIL import Image, ImageDraw, ImageFont
     try:
         w, h = [int(x) for x in size.lower().split("x")]
     except Exception:
@@ -133,8 +142,10 @@ def main() -> int:
     ap.add_argument("--outdir", default="outputs", help="Tulostekansio")
     ap.add_argument("--seed", type=int, default=None, help="Siemen (OpenAI)")
     ap.add_argument("--pollinations", action="store_true", help="Pakota Pollinations text→image")
+    add_client_args(ap)
     args = ap.parse_args()
 
+    load_env()
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         print("ERROR: Aseta OPENAI_API_KEY ympäristömuuttujaan.", file=sys.stderr)
@@ -150,7 +161,7 @@ def main() -> int:
     out_txt = outdir / f"description_{ts}.txt"
     out_png = outdir / f"generated_{ts}.png"
 
-    client = OpenAI(api_key=api_key)
+    client = client_from_args(args)
 
     try:
         # 1) Image → Text
@@ -183,6 +194,8 @@ def main() -> int:
     except Exception as e:
         print(f"ERROR: {e}", file=sys.stderr)
         return 1
+    finally:
+        print_usage(client, args)
 
 if __name__ == "__main__":
     raise SystemExit(main())
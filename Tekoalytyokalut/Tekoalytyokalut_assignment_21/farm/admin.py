@@ -1,14 +1,35 @@
 from django.contrib import admin
 from .models import Product, Service
+from .search import FTS_COLUMNS, fts_available, fts_query, matching_pks
+
+
+class FtsSearchMixin:
+    """
+    Adminin hakukenttä FTS5-indeksistä LIKE-koko taulun läpikäynnin sijaan. Haku rajataan
+    search_fieldsin sarakkeisiin (ei esim. tuotteen kategorianimeen); jos jokin kenttä puuttuu
+    indeksistä, käytetään Djangon oletushakua.
+    """
+    search_kind = None
+
+    def get_search_results(self, request, queryset, search_term):
+        indexed = FTS_COLUMNS[self.search_kind]
+        fields = self.get_search_fields(request)
+        if search_term and fts_available() and fts_query(search_term) and all(f in indexed for f in fields):
+            columns = sorted({indexed[f] for f in fields})
+            return queryset.filter(pk__in=matching_pks(self.search_kind, search_term, columns)), False
+        return super().get_search_results(request, queryset, search_term)
+
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(FtsSearchMixin, admin.ModelAdmin):
     list_display = ("name", "category", "price_eur", "in_stock", "created_at")
     list_filter = ("category", "in_stock")
     search_fields = ("name",)
+    search_kind = "product"
 
 @admin.register(Service)
-class ServiceAdmin(admin.ModelAdmin):
+class ServiceAdmin(FtsSearchMixin, admin.ModelAdmin):
     list_display = ("title", "active")
     list_filter = ("active",)
     search_fields = ("title", "description")
+    search_kind = "service"
@@ -0,0 +1,60 @@
+"""
+Kevyt JSON-rajapinta (vain luku) storefront-widgeteille.
+
+Async-näkymät (Djangon async-ORM: aiterator, acount), projektio .values()-kutsulla,
+kursorisivutus samalla (nimi, id) -avaimella kuin HTML-lista ja gzip-pakkaus.
+Kokonaismäärä (count) lasketaan vain kerran per suodatin ja katalogin muutosleima.
+"""
+import json
+from urllib.parse import urlencode
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_safe
+
+from .caching import acached_count
+from .models import Product, Service
+from .pagination import akeyset_page
+from .views import FALSE_VALUES, TRUE_VALUES, page_size, product_filters
+
+PRODUCT_FIELDS = ("id", "name", "category", "price_eur", "in_stock")
+SERVICE_FIELDS = ("id", "title", "description", "active")
+
+
+def json_response(payload: dict) -> HttpResponse:
+    # kompakti: ei välilyöntejä, UTF-8 sellaisenaan; Decimal → "2.50"
+    body = json.dumps(payload, cls=DjangoJSONEncoder, separators=(",", ":"), ensure_ascii=False)
+    return HttpResponse(body, content_type="application/json")
+
+
+async def paginated(request, qs, order_field: str, keep: tuple) -> HttpResponse:
+    page = await akeyset_page(qs, after=request.GET.get("after"), before=request.GET.get("before"),
+                              size=page_size(request.GET), order_field=order_field)
+    params = {k: request.GET[k] for k in keep if request.GET.get(k)}
+    filters = urlencode(sorted((k, v) for k, v in params.items() if k != "size"))
+    return json_response({
+        "count": await acached_count(qs, filters),
+        "next": f"{request.path}?{urlencode({**params, 'after': page.next_cursor})}" if page.next_cursor else None,
+        "previous": f"{request.path}?{urlencode({**params, 'before': page.prev_cursor})}" if page.prev_cursor else None,
+        "results": page.items,
+    })
+
+
+@gzip_page
+@require_safe
+async def products(request):
+    qs = Product.objects.filter(**product_filters(request.GET)).values(*PRODUCT_FIELDS)
+    return await paginated(request, qs, "name", ("category", "in_stock", "size"))
+
+
+@gzip_page
+@require_safe
+async def services(request):
+    qs = Service.objects.values(*SERVICE_FIELDS)
+    active = request.GET.get("active", "").lower()
+    if active in TRUE_VALUES:
+        qs = qs.filter(active=True)
+    elif active in FALSE_VALUES:
+        qs = qs.filter(active=False)
+    return await paginated(request, qs, "title", ("active", "size"))
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class FarmConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "farm"
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from mysite.sqlite import apply_sqlite_pragmas
+        from . import signals  # noqa: F401  (post_save/post_delete → välimuistin mitätöinti)
+
+        connection_created.connect(apply_sqlite_pragmas, dispatch_uid="mysite_sqlite_pragmas")
@@ -0,0 +1,167 @@
+"""
+Suorituskykymittausten yhteiset osat: synteettinen katalogi, näkymien latenssi- ja
+kyselymittaus test clientillä sekä HTTP-kuormitus ajossa olevaa palvelinta vastaan.
+
+Käyttäjät: manage.py bench_site, manage.py loadtest ja farm/tests.py (kyselybudjetit).
+"""
+import http.client
+import random
+import statistics
+import threading
+import time
+from decimal import Decimal
+from urllib.parse import urlsplit
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .caching import touch
+from .models import Product, Service
+
+SEED_WORDS = ["Siikli", "Rosamunda", "Nantes", "Puikula", "Lemmi", "Timo", "Annabelle", "Jytky",
+              "Varhais", "Luomu", "Tilan", "Juhannus", "Pop", "Flyaway", "Amarosa", "Melody"]
+SEED_PREFIX = "Bench"
+
+# Kyselybudjetit (kylmä välimuisti, muutosleimat välimuistissa). Eivät saa riippua rivimäärästä.
+VIEW_BUDGETS = {
+    "home": 0,
+    "products": 1,                     # yksi keyset-sivu
+    "products_filtered": 1,
+    "services": 1,
+    "search": 3,                       # FTS-osumat + in_bulk tuotteille + in_bulk palveluille
+    "api_products": 2,                 # sivu + count
+    "api_services": 2,
+    "admin_products": 5,               # session + user + count + koko count + sivu
+    "admin_services": 5,
+}
+
+
+def view_urls(search_term: str = "siikli") -> dict:
+    from django.urls import reverse
+    return {
+        "home": reverse("home"),
+        "products": reverse("products"),
+        "products_filtered": reverse("products") + "?category=carrot&in_stock=1",
+        "services": reverse("services"),
+        "search": reverse("search") + f"?q={search_term}",
+        "api_products": reverse("api_products"),
+        "api_services": reverse("api_services"),
+        "admin_products": reverse("admin:farm_product_changelist"),
+        "admin_services": reverse("admin:farm_service_changelist"),
+    }
+
+
+def seed_catalog(products: int, services: int | None = None, batch_size: int = 5000, seed: int = 42) -> None:
+    """Lisää `products` tuotetta ja (oletuksena products/100) palvelua bulk_creatella."""
+    rng = random.Random(seed)
+    categories = [value for value, _ in Product.CATEGORY_CHOICES]
+    Product.objects.bulk_create(
+        (Product(name=f"{SEED_PREFIX} {rng.choice(SEED_WORDS)} {rng.choice(SEED_WORDS).lower()} {i}",
+                 category=rng.choice(categories),
+                 price_eur=Decimal(rng.randint(50, 2000)) / 100,
+                 in_stock=rng.random() < 0.8)
+         for i in range(products)),
+        batch_size=batch_size,
+    )
+    n_services = max(1, products // 100) if services is None else services
+    Service.objects.bulk_create(
+        (Service(title=f"{SEED_PREFIX} {rng.choice(SEED_WORDS)} palvelu {i}",
+                 description=" ".join(rng.choice(SEED_WORDS).lower() for _ in range(12)),
+                 active=rng.random() < 0.9)
+         for i in range(n_services)),
+        batch_size=batch_size,
+    )
+    touch(Product)   # bulk_create ohittaa signaalit
+    touch(Service)
+
+
+def cleanup_seed() -> int:
+    deleted = Product.objects.filter(name__startswith=SEED_PREFIX + " ").delete()[0]
+    deleted += Service.objects.filter(title__startswith=SEED_PREFIX + " ").delete()[0]
+    return deleted
+
+
+def percentiles(values: list) -> dict:
+    ordered = sorted(values)
+    if not ordered:
+        return {"n": 0}
+
+    def pick(p):
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(statistics.median(ordered) * 1000, 3),
+        "p90_ms": round(pick(90) * 1000, 3),
+        "p99_ms": round(pick(99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def warm_stamps() -> None:
+    """Muutosleimat välimuistiin (tuotannossa ne ovat siellä lähes aina)."""
+    from .caching import model_stamp
+    model_stamp(Product)
+    model_stamp(Service)
+
+
+def measure_view(client, url: str, iterations: int, cold: bool) -> dict:
+    """Latenssit ja SQL-kyselyt; cold=True tyhjentää sivuvälimuistin ennen jokaista pyyntöä."""
+    latencies, queries, status = [], [], None
+    for _ in range(iterations):
+        if cold:
+            cache.clear()
+            warm_stamps()
+        with CaptureQueriesContext(connection) as ctx:
+            t0 = time.perf_counter()
+            response = client.get(url)
+            if response.streaming:
+                b"".join(response.streaming_content)
+            latencies.append(time.perf_counter() - t0)
+        status = response.status_code
+        queries.append(len(ctx.captured_queries))
+    return {**percentiles(latencies), "status": status,
+            "queries_min": min(queries), "queries_max": max(queries)}
+
+
+# ---------- HTTP-kuorma ajossa olevaa palvelinta vastaan ----------
+
+def _load_worker(url: str, deadline: float, latencies: list, errors: list, headers: dict):
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    conn_cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    conn = conn_cls(parts.netloc, timeout=30)
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        try:
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors.append(response.status)
+                continue
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            conn.close()
+            conn = conn_cls(parts.netloc, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - t0)
+    conn.close()
+
+
+def http_load(url: str, concurrency: int, duration: float, headers: dict | None = None) -> dict:
+    """N säiettä, jokaisella oma keep-alive-yhteys; palauttaa req/s ja latenssit."""
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=_load_worker, args=(url, deadline, latencies, errors, headers or {}))
+               for _ in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    return {"url": url, "concurrency": concurrency, "requests": len(latencies), "errors": len(errors),
+            "rps": round(len(latencies) / elapsed, 1), **percentiles(latencies)}
@@ -0,0 +1,147 @@
+"""
+Katalogisivujen välimuisti.
+
+Jokaisella mallilla (Product, Service) on välimuistissa "leima": versio (Max(updated_at),
+rivimäärä, Max(id)) ja muutosaika. Signaalit (farm/signals.py) poistavat leiman jokaisen
+tallennuksen/poiston jälkeen (ja uudelleen transaktion commitissa), ja seuraava pyyntö laskee
+sen kannasta, jolloin:
+  - sivuvälimuistin avain vaihtuu → vanha HTML ei enää osu
+  - ETag/Last-Modified vaihtuvat → selaimet ja proxyt saavat 304 vain kun sisältö ei muuttunut
+
+Pelkkä Max(updated_at) ei riitä: poisto ei muuta sitä, joten välimuistin tyhjennyksen
+jälkeen ETag palaisi poistoa edeltävään arvoon. Rivimäärä ja Max(id) muuttuvat poistossa
+ja lisäyksessä (SQLiten AUTOINCREMENT ei käytä id:itä uudelleen).
+
+Last-Modified on uusin updated_at (auto_now, joten myös luontiaika). Poisto ei muuta sitä, mutta
+ETag muuttuu, ja If-None-Match ohittaa If-Modified-Sincen (RFC 9110), joten selain ei saa 304:ää.
+
+Leimalla on rajallinen TTL (FARM_STAMP_TIMEOUT): jos rinnakkainen pyyntö ehtii laskea leiman
+ennen kirjoittajan commitia, vanhentunut arvo elää korkeintaan TTL:n verran.
+
+Huom: LocMemCache on prosessikohtainen. Useamman worker-prosessin tuotannossa
+valitse jaettu backend (DJANGO_CACHE_BACKEND, esim. Redis tai FileBasedCache).
+"""
+import hashlib
+from datetime import datetime, timezone as dt_timezone
+from functools import wraps
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+
+class Stamp(NamedTuple):
+    modified: datetime   # Last-Modified
+    version: str         # ETagin ja välimuistiavainten osa
+
+
+STAMP_AGGREGATES = {"m": Max("updated_at"), "n": Count("id"), "top": Max("id")}
+EMPTY_MODIFIED = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)   # tyhjä taulu
+
+
+def _stamp_key(model) -> str:
+    return f"farm:stamp:v2:{model._meta.label_lower}"
+
+
+def _stamp(agg: dict) -> Stamp:
+    last = agg["m"].isoformat() if agg["m"] else "-"
+    modified = agg["m"].replace(microsecond=0) if agg["m"] else EMPTY_MODIFIED
+    return Stamp(modified, f"{last}|{agg['n']}|{agg['top'] or 0}")
+
+
+def model_stamp(model) -> Stamp:
+    """Mallin leima; välimuistin ohi yksi aggregaattikysely kantaan."""
+    key = _stamp_key(model)
+    stamp = cache.get(key)
+    if stamp is None:
+        stamp = _stamp(model.objects.aggregate(**STAMP_AGGREGATES))
+        cache.add(key, stamp, settings.FARM_STAMP_TIMEOUT)
+    return stamp
+
+
+async def amodel_stamp(model) -> Stamp:
+    """model_stamp async-näkymille (cache.aget / aaggregate)."""
+    key = _stamp_key(model)
+    stamp = await cache.aget(key)
+    if stamp is None:
+        stamp = _stamp(await model.objects.aaggregate(**STAMP_AGGREGATES))
+        await cache.aadd(key, stamp, settings.FARM_STAMP_TIMEOUT)
+    return stamp
+
+
+def touch(model) -> None:
+    """
+    Kutsutaan signaaleista ja bulk-kirjoituksista: leima lasketaan uudelleen seuraavassa pyynnössä.
+    Poisto heti (sama transaktio näkee muutoksen) ja uudelleen commitin jälkeen: rinnakkainen
+    pyyntö on voinut tallentaa commitia edeltävän leiman välissä. Ilman transaktiota on_commit
+    ajaa poiston heti.
+    """
+    key = _stamp_key(model)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def catalog_stamp(models) -> Stamp:
+    stamps = [model_stamp(m) for m in models]
+    return Stamp(max(s.modified for s in stamps), "+".join(s.version for s in stamps))
+
+
+async def acached_count(qs, variant: str) -> int:
+    """COUNT(*) välimuistista; avain vaihtuu mallin leiman mukana, joten ei vanhentunutta lukua."""
+    stamp = await amodel_stamp(qs.model)
+    key = f"farm:count:{qs.model._meta.label_lower}:{variant}:{stamp.version}"
+    count = await cache.aget(key)
+    if count is None:
+        count = await qs.acount()
+        await cache.aset(key, count, settings.FARM_CACHE_TIMEOUT)
+    return count
+
+
+def _variant(view_name: str, request, stamp: Stamp) -> str:
+    raw = f"{view_name}|{request.get_full_path()}|{stamp.version}"
+    return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+
+def catalog_page(*models, timeout=None, store=True):
+    """
+    Sivuvälimuisti + ehdolliset GETit listanäkymille, jotka riippuvat vain annetuista
+    malleista. Välimuistiosuma ei tee yhtään SQL-kyselyä. store=False: vain ETag/304, sivua
+    ei tallenneta (vapaa hakuteksti tekisi jokaisesta kyselystä oman välimuistiavaimen).
+    """
+    def decorator(view):
+        name = view.__name__
+
+        def etag(request, *args, **kwargs):
+            return _variant(name, request, catalog_stamp(models))
+
+        def last_modified(request, *args, **kwargs):
+            return catalog_stamp(models).modified
+
+        @wraps(view)
+        @condition(etag_func=etag, last_modified_func=last_modified)
+        def wrapper(request, *args, **kwargs):
+            if not store:
+                response = view(request, *args, **kwargs)
+                patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+                return response
+            key = f"farm:page:{_variant(name, request, catalog_stamp(models))}"
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+            else:
+                response = view(request, *args, **kwargs)
+                if response.status_code == 200 and not response.streaming:
+                    ttl = settings.FARM_CACHE_TIMEOUT if timeout is None else timeout
+                    cache.set(key, (response.content, response["Content-Type"]), ttl)
+            # selain/proxy saa säilyttää, mutta tarkistaa ETagilla joka kerta
+            patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+            return response
+
+        return wrapper
+    return decorator
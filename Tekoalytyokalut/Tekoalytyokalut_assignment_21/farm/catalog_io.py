@@ -0,0 +1,167 @@
+"""
+Tuotekatalogin CSV-tuonti ja -vienti suurille tiedostoille.
+
+- Tuonti lukee CSV:n rivi kerrallaan ja kirjoittaa erissä (bulk_create/bulk_update),
+  jokainen erä omassa transaktiossaan. Upsert nimen perusteella.
+- Vienti käyttää values_list().iterator(chunk_size=…) → muistinkäyttö ei kasva rivimäärän mukana.
+"""
+import csv
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from .caching import touch
+from .models import Product
+
+CSV_FIELDS = ["name", "category", "price_eur", "in_stock"]
+VALUE_FIELDS = ("category", "price_eur", "in_stock")
+UPDATE_CHUNK = 100   # bulk_update rakentaa CASE WHEN -lausekkeen per rivi → pienemmät palat ovat nopeampia
+TRUE_VALUES = {"1", "true", "yes", "on", "kyllä", "k"}
+FALSE_VALUES = {"0", "false", "no", "off", "ei", "e"}
+
+_NAME_MAX = Product._meta.get_field("name").max_length
+_PRICE = Product._meta.get_field("price_eur")
+_CATEGORIES = {value: value for value, _ in Product.CATEGORY_CHOICES}
+_CATEGORIES.update({label.lower(): value for value, label in Product.CATEGORY_CHOICES})
+
+
+class RowError(ValueError):
+    pass
+
+
+@dataclass
+class ImportStats:
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    errors: list = field(default_factory=list)   # (rivinumero, viesti)
+
+    @property
+    def processed(self) -> int:
+        return self.created + self.updated + self.unchanged
+
+    @property
+    def written(self) -> int:
+        return self.created + self.updated
+
+
+def parse_row(row: dict) -> dict:
+    """Validoi yhden CSV-rivin → kenttäarvot; virheestä RowError."""
+    name = (row.get("name") or "").strip()
+    if not name:
+        raise RowError("name puuttuu")
+    if len(name) > _NAME_MAX:
+        raise RowError(f"name yli {_NAME_MAX} merkkiä")
+
+    category = _CATEGORIES.get((row.get("category") or "").strip().lower())
+    if category is None:
+        raise RowError(f"tuntematon category {row.get('category')!r}")
+
+    raw_price = (row.get("price_eur") or "").strip().replace(",", ".")
+    try:
+        price = Decimal(raw_price)
+    except InvalidOperation:
+        raise RowError(f"virheellinen price_eur {raw_price!r}") from None
+    if not price.is_finite() or price < 0:
+        raise RowError(f"virheellinen price_eur {raw_price!r}")
+    price = price.quantize(Decimal(1).scaleb(-_PRICE.decimal_places))
+    if len(price.as_tuple().digits) > _PRICE.max_digits:
+        raise RowError(f"price_eur liian suuri ({raw_price})")
+
+    raw_stock = (row.get("in_stock") or "1").strip().lower()
+    if raw_stock in TRUE_VALUES:
+        in_stock = True
+    elif raw_stock in FALSE_VALUES:
+        in_stock = False
+    else:
+        raise RowError(f"virheellinen in_stock {raw_stock!r}")
+
+    return {"name": name, "category": category, "price_eur": price, "in_stock": in_stock}
+
+
+def _write_batch(batch: dict, stats: ImportStats) -> None:
+    """Yksi erä = yksi transaktio: 1 haku + bulk_update + bulk_create."""
+    now = timezone.now()
+    with transaction.atomic():
+        existing = {}
+        for product in Product.objects.filter(name__in=batch.keys()).order_by("-id"):
+            existing[product.name] = product   # saman nimisistä pienin id voittaa
+        to_create, unchanged = [], 0
+        to_update = {}   # muuttuneet kentät → tuotteet (bulk_update on sitä hitaampi, mitä useampi kenttä)
+        for name, values in batch.items():
+            product = existing.get(name)
+            if product is None:
+                to_create.append(Product(**values))
+                continue
+            changed = tuple(key for key in VALUE_FIELDS if getattr(product, key) != values[key])
+            if not changed:
+                unchanged += 1   # ei turhaa kirjoitusta (eikä FTS-triggeriä / uutta updated_at-leimaa)
+                continue
+            for key in changed:
+                setattr(product, key, values[key])
+            to_update.setdefault(changed, []).append(product)
+        for changed, products in to_update.items():
+            Product.objects.bulk_update(products, changed, batch_size=UPDATE_CHUNK)
+        if to_update:
+            # bulk_update ei aja auto_now-kenttiä; sama leima kaikille → yksi UPDATE ilman CASEa
+            ids = [p.pk for products in to_update.values() for p in products]
+            Product.objects.filter(pk__in=ids).update(updated_at=now)
+        if to_create:
+            Product.objects.bulk_create(to_create)
+    updated = sum(len(products) for products in to_update.values())
+    stats.updated += updated
+    stats.created += len(to_create)
+    stats.unchanged += unchanged
+
+
+def import_products(lines, batch_size: int = 500, strict: bool = False, progress=None) -> ImportStats:
+    """
+    Tuo tuotteet CSV-riveistä (tiedosto-olio tai mikä tahansa rivi-iteraattori).
+    `progress(stats)` kutsutaan jokaisen erän jälkeen.
+    """
+    reader = csv.DictReader(lines)
+    missing = {"name", "category", "price_eur"} - set(reader.fieldnames or [])
+    if missing:
+        raise RowError(f"CSV:stä puuttuu sarakkeet: {', '.join(sorted(missing))}")
+
+    stats, batch = ImportStats(), {}
+    try:
+        for row in reader:
+            try:
+                values = parse_row(row)
+            except RowError as e:
+                if strict:
+                    raise RowError(f"rivi {reader.line_num}: {e}") from None
+                stats.errors.append((reader.line_num, str(e)))
+                continue
+            batch[values["name"]] = values   # sama nimi samassa erässä → viimeinen voittaa
+            if len(batch) >= batch_size:
+                _write_batch(batch, stats)
+                batch = {}
+                if progress:
+                    progress(stats)
+        if batch:
+            _write_batch(batch, stats)
+            if progress:
+                progress(stats)
+    finally:
+        if stats.written:
+            touch(Product)   # bulk-kirjoitukset ohittavat signaalit → mitätöidään sivuvälimuisti itse
+    return stats
+
+
+class Echo:
+    """csv.writer kirjoittaa tähän; write() palauttaa rivin suoraan generaattorille."""
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset, chunk_size: int = 2000):
+    """CSV-rivit (otsikko ensin) generaattorina; sopii StreamingHttpResponseen ja tiedostoon."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_FIELDS)
+    rows = queryset.order_by("id").values_list(*CSV_FIELDS).iterator(chunk_size=chunk_size)
+    for name, category, price, in_stock in rows:
+        yield writer.writerow([name, category, price, int(in_stock)])
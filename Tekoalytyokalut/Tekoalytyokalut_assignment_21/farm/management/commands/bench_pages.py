@@ -0,0 +1,130 @@
+"""
+Siirretyt tavut ja sivujen vasteajat selaimen näkökulmasta: ensimmäinen ja toistuva käynti.
+
+Selaimen välimuisti simuloidaan: tuore tiedosto (max-age/immutable) jää kokonaan hakematta,
+muut tarkistetaan If-None-Match/If-Modified-Since-otsakkeilla.
+
+  python manage.py runserver --noreload 127.0.0.1:8000 &          # kehitys
+  python manage.py bench_pages http://127.0.0.1:8000 --json dev.json
+  gunicorn mysite.wsgi -b 127.0.0.1:8001 -e DJANGO_SETTINGS_MODULE=mysite.settings_prod &
+  python manage.py bench_pages http://127.0.0.1:8001 --json prod.json
+"""
+import http.client
+import json
+import re
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+ASSET_RE = re.compile(r'(?:href|src)="(/[^/"][^"]*\.(?:css|js|svg|png|ico|woff2?))"')
+MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+HEADERS = {"Accept-Encoding": "gzip, deflate, br", "User-Agent": "bench_pages"}
+
+
+class BrowserCache:
+    def __init__(self):
+        self.entries = {}   # path → response-otsakkeet
+
+    def is_fresh(self, path: str) -> bool:
+        entry = self.entries.get(path)
+        if not entry:
+            return False
+        max_age = MAX_AGE_RE.search(entry.get("cache-control", ""))
+        return "immutable" in entry.get("cache-control", "") or bool(max_age and int(max_age.group(1)) > 0)
+
+    def validators(self, path: str) -> dict:
+        entry = self.entries.get(path, {})
+        headers = {}
+        if "etag" in entry:
+            headers["If-None-Match"] = entry["etag"]
+        if "last-modified" in entry:
+            headers["If-Modified-Since"] = entry["last-modified"]
+        return headers
+
+    def store(self, path: str, response) -> None:
+        if response.status == 200:
+            self.entries[path] = {k.lower(): v for k, v in response.getheaders()}
+
+
+class Command(BaseCommand):
+    help = "Vertaa siirrettyjä tavuja ja vasteaikoja (ensimmäinen / toistuva käynti)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("base_url")
+        parser.add_argument("--paths", nargs="+", default=["/", "/products/", "/services/", "/admin/login/"])
+        parser.add_argument("--repeat", type=int, default=20, help="HTML-pyyntöjä vasteajan mittaukseen")
+        parser.add_argument("--json", dest="json_out", default=None)
+
+    def handle(self, *args, **opts):
+        parts = urlsplit(opts["base_url"])
+        self.conn = http.client.HTTPConnection(parts.netloc, timeout=30)
+        cache = BrowserCache()
+        report = {"base_url": opts["base_url"], "pages": {}}
+
+        for path in opts["paths"]:
+            first = self.visit(path, cache)
+            repeat = self.visit(path, cache)
+            timings = []
+            for _ in range(opts["repeat"]):
+                t0 = time.perf_counter()
+                self.fetch(path)
+                timings.append(time.perf_counter() - t0)
+            report["pages"][path] = {
+                "first": first, "repeat": repeat,
+                "html_p50_ms": round(statistics.median(timings) * 1000, 2),
+            }
+            self.stdout.write(
+                f"{path:<16} 1. käynti {first['requests']:>3} pyyntöä {first['bytes']:>8} B   "
+                f"toistuva {repeat['requests']:>3} pyyntöä {repeat['bytes']:>8} B   "
+                f"HTML p50 {report['pages'][path]['html_p50_ms']} ms")
+
+        report["total"] = {
+            visit: {key: sum(page[visit][key] for page in report["pages"].values()) for key in ("requests", "bytes")}
+            for visit in ("first", "repeat")
+        }
+        self.stdout.write(f"Yhteensä: 1. käynti {report['total']['first']['bytes']} B, "
+                          f"toistuva {report['total']['repeat']['bytes']} B")
+        if opts["json_out"]:
+            with open(opts["json_out"], "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+
+    def fetch(self, path: str, headers: dict | None = None):
+        try:
+            self.conn.request("GET", path, headers={**HEADERS, **(headers or {})})
+            response = self.conn.getresponse()
+            body = response.read()   # sellaisenaan (pakattuna), eli siirretyt tavut
+        except (OSError, http.client.HTTPException) as e:
+            raise CommandError(f"{path}: {e}")
+        return response, body
+
+    def visit(self, path: str, cache: BrowserCache) -> dict:
+        """HTML aina uudestaan (ehdollisena), assetit selaimen välimuistisäännöillä."""
+        stats = {"requests": 0, "bytes": 0, "not_modified": 0}
+        response, body = self.fetch(path, cache.validators(path))
+        stats["requests"] += 1
+        stats["bytes"] += len(body)
+        if response.status == 200:
+            cache.store(path, response)
+            cache.entries[path]["_assets"] = ASSET_RE.findall(self.decode(response, body))
+        for asset in cache.entries.get(path, {}).get("_assets", []):
+            if cache.is_fresh(asset):
+                continue
+            asset_response, asset_body = self.fetch(asset, cache.validators(asset))
+            stats["requests"] += 1
+            stats["bytes"] += len(asset_body)
+            stats["not_modified"] += asset_response.status == 304
+            cache.store(asset, asset_response)
+        return stats
+
+    @staticmethod
+    def decode(response, body: bytes) -> str:
+        encoding = response.getheader("Content-Encoding")
+        if encoding == "gzip":
+            import gzip
+            body = gzip.decompress(body)
+        elif encoding == "br":
+            import brotli  # ei tarvita, jos palvelin ei lähetä br:tä
+            body = brotli.decompress(body)
+        return body.decode("utf-8", "replace")
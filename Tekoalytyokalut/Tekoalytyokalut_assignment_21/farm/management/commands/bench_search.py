@@ -0,0 +1,72 @@
+"""
+LIKE vs FTS5 -haun vertailu synteettisellä katalogilla.
+
+Rivit lisätään transaktiossa, joka perutaan lopuksi → kanta ei muutu.
+  python manage.py bench_search --rows 100000 --repeat 20
+"""
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from farm.models import Product
+from farm.search import fts_available, matching_pks, search_catalog
+
+WORDS = ["siikli", "rosamunda", "nantes", "puikula", "lemmi", "timo", "annabelle", "juhannus",
+         "varhais", "luomu", "kiintea", "jauhoinen", "pesty", "harjattu", "lajiteltu", "tilan"]
+
+
+class Command(BaseCommand):
+    help = "Vertaa LIKE- ja FTS5-hakua N rivin katalogilla (muutokset perutaan)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000)
+        parser.add_argument("--repeat", type=int, default=20)
+        # yleinen sana (~1/16 riveistä) ja harvinainen (yksi rivi)
+        parser.add_argument("--term", nargs="+", default=["rosamunda", "54321"])
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **opts):
+        if not fts_available():
+            raise CommandError("FTS5-vertailu vaatii SQLite-kannan.")
+        rng = random.Random(42)
+
+        with transaction.atomic():
+            t0 = time.perf_counter()
+            Product.objects.bulk_create(
+                (Product(name=f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {i}",
+                         category=rng.choice(["potato", "carrot", "other"]),
+                         price_eur=Decimal("1.50"))
+                 for i in range(opts["rows"])),
+                batch_size=opts["batch_size"],
+            )
+            self.stdout.write(f"Seed: {opts['rows']} riviä {time.perf_counter() - t0:.1f} s (sis. FTS-triggerit)")
+
+            for term in opts["term"]:
+                self.stdout.write(f"\nHakusana: {term!r}")
+                self.run_cases(term, opts["repeat"])
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS("Valmis (seed-rivit peruttu)."))
+
+    def run_cases(self, term: str, repeat: int):
+        like = Product.objects.filter(name__icontains=term)
+        fts = Product.objects.filter(pk__in=matching_pks("product", term))
+        cases = {
+            # admin: count + ensimmäinen sivu
+            "LIKE  count+page": lambda: (like.count(), list(like[:100])),
+            "FTS5  count+page": lambda: (fts.count(), list(fts[:100])),
+            # julkinen haku: 50 relevanssijärjestyksessä
+            "FTS5  ranked top50": lambda: search_catalog(term, limit=50),
+        }
+        for name, fn in cases.items():
+            fn()  # lämmittely
+            times = []
+            for _ in range(repeat):
+                t = time.perf_counter()
+                fn()
+                times.append((time.perf_counter() - t) * 1000)
+            self.stdout.write(f"{name:20s} median {statistics.median(times):8.2f} ms   "
+                              f"p90 {sorted(times)[int(0.9 * (len(times) - 1))]:8.2f} ms")
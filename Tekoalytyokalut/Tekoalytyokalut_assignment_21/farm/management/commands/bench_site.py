@@ -0,0 +1,141 @@
+"""
+Sivuston suorituskykymittaus: synteettinen katalogi, latenssit (p50/p90/p99) ja SQL-kyselyt per näkymä.
+
+Prosessin sisäinen mittaus (test client) ajetaan transaktiossa, joka perutaan → kanta ei muutu:
+  python manage.py bench_site --rows 10000 100000 --iterations 30 --json bench.json
+
+Kuorma ajossa olevaa palvelinta vastaan (rivit jätetään kantaan ja poistetaan lopuksi):
+  python manage.py runserver --noreload &   # tai gunicorn / uvicorn
+  python manage.py bench_site --rows 100000 --load http://127.0.0.1:8000 --concurrency 16 --duration 10
+"""
+import json
+import platform
+import time
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from farm.benchmark import VIEW_BUDGETS, cleanup_seed, http_load, measure_view, seed_catalog, view_urls
+
+# Kuormatestissä ei mitata adminia (vaatisi kirjautumisen)
+LOAD_VIEWS = ["home", "products", "products_filtered", "services", "search", "api_products"]
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Mittaa näkymien latenssit ja kyselymäärät N rivin katalogilla; kirjoittaa JSON-raportin."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[10_000],
+                            help="Katalogin koko(t), esim. 10000 100000 1000000")
+        parser.add_argument("--iterations", type=int, default=30)
+        parser.add_argument("--views", nargs="+", choices=sorted(VIEW_BUDGETS), default=None)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--json", dest="json_out", default=None, help="Raportti JSON-tiedostoon")
+        parser.add_argument("--no-budget-check", action="store_true",
+                            help="Älä palauta virhettä kyselybudjetin ylityksestä")
+        parser.add_argument("--load", metavar="BASE_URL", default=None,
+                            help="Kuormita ajossa olevaa palvelinta (rivit committoidaan ja poistetaan lopuksi)")
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--duration", type=float, default=10.0)
+
+    def handle(self, *args, **opts):
+        report = {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "cache": settings.CACHES["default"]["BACKEND"],
+            "iterations": opts["iterations"],
+            "runs": [],
+        }
+        names = opts["views"] or list(VIEW_BUDGETS)
+        over_budget = []
+
+        for rows in opts["rows"]:
+            if opts["load"]:
+                run = self.load_run(rows, opts)
+            else:
+                run = self.client_run(rows, names, opts)
+                over_budget += [f"{name} @ {rows}" for name, r in run["views"].items() if not r["within_budget"]]
+            report["runs"].append(run)
+
+        if opts["json_out"]:
+            with open(opts["json_out"], "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"\nRaportti: {opts['json_out']}")
+        if over_budget and not opts["no_budget_check"]:
+            raise CommandError("Kyselybudjetti ylittyi: " + ", ".join(over_budget))
+
+    # ---------- test client, transaktio perutaan ----------
+
+    def client_run(self, rows: int, names: list, opts) -> dict:
+        run = {"rows": rows, "mode": "client", "views": {}}
+        setup_test_environment()  # sallii testiserverin ALLOWED_HOSTSin ja templaattisignaalit
+        try:
+            with transaction.atomic():
+                run["seed_s"] = self.seed(rows, opts["batch_size"])
+                user = get_user_model().objects.create_superuser("bench", "bench@example.com", "bench")
+                client = Client()
+                client.force_login(user)
+                urls = view_urls()
+
+                self.stdout.write(f"\n{rows} riviä (seed {run['seed_s']} s)")
+                self.stdout.write(f"  {'näkymä':<18} {'kyselyt':>9} {'budj.':>6} "
+                                  f"{'kylmä p50':>10} {'p90':>8} {'p99':>8} {'lämmin p50':>11}")
+                for name in names:
+                    measure_view(client, urls[name], 2, cold=True)   # templaatit yms. lämpimiksi
+                    cold = measure_view(client, urls[name], opts["iterations"], cold=True)
+                    warm = measure_view(client, urls[name], opts["iterations"], cold=False)
+                    budget = VIEW_BUDGETS[name]
+                    run["views"][name] = {
+                        "url": urls[name], "budget": budget, "queries": cold["queries_max"],
+                        "within_budget": cold["queries_max"] <= budget and cold["status"] == 200,
+                        "cold": cold, "warm": warm,
+                    }
+                    flag = "" if run["views"][name]["within_budget"] else "  <-- YLI"
+                    self.stdout.write(
+                        f"  {name:<18} {cold['queries_max']:>9} {budget:>6} {cold['p50_ms']:>10} "
+                        f"{cold['p90_ms']:>8} {cold['p99_ms']:>8} {warm['p50_ms']:>11}{flag}")
+                raise _Rollback
+        except _Rollback:
+            pass
+        finally:
+            cache.clear()   # ei jätetä perutun datan sivuja välimuistiin
+            teardown_test_environment()
+        return run
+
+    # ---------- HTTP-kuorma, data committoidaan hetkeksi ----------
+
+    def load_run(self, rows: int, opts) -> dict:
+        base = opts["load"].rstrip("/")
+        run = {"rows": rows, "mode": "load", "base_url": base, "views": {}}
+        run["seed_s"] = self.seed(rows, opts["batch_size"])
+        self.stdout.write(f"\n{rows} riviä (seed {run['seed_s']} s) → {base}")
+        try:
+            urls = view_urls()
+            for name in LOAD_VIEWS:
+                http_load(base + urls[name], opts["concurrency"], 1.0)  # lämmittely
+                result = http_load(base + urls[name], opts["concurrency"], opts["duration"])
+                run["views"][name] = result
+                self.stdout.write(
+                    f"  {name:<18} {result['rps']:>8} req/s   p50 {result.get('p50_ms')} ms   "
+                    f"p99 {result.get('p99_ms')} ms   ({result['errors']} virhettä)")
+        finally:
+            cleanup_seed()
+        return run
+
+    def seed(self, rows: int, batch_size: int) -> float:
+        t0 = time.perf_counter()
+        seed_catalog(rows, batch_size=batch_size)
+        return round(time.perf_counter() - t0, 2)
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from farm.catalog_io import export_rows
+from farm.models import Product
+
+
+class Command(BaseCommand):
+    help = "Vie tuotteet CSV:nä (stdout tai --output), rivit luetaan paloissa."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", "-o", default=None, help="Kohdetiedosto (oletus stdout)")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument("--category", default=None)
+        parser.add_argument("--in-stock", choices=["0", "1"], default=None)
+
+    def handle(self, *args, **opts):
+        qs = Product.objects.all()
+        if opts["category"]:
+            qs = qs.filter(category=opts["category"])
+        if opts["in_stock"] is not None:
+            qs = qs.filter(in_stock=opts["in_stock"] == "1")
+
+        if opts["output"]:
+            with open(opts["output"], "w", encoding="utf-8", newline="") as f:
+                for line in export_rows(qs, opts["chunk_size"]):
+                    f.write(line)
+        else:
+            for line in export_rows(qs, opts["chunk_size"]):
+                self.stdout.write(line, ending="")
@@ -0,0 +1,41 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from farm.catalog_io import RowError, import_products
+
+
+class Command(BaseCommand):
+    help = "Tuo tuotteet CSV:stä (name,category,price_eur,in_stock); upsert nimen perusteella."
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_file", help="CSV-tiedosto tai '-' = stdin")
+        parser.add_argument("--batch-size", type=int, default=500, help="Rivejä per transaktio (name__in-haku, SQLite max 999 parametria)")
+        parser.add_argument("--strict", action="store_true", help="Keskeytä ensimmäiseen virheelliseen riviin")
+        parser.add_argument("--max-errors", type=int, default=20, help="Näytettävien virherivien määrä")
+
+    def handle(self, *args, **opts):
+        t0 = time.perf_counter()
+
+        def progress(stats):
+            elapsed = time.perf_counter() - t0
+            self.stderr.write(f"  {stats.processed} riviä ({stats.processed / max(elapsed, 1e-6):,.0f} riviä/s)")
+
+        try:
+            if opts["csv_file"] == "-":
+                stats = import_products(sys.stdin, opts["batch_size"], opts["strict"], progress)
+            else:
+                with open(opts["csv_file"], encoding="utf-8-sig", newline="") as f:
+                    stats = import_products(f, opts["batch_size"], opts["strict"], progress)
+        except (OSError, RowError) as e:
+            raise CommandError(str(e)) from e
+
+        elapsed = time.perf_counter() - t0
+        for line, message in stats.errors[:opts["max_errors"]]:
+            self.stderr.write(self.style.WARNING(f"rivi {line}: {message}"))
+        if len(stats.errors) > opts["max_errors"]:
+            self.stderr.write(self.style.WARNING(f"… ja {len(stats.errors) - opts['max_errors']} muuta virhettä"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Uusia {stats.created}, päivitetty {stats.updated}, ennallaan {stats.unchanged}, "
+            f"virheitä {len(stats.errors)} — {elapsed:.1f} s ({stats.processed / max(elapsed, 1e-6):,.0f} riviä/s)"))
@@ -0,0 +1,41 @@
+"""
+Yksinkertainen HTTP-kuormitustesti (vain stdlib): N säiettä, jokaisella oma keep-alive-yhteys.
+
+  # WSGI vs ASGI samalla kannalla
+  gunicorn mysite.wsgi -w 4 -b 127.0.0.1:8001 &
+  uvicorn mysite.asgi:application --workers 4 --port 8002 &
+  python manage.py loadtest http://127.0.0.1:8001/api/products/ http://127.0.0.1:8002/api/products/ \\
+      --concurrency 32 --duration 10
+"""
+import json
+
+from django.core.management.base import BaseCommand
+
+from farm.benchmark import http_load
+
+
+class Command(BaseCommand):
+    help = "Mittaa requests/s ja latenssit yhdelle tai useammalle URLille (esim. WSGI vs ASGI)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("urls", nargs="+")
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--duration", type=float, default=10.0, help="Sekuntia per URL")
+        parser.add_argument("--warmup", type=float, default=1.0)
+        parser.add_argument("--gzip", action="store_true", help="Lähetä Accept-Encoding: gzip")
+        parser.add_argument("--json", dest="json_out", default=None, help="Tallenna tulokset JSON-tiedostoon")
+
+    def handle(self, *args, **opts):
+        headers = {"Accept-Encoding": "gzip"} if opts["gzip"] else {}
+        results = []
+        for url in opts["urls"]:
+            if opts["warmup"] > 0:
+                http_load(url, opts["concurrency"], opts["warmup"], headers)
+            result = http_load(url, opts["concurrency"], opts["duration"], headers)
+            results.append(result)
+            self.stdout.write(
+                f"{url}\n  {result['rps']:>8} req/s   p50 {result.get('p50_ms')} ms   p90 {result.get('p90_ms')} ms   "
+                f"p99 {result.get('p99_ms')} ms   ({result['requests']} ok, {result['errors']} virhettä)")
+        if opts["json_out"]:
+            with open(opts["json_out"], "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
@@ -0,0 +1,122 @@
+"""
+Yhtäaikaisten luku- ja kirjoitussäikeiden rasitustesti ("database is locked" -tarkistus).
+
+Jokaisella säikeellä on oma Django-yhteys. Kirjoittajat lisäävät ja päivittävät
+"__stress__"-tuotteita, lukijat hakevat sivuja, laskevat rivejä ja käyttävät hakua.
+Lopuksi stress-rivit poistetaan.
+
+  python manage.py stress_db --writers 4 --readers 16 --duration 10
+  DJANGO_SQLITE_PRAGMAS=0 DJANGO_CONN_MAX_AGE=0 python manage.py stress_db   # vertailu ilman viritystä
+"""
+import random
+import statistics
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+
+from farm.models import Product
+from farm.pagination import keyset_page
+from farm.search import search_catalog
+
+PREFIX = "__stress__"
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {"read": [], "write": []}
+        self.errors = {"read": 0, "write": 0}
+        self.locked = 0
+
+    def ok(self, kind: str, seconds: float):
+        with self.lock:
+            self.latencies[kind].append(seconds)
+
+    def fail(self, kind: str, exc: Exception):
+        with self.lock:
+            self.errors[kind] += 1
+            if "locked" in str(exc):
+                self.locked += 1
+
+
+def writer(n: int, deadline: float, stats: Stats):
+    rng = random.Random(n)
+    mine = []
+    try:
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                with transaction.atomic():
+                    if mine and rng.random() < 0.5:
+                        Product.objects.filter(pk=rng.choice(mine)).update(price_eur=Decimal(rng.randint(100, 999)) / 100)
+                    else:
+                        p = Product.objects.create(name=f"{PREFIX} {n}-{len(mine)}", category="other",
+                                                   price_eur=Decimal("1.00"))
+                        mine.append(p.pk)
+                stats.ok("write", time.perf_counter() - t0)
+            except OperationalError as e:
+                stats.fail("write", e)
+    finally:
+        connections.close_all()
+
+
+def reader(n: int, deadline: float, stats: Stats):
+    rng = random.Random(1000 + n)
+    try:
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                op = rng.random()
+                if op < 0.5:
+                    keyset_page(Product.objects.filter(in_stock=True), size=25)
+                elif op < 0.8:
+                    Product.objects.filter(category="other").count()
+                else:
+                    search_catalog("stress", limit=20)
+                stats.ok("read", time.perf_counter() - t0)
+            except OperationalError as e:
+                stats.fail("read", e)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Rasittaa SQLite-kantaa rinnakkaisilla luku- ja kirjoitussäikeillä."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=4)
+        parser.add_argument("--readers", type=int, default=16)
+        parser.add_argument("--duration", type=float, default=10.0)
+
+    def handle(self, *args, **opts):
+        db = settings.DATABASES["default"]
+        self.stdout.write(f"PRAGMAt: {settings.SQLITE_PRAGMAS or '(oletukset)'}  "
+                          f"CONN_MAX_AGE={db.get('CONN_MAX_AGE', 0)}  "
+                          f"lukureititin={'read' in settings.DATABASES}")
+        stats = Stats()
+        deadline = time.perf_counter() + opts["duration"]
+        threads = [threading.Thread(target=writer, args=(i, deadline, stats)) for i in range(opts["writers"])]
+        threads += [threading.Thread(target=reader, args=(i, deadline, stats)) for i in range(opts["readers"])]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        for kind in ("write", "read"):
+            lat = sorted(stats.latencies[kind])
+            if not lat:
+                self.stdout.write(f"{kind:5s}  0 ok, {stats.errors[kind]} virhettä")
+                continue
+            p99 = lat[min(len(lat) - 1, int(0.99 * len(lat)))]
+            self.stdout.write(
+                f"{kind:5s} {len(lat) / opts['duration']:8.1f} ops/s   p50 {statistics.median(lat) * 1000:7.2f} ms   "
+                f"p99 {p99 * 1000:7.2f} ms   virheitä {stats.errors[kind]}")
+        style = self.style.SUCCESS if stats.locked == 0 else self.style.ERROR
+        self.stdout.write(style(f"'database is locked': {stats.locked}"))
+
+        deleted, _ = Product.objects.filter(name__startswith=PREFIX).delete()
+        self.stdout.write(f"Siivottu {deleted} stress-riviä.")
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("farm", "0002_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["name", "id"], name="farm_prod_name_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["category", "name", "id"], name="farm_prod_cat_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["in_stock", "name", "id"], name="farm_prod_stock_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["category", "in_stock", "name", "id"], name="farm_prod_cat_stock_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="service",
+            index=models.Index(fields=["active", "title"], name="farm_serv_active_title_idx"),
+        ),
+    ]
@@ -0,0 +1,76 @@
+"""
+FTS5-hakuindeksi tuotteille ja palveluille (vain SQLite).
+
+Yksi virtuaalitaulu `farm_search`, rowid koodaa lähteen:
+  tuote   → rowid = id * 2
+  palvelu → rowid = id * 2 + 1
+Triggerit pitävät indeksin ajan tasalla myös bulk_create/update()-kutsuissa,
+jotka ohittavat Djangon signaalit.
+"""
+from django.db import migrations
+
+CATEGORY_LABEL = (
+    "CASE {col} WHEN 'potato' THEN 'Peruna' WHEN 'carrot' THEN 'Porkkana' "
+    "WHEN 'other' THEN 'Muu juures' ELSE {col} END"
+)
+
+FORWARD = [
+    "CREATE VIRTUAL TABLE farm_search USING fts5("
+    "title, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+
+    # tuotteet
+    "CREATE TRIGGER farm_product_search_ai AFTER INSERT ON farm_product BEGIN "
+    "INSERT INTO farm_search(rowid, title, body) VALUES "
+    f"(new.id * 2, new.name, {CATEGORY_LABEL.format(col='new.category')}); END",
+    "CREATE TRIGGER farm_product_search_ad AFTER DELETE ON farm_product BEGIN "
+    "DELETE FROM farm_search WHERE rowid = old.id * 2; END",
+    "CREATE TRIGGER farm_product_search_au AFTER UPDATE OF name, category ON farm_product BEGIN "
+    "DELETE FROM farm_search WHERE rowid = old.id * 2; "
+    "INSERT INTO farm_search(rowid, title, body) VALUES "
+    f"(new.id * 2, new.name, {CATEGORY_LABEL.format(col='new.category')}); END",
+
+    # palvelut
+    "CREATE TRIGGER farm_service_search_ai AFTER INSERT ON farm_service BEGIN "
+    "INSERT INTO farm_search(rowid, title, body) VALUES (new.id * 2 + 1, new.title, new.description); END",
+    "CREATE TRIGGER farm_service_search_ad AFTER DELETE ON farm_service BEGIN "
+    "DELETE FROM farm_search WHERE rowid = old.id * 2 + 1; END",
+    "CREATE TRIGGER farm_service_search_au AFTER UPDATE OF title, description ON farm_service BEGIN "
+    "DELETE FROM farm_search WHERE rowid = old.id * 2 + 1; "
+    "INSERT INTO farm_search(rowid, title, body) VALUES (new.id * 2 + 1, new.title, new.description); END",
+
+    # olemassa olevat rivit
+    "INSERT INTO farm_search(rowid, title, body) "
+    f"SELECT id * 2, name, {CATEGORY_LABEL.format(col='category')} FROM farm_product",
+    "INSERT INTO farm_search(rowid, title, body) "
+    "SELECT id * 2 + 1, title, description FROM farm_service",
+]
+
+BACKWARD = [
+    "DROP TRIGGER IF EXISTS farm_product_search_ai",
+    "DROP TRIGGER IF EXISTS farm_product_search_ad",
+    "DROP TRIGGER IF EXISTS farm_product_search_au",
+    "DROP TRIGGER IF EXISTS farm_service_search_ai",
+    "DROP TRIGGER IF EXISTS farm_service_search_ad",
+    "DROP TRIGGER IF EXISTS farm_service_search_au",
+    "DROP TABLE IF EXISTS farm_search",
+]
+
+
+def run(statements):
+    def apply(apps, schema_editor):
+        if schema_editor.connection.vendor != "sqlite":
+            return  # muilla kannoilla haku käyttää LIKE-varahakua
+        for sql in statements:
+            schema_editor.execute(sql)
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("farm", "0003_catalog_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(run(FORWARD), run(BACKWARD)),
+    ]
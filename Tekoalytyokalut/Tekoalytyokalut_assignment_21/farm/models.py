@@ -12,9 +12,17 @@ class Product(models.Model):
     price_eur = models.DecimalField(max_digits=6, decimal_places=2)
     in_stock = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # Last-Modified / välimuistin leima
 
     class Meta:
         ordering = ["name"]
+        indexes = [
+            # keyset-sivutus (name, id) + julkisen listan ja adminin list_filter-suodattimet
+            models.Index(fields=["name", "id"], name="farm_prod_name_id_idx"),
+            models.Index(fields=["category", "name", "id"], name="farm_prod_cat_name_idx"),
+            models.Index(fields=["in_stock", "name", "id"], name="farm_prod_stock_name_idx"),
+            models.Index(fields=["category", "in_stock", "name", "id"], name="farm_prod_cat_stock_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.name} ({self.get_category_display()})"
@@ -24,9 +32,13 @@ class Service(models.Model):
     title = models.CharField(max_length=120)
     description = models.TextField(blank=True)
     active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["title"]
+        indexes = [
+            models.Index(fields=["active", "title"], name="farm_serv_active_title_idx"),
+        ]
 
     def __str__(self) -> str:
         return self.title
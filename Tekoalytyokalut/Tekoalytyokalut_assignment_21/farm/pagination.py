@@ -0,0 +1,98 @@
+"""
+Keyset- eli kursorisivutus.
+
+OFFSET-sivutus lukee ja heittää pois kaikki edeltävät rivit, joten syvät sivut
+hidastuvat katalogin kasvaessa. Tässä seuraava sivu haetaan ehdolla
+(name, id) > (viimeinen_name, viimeinen_id), joka osuu suoraan (…, name, id)
+-indekseihin: jokainen sivu on yksi indeksihaku + enintään size+1 riviä.
+"""
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+
+from django.db.models import Q
+
+
+@dataclass
+class KeysetPage:
+    items: list = field(default_factory=list)
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+
+
+def encode_cursor(value: str, pk: int) -> str:
+    raw = json.dumps([value, pk], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str | None):
+    """Palauttaa (arvo, id) tai None, jos kursori puuttuu tai on rikki."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, pk = json.loads(raw.decode("utf-8"))
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+        return None
+    if not isinstance(value, str) or not isinstance(pk, int):
+        return None
+    return value, pk
+
+
+def _row_key(row, order_field: str):
+    """(arvo, id) mallioliosta tai .values()-sanakirjasta."""
+    if isinstance(row, dict):
+        return row[order_field], row["id"]
+    return getattr(row, order_field), row.pk
+
+
+def _window(qs, after_key, before_key, size: int, order_field: str):
+    """Sivun kysely (size+1 riviä, jotta tiedetään onko lisää)."""
+    if before_key is not None:
+        value, pk = before_key
+        return qs.filter(Q(**{f"{order_field}__lte": value}), Q(**{f"{order_field}__lt": value}) | Q(id__lt=pk)) \
+                 .order_by(f"-{order_field}", "-id")[:size + 1]
+    if after_key is not None:
+        value, pk = after_key
+        # x >= v AND (x > v OR id > pk): erillinen x-ehto antaa indeksille alarajan
+        qs = qs.filter(Q(**{f"{order_field}__gte": value}), Q(**{f"{order_field}__gt": value}) | Q(id__gt=pk))
+    return qs.order_by(order_field, "id")[:size + 1]
+
+
+def _build_page(rows: list, after_key, before_key, size: int, order_field: str) -> KeysetPage:
+    has_more = len(rows) > size
+    rows = rows[:size]
+    if before_key is not None:
+        rows = rows[::-1]
+    page = KeysetPage(items=rows)
+    if not rows:
+        return page
+    first, last = _row_key(rows[0], order_field), _row_key(rows[-1], order_field)
+    if before_key is not None:
+        # kursorin rivi itse on tämän sivun jälkeen → "seuraava" on aina olemassa
+        page.next_cursor = encode_cursor(*last)
+        if has_more:
+            page.prev_cursor = encode_cursor(*first)
+    else:
+        if has_more:
+            page.next_cursor = encode_cursor(*last)
+        if after_key is not None:
+            page.prev_cursor = encode_cursor(*first)
+    return page
+
+
+def keyset_page(qs, after: str | None = None, before: str | None = None, size: int = 25,
+                order_field: str = "name") -> KeysetPage:
+    """Sivu järjestyksessä (order_field, id). `after` → eteenpäin, `before` → taaksepäin."""
+    after_key, before_key = decode_cursor(after), decode_cursor(before)
+    rows = list(_window(qs, after_key, before_key, size, order_field))
+    return _build_page(rows, after_key, before_key, size, order_field)
+
+
+async def akeyset_page(qs, after: str | None = None, before: str | None = None, size: int = 25,
+                       order_field: str = "name") -> KeysetPage:
+    """Sama kuin keyset_page, mutta async-ORMilla (ASGI-näkymille)."""
+    after_key, before_key = decode_cursor(after), decode_cursor(before)
+    rows = [row async for row in _window(qs, after_key, before_key, size, order_field).aiterator()]
+    return _build_page(rows, after_key, before_key, size, order_field)
@@ -0,0 +1,112 @@
+"""
+Tuote- ja palveluhaku SQLite FTS5:llä (taulu ja triggerit: migraatio 0004).
+
+rowid koodaa lähteen: tuote = id * 2, palvelu = id * 2 + 1.
+Muilla tietokannoilla (tai ilman FTS5:tä) haku putoaa LIKE-hakuun.
+"""
+import re
+from dataclasses import dataclass
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Product, Service
+
+SEARCH_TABLE = "farm_search"
+MAX_TERMS = 8
+_HL_START, _HL_END = "\x02", "\x03"   # korostusmerkit, korvataan <mark>-tageilla escapen jälkeen
+
+KINDS = {"product": (Product, 0), "service": (Service, 1)}
+# mallin kenttä → FTS-sarake (adminin search_fields rajaa haun näihin sarakkeisiin)
+FTS_COLUMNS = {"product": {"name": "title"}, "service": {"title": "title", "description": "body"}}
+
+# rebuild_search_index käyttää näitä (samat kuin migraatiossa 0004)
+CATEGORY_LABEL_SQL = " ".join(
+    ["CASE category"] + [f"WHEN '{value}' THEN '{label}'" for value, label in Product.CATEGORY_CHOICES]
+    + ["ELSE category END"]
+)
+REBUILD_SQL = [
+    f"DELETE FROM {SEARCH_TABLE}",
+    f"INSERT INTO {SEARCH_TABLE}(rowid, title, body) SELECT id * 2, name, {CATEGORY_LABEL_SQL} FROM farm_product",
+    f"INSERT INTO {SEARCH_TABLE}(rowid, title, body) SELECT id * 2 + 1, title, description FROM farm_service",
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')",
+]
+
+
+@dataclass
+class SearchHit:
+    kind: str
+    obj: object
+    rank: float
+    snippet: str
+
+
+def fts_available() -> bool:
+    return connection.vendor == "sqlite"
+
+
+def fts_query(text: str) -> str:
+    """Käyttäjän syöte → turvallinen FTS5-kysely: jokainen sana etuliitehakuna, AND-ehdoin."""
+    terms = re.findall(r"\w+", text.lower())[:MAX_TERMS]
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+def _snippet_html(raw: str) -> str:
+    return mark_safe(escape(raw).replace(_HL_START, "<mark>").replace(_HL_END, "</mark>"))
+
+
+def search_catalog(text: str, limit: int = 50) -> list:
+    """Relevanssijärjestyksessä (bm25, otsikko painavampi) tuotteet ja palvelut."""
+    query = fts_query(text)
+    if not query:
+        return []
+    if not fts_available():
+        return _like_search(text, limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, bm25({SEARCH_TABLE}, 10.0, 1.0) AS score, "
+            f"snippet({SEARCH_TABLE}, -1, %s, %s, '…', 12) "
+            f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s ORDER BY score LIMIT %s",
+            [_HL_START, _HL_END, query, limit],
+        )
+        rows = cursor.fetchall()
+
+    # haetaan oliot kahdella kyselyllä (ei N+1)
+    ids = {kind: [rowid // 2 for rowid, _, _ in rows if rowid % 2 == parity]
+           for kind, (_, parity) in KINDS.items()}
+    objects = {kind: model.objects.in_bulk(ids[kind]) for kind, (model, _) in KINDS.items()}
+
+    hits = []
+    for rowid, score, snippet in rows:
+        kind = "service" if rowid % 2 else "product"
+        obj = objects[kind].get(rowid // 2)
+        if obj is not None:
+            hits.append(SearchHit(kind, obj, score, _snippet_html(snippet)))
+    return hits
+
+
+def _like_search(text: str, limit: int) -> list:
+    hits = [SearchHit("product", p, 0.0, escape(p.name))
+            for p in Product.objects.filter(name__icontains=text)[:limit]]
+    hits += [SearchHit("service", s, 0.0, escape(s.title))
+             for s in Service.objects.filter(Q(title__icontains=text) | Q(description__icontains=text))[:limit]]
+    return hits[:limit]
+
+
+def matching_pks(kind: str, text: str, columns=None):
+    """
+    Alikysely adminin hakuun: `queryset.filter(pk__in=matching_pks(...))` – yksi SQL-kysely.
+    columns rajaa haun FTS-sarakkeisiin (esim. ["title"]), muuten haetaan kaikista.
+    """
+    _, parity = KINDS[kind]
+    query = fts_query(text)
+    if columns:
+        query = f"{{{' '.join(columns)}}} : ({query})"
+    return RawSQL(
+        f"SELECT rowid / 2 FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s AND rowid %% 2 = %s",
+        [query, parity],
+    )
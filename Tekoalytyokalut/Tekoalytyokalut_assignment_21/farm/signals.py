@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import touch
+from .models import Product, Service
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Service)
+def catalog_saved(sender, instance, **kwargs):
+    touch(sender)
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Service)
+def catalog_deleted(sender, **kwargs):
+    touch(sender)
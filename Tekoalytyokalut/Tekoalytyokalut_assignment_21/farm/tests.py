@@ -1,31 +1,463 @@
-from django.db import models
+import shutil
+import tempfile
+from decimal import Decimal
+from io import StringIO
 
-class Product(models.Model):
-    CATEGORY_CHOICES = [
-        ("potato", "Peruna"),
-        ("carrot", "Porkkana"),
-        ("other", "Muu juures"),
-    ]
-    name = models.CharField(max_length=100)
-    category = models.CharField(max_length=20, choices=CATEGORY_CHOICES)
-    price_eur = models.DecimalField(max_digits=6, decimal_places=2)
-    in_stock = models.BooleanField(default=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+from django.contrib.auth import get_user_model
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
 
-    class Meta:
-        ordering = ["name"]
+from mysite.static import StaticFilesMiddleware
 
-    def __str__(self):
-        return f"{self.name} ({self.get_category_display()})"
+from .benchmark import VIEW_BUDGETS, measure_view, seed_catalog, view_urls, warm_stamps
+from .caching import _stamp_key
+from .models import Product, Service
 
 
-class Service(models.Model):
-    title = models.CharField(max_length=120)
-    description = models.TextField(blank=True)
-    active = models.BooleanField(default=True)
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Product.objects.create(name="Siikli", category="potato", price_eur=Decimal("2.50"))
+        Service.objects.create(title="Kotiinkuljetus", description="Perjantaisin")
 
-    class Meta:
-        ordering = ["title"]
+    def test_second_request_is_served_from_cache(self):
+        url = reverse("products")
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertContains(response, "Siikli")
 
-    def __str__(self):
-        return self.title
+    def test_save_and_delete_invalidate_page(self):
+        url = reverse("products")
+        self.client.get(url)
+        Product.objects.create(name="Nantes", category="carrot", price_eur=Decimal("1.90"))
+        self.assertContains(self.client.get(url), "Nantes")
+        Product.objects.filter(name="Nantes").get().delete()
+        self.assertNotContains(self.client.get(url), "Nantes")
+
+    def test_service_change_does_not_invalidate_products(self):
+        self.client.get(reverse("products"))
+        Service.objects.create(title="Lajittelu")
+        with self.assertNumQueries(0):
+            self.client.get(reverse("products"))
+
+    def test_conditional_get_returns_304_until_change(self):
+        url = reverse("services")
+        first = self.client.get(url)
+        self.assertIn("ETag", first)
+        self.assertIn("Last-Modified", first)
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+        Service.objects.create(title="Lajittelu")
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertContains(changed, "Lajittelu")
+
+    def test_stamp_recomputed_after_cache_clear(self):
+        url = reverse("products")
+        etag = self.client.get(url)["ETag"]
+        cache.clear()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_delete_changes_etag_after_cache_clear(self):
+        # poisto ei muuta Max(updated_at):ia → leiman pitää muuttua silti myös uudelleenlaskettuna
+        Product.objects.create(name="Nantes", category="carrot", price_eur=Decimal("1.90"))
+        url = reverse("products")
+        etag = self.client.get(url)["ETag"]
+        Product.objects.get(name="Siikli").delete()
+        cache.clear()   # esim. prosessin uudelleenkäynnistys
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, "Siikli")
+
+    def test_stale_stamp_from_concurrent_request_is_dropped_on_commit(self):
+        url = reverse("products")
+        etag = self.client.get(url)["ETag"]
+        stale = cache.get(_stamp_key(Product))
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(name="Nantes", category="carrot", price_eur=Decimal("1.90"))
+            cache.set(_stamp_key(Product), stale)   # rinnakkainen pyyntö ennen commitia
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Nantes")
+
+    def test_last_modified_is_newest_row(self):
+        newest = Product.objects.latest("updated_at").updated_at
+        response = self.client.get(reverse("products"))
+        self.assertEqual(response["Last-Modified"], http_date(newest.timestamp()))
+
+
+class ProductPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        categories = ["potato", "carrot", "other"]
+        Product.objects.bulk_create(
+            Product(name=f"Tuote {i:03d}", category=categories[i % 3],
+                    price_eur=Decimal("1.00"), in_stock=i % 2 == 0)
+            for i in range(120)
+        )
+        # sama nimi kahdella rivillä → id ratkaisee järjestyksen
+        Product.objects.create(name="Tuote 050", category="potato", price_eur=Decimal("1.00"))
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, params):
+        """Käy kaikki sivut läpi next-linkkejä seuraten; palauttaa (nimet, sivujen koot)."""
+        url, names, sizes = reverse("products"), [], []
+        query = params
+        while query is not None:
+            response = self.client.get(url + query)
+            items = list(response.context["items"])
+            names += [(p.name, p.pk) for p in items]
+            sizes.append(len(items))
+            query = response.context["next_url"]
+        return names, sizes
+
+    def test_walk_visits_every_row_once_in_order(self):
+        names, sizes = self.walk("?size=25")
+        expected = list(Product.objects.order_by("name", "id").values_list("name", "id"))
+        self.assertEqual(names, expected)
+        self.assertTrue(all(s <= 25 for s in sizes))
+
+    def test_page_size_is_bounded(self):
+        response = self.client.get(reverse("products") + "?size=100000")
+        self.assertEqual(len(response.context["items"]), 100)
+        response = self.client.get(reverse("products"))
+        self.assertEqual(len(response.context["items"]), 25)
+
+    def test_constant_queries_regardless_of_depth(self):
+        query = "?size=10"
+        for _ in range(5):
+            cache.clear()
+            with self.assertNumQueries(2):   # leima (yksi aggregaatti) + yksi sivuhaku
+                response = self.client.get(reverse("products") + query)
+            query = response.context["next_url"]
+
+    def test_filters_combine_with_cursor(self):
+        names, _ = self.walk("?category=carrot&in_stock=0&size=7")
+        expected = list(Product.objects.filter(category="carrot", in_stock=False)
+                        .order_by("name", "id").values_list("name", "id"))
+        self.assertEqual(names, expected)
+
+    def test_previous_link_returns_preceding_page(self):
+        first = self.client.get(reverse("products") + "?size=10")
+        second = self.client.get(reverse("products") + first.context["next_url"])
+        back = self.client.get(reverse("products") + second.context["prev_url"])
+        self.assertEqual(list(back.context["items"]), list(first.context["items"]))
+
+    def test_invalid_cursor_and_filters_fall_back_to_first_page(self):
+        response = self.client.get(reverse("products") + "?after=%%%&category=banana&in_stock=maybe")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["items"][0].name, "Tuote 000")
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.siikli = Product.objects.create(name="Siikli varhaisperuna", category="potato", price_eur=Decimal("3.00"))
+        Product.objects.create(name="Nantes", category="carrot", price_eur=Decimal("1.90"))
+        Service.objects.create(title="Kotiinkuljetus", description="Tuomme perunat ovelle perjantaisin")
+
+    def search(self, q):
+        return self.client.get(reverse("search"), {"q": q}).context["hits"]
+
+    def test_prefix_search_finds_products_and_services(self):
+        hits = self.search("peru")
+        self.assertEqual({h.kind for h in hits}, {"product", "service"})
+        self.assertEqual([h.obj for h in self.search("siik")], [self.siikli])
+
+    def test_category_label_is_searchable(self):
+        self.assertEqual([h.obj.name for h in self.search("porkkana")], ["Nantes"])
+
+    def test_title_match_ranks_above_description(self):
+        Service.objects.create(title="Perunan lajittelu", description="")
+        hits = self.search("perunan")
+        self.assertEqual(hits[0].obj.title, "Perunan lajittelu")
+
+    def test_index_follows_updates_deletes_and_bulk_create(self):
+        self.siikli.name = "Rosamunda"
+        self.siikli.save()
+        self.assertEqual(self.search("siikli"), [])
+        self.assertEqual(len(self.search("rosamunda")), 1)
+        self.siikli.delete()
+        self.assertEqual(self.search("rosamunda"), [])
+        Product.objects.bulk_create([Product(name="Puikula", category="potato", price_eur=Decimal("4.00"))])
+        cache.clear()   # bulk_create ohittaa signaalit, triggerit eivät
+        self.assertEqual(len(self.search("puikula")), 1)
+
+    def test_snippet_is_escaped(self):
+        Service.objects.create(title="<b>Peruna</b>", description="<script>x</script> peruna")
+        html = self.client.get(reverse("search"), {"q": "peruna"}).content.decode()
+        self.assertNotIn("<script>", html)
+        self.assertIn("<mark>", html)
+
+    def test_search_query_count_and_operator_input(self):
+        warm_stamps()
+        for _ in range(2):   # hakusivuja ei tallenneta välimuistiin → toistokin kysyy kannasta
+            with self.assertNumQueries(3):   # FTS-haku + tuotteet + palvelut (leimat jo välimuistissa)
+                self.search("peru")
+        self.assertEqual(self.search('"OR NEAR( *'), [])
+
+    def test_admin_search_uses_fts(self):
+        from django.contrib.auth.models import User
+        admin = User.objects.create_superuser("admin", "a@example.com", "pw")
+        self.client.force_login(admin)
+        response = self.client.get(reverse("admin:farm_product_changelist"), {"q": "varhais"})
+        self.assertEqual(list(response.context["cl"].result_list), [self.siikli])
+        # vain search_fields (name): kategorian nimi ei osu, toisin kuin julkisessa haussa
+        response = self.client.get(reverse("admin:farm_product_changelist"), {"q": "porkkana"})
+        self.assertEqual(list(response.context["cl"].result_list), [])
+
+    def test_rebuild_command(self):
+        out = StringIO()
+        call_command("rebuild_search_index", stdout=out)
+        self.assertIn("Indeksoitu 3", out.getvalue())
+        self.assertEqual(len(self.search("siikli")), 1)
+
+
+class CatalogImportExportTests(TestCase):
+    CSV = (
+        "name,category,price_eur,in_stock\n"
+        "Siikli,potato,2.50,1\n"
+        "Nantes,Porkkana,\"1,90\",ei\n"
+        ",potato,1.00,1\n"
+        "Rosamunda,banana,1.00,1\n"
+        "Lemmi,potato,abc,1\n"
+        "Timo,potato,3.20,\n"
+    )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_import_validates_and_creates(self):
+        from .catalog_io import import_products
+        stats = import_products(StringIO(self.CSV), batch_size=2)
+        self.assertEqual((stats.created, stats.updated), (3, 0))
+        self.assertEqual([line for line, _ in stats.errors], [4, 5, 6])
+        nantes = Product.objects.get(name="Nantes")
+        self.assertEqual((nantes.category, nantes.price_eur, nantes.in_stock), ("carrot", Decimal("1.90"), False))
+        self.assertTrue(Product.objects.get(name="Timo").in_stock)
+
+    def test_import_upserts_by_name_and_invalidates_cache(self):
+        from .catalog_io import import_products
+        Product.objects.create(name="Siikli", category="other", price_eur=Decimal("9.99"))
+        self.client.get(reverse("products"))
+        stats = import_products(StringIO("name,category,price_eur\nSiikli,potato,2.50\nUusi,carrot,1\n"))
+        self.assertEqual((stats.created, stats.updated), (1, 1))
+        self.assertEqual(Product.objects.filter(name="Siikli").count(), 1)
+        self.assertEqual(Product.objects.get(name="Siikli").price_eur, Decimal("2.50"))
+        self.assertContains(self.client.get(reverse("products")), "Uusi")
+
+    def test_import_batches_use_constant_queries(self):
+        from .catalog_io import import_products
+        rows = "".join(f"Tuote {i},potato,1.00,1\n" for i in range(300))
+        # per erä: SAVEPOINT + name__in-haku + yksi INSERT + RELEASE  (3 erää à 100)
+        with self.assertNumQueries(3 * 4):
+            import_products(StringIO("name,category,price_eur,in_stock\n" + rows), batch_size=100)
+        self.assertEqual(Product.objects.count(), 300)
+
+    def test_strict_import_stops_on_first_error(self):
+        from .catalog_io import RowError, import_products
+        with self.assertRaisesMessage(RowError, "rivi 4"):
+            import_products(StringIO(self.CSV), batch_size=100, strict=True)
+
+    def test_export_endpoint_streams_filtered_csv(self):
+        Product.objects.create(name="Siikli", category="potato", price_eur=Decimal("2.50"))
+        Product.objects.create(name="Nantes", category="carrot", price_eur=Decimal("1.90"), in_stock=False)
+        response = self.client.get(reverse("products_export"), {"category": "carrot"})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        body = b"".join(response.streaming_content).decode()
+        self.assertEqual(body.splitlines(), ["name,category,price_eur,in_stock", "Nantes,carrot,1.90,0"])
+
+    def test_export_import_round_trip(self):
+        for i in range(50):
+            Product.objects.create(name=f"Tuote {i}", category="other", price_eur=Decimal("1.25"), in_stock=i % 2 == 0)
+        out = StringIO()
+        call_command("export_products", "--chunk-size", "7", stdout=out)
+        before = list(Product.objects.order_by("id").values_list("name", "category", "price_eur", "in_stock"))
+        Product.objects.all().delete()
+        from .catalog_io import import_products
+        import_products(StringIO(out.getvalue()))
+        after = list(Product.objects.order_by("id").values_list("name", "category", "price_eur", "in_stock"))
+        self.assertEqual(after, before)
+
+
+class JsonApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Product.objects.bulk_create(
+            Product(name=f"Tuote {i:02d}", category="potato" if i % 2 else "carrot",
+                    price_eur=Decimal("1.50"), in_stock=i % 3 != 0)
+            for i in range(60)
+        )
+        Service.objects.create(title="Kotiinkuljetus", description="Perjantaisin")
+        Service.objects.create(title="Lajittelu", active=False)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_products_payload_is_projected_and_paginated(self):
+        data = self.client.get(reverse("api_products"), {"size": 20}).json()
+        self.assertEqual(data["count"], 60)
+        self.assertEqual(len(data["results"]), 20)
+        self.assertEqual(set(data["results"][0]), {"id", "name", "category", "price_eur", "in_stock"})
+        self.assertEqual(data["results"][0]["price_eur"], "1.50")
+        self.assertIsNone(data["previous"])
+
+        names = [r["name"] for r in data["results"]]
+        while data["next"]:
+            data = self.client.get(data["next"]).json()
+            names += [r["name"] for r in data["results"]]
+        self.assertEqual(names, sorted(f"Tuote {i:02d}" for i in range(60)))
+
+    def test_products_filters_and_count(self):
+        data = self.client.get(reverse("api_products"), {"category": "carrot", "in_stock": "0"}).json()
+        expected = Product.objects.filter(category="carrot", in_stock=False).count()
+        self.assertEqual(data["count"], expected)
+        self.assertTrue(all(r["category"] == "carrot" and not r["in_stock"] for r in data["results"]))
+
+    def test_services_active_filter(self):
+        data = self.client.get(reverse("api_services"), {"active": "1"}).json()
+        self.assertEqual([r["title"] for r in data["results"]], ["Kotiinkuljetus"])
+
+    def test_gzip_when_accepted(self):
+        response = self.client.get(reverse("api_products"), {"size": 100}, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_read_only(self):
+        self.assertEqual(self.client.post(reverse("api_products")).status_code, 405)
+
+    def test_constant_queries_per_page(self):
+        data = self.client.get(reverse("api_products"), {"size": 10}).json()
+        for _ in range(3):
+            with self.assertNumQueries(1):   # pelkkä sivuhaku; count on välimuistissa
+                data = self.client.get(data["next"]).json()
+
+    def test_count_follows_catalog_changes(self):
+        self.assertEqual(self.client.get(reverse("api_products")).json()["count"], 60)
+        Product.objects.create(name="Uusi", category="other", price_eur=Decimal("1.00"))
+        self.assertEqual(self.client.get(reverse("api_products")).json()["count"], 61)
+
+    async def test_async_client(self):
+        response = await self.async_client.get(reverse("api_services"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 2)
+
+
+class QueryBudgetTests(TestCase):
+    """Kyselymäärä per näkymä ei saa kasvaa katalogin koon mukana."""
+
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(user)
+        # hakutermi osuu molempiin lajeihin → haku tekee täyden budjetin (FTS + kaksi in_bulkia)
+        Product.objects.create(name="Siikli", category="potato", price_eur=Decimal("2.50"))
+        Service.objects.create(title="Siikli", description="Siiklin lajittelu")
+
+    def assert_budgets(self):
+        for name, url in view_urls().items():
+            cache.clear()
+            warm_stamps()
+            with self.subTest(view=name, rows=Product.objects.count()), self.assertNumQueries(VIEW_BUDGETS[name]):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+    def test_budgets_hold_for_small_and_large_catalog(self):
+        seed_catalog(30)
+        self.assert_budgets()
+        seed_catalog(600, seed=7)
+        self.assert_budgets()
+
+    def test_measure_view_reports_percentiles_and_queries(self):
+        seed_catalog(10)
+        result = measure_view(self.client, reverse("products"), 3, cold=True)
+        self.assertEqual(result["status"], 200)
+        self.assertEqual(result["n"], 3)
+        self.assertEqual((result["queries_min"], result["queries_max"]), (1, 1))
+        self.assertLessEqual(result["p50_ms"], result["max_ms"])
+
+
+class SqliteTuningTests(TestCase):
+    def test_pragmas_applied_on_connection(self):
+        from django.db import connection
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)        # NORMAL
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 20000)
+            cursor.execute("PRAGMA cache_size")
+            self.assertEqual(cursor.fetchone()[0], -65536)
+
+    def test_router_reads_from_default_inside_transaction(self):
+        from mysite.sqlite import ReadRouter
+        self.assertEqual(ReadRouter().db_for_read(Product), "default")   # TestCase = atomic
+        self.assertEqual(ReadRouter().db_for_write(Product), "default")
+
+
+class ReadRouterTests(SimpleTestCase):
+    def test_reads_go_to_read_alias_outside_transaction(self):
+        from mysite.sqlite import ReadRouter
+        router = ReadRouter()
+        self.assertEqual(router.db_for_read(Product), "read")
+        self.assertFalse(router.allow_migrate("read", "farm"))
+        self.assertTrue(router.allow_migrate("default", "farm"))
+
+
+@override_settings(
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "mysite.storage.CompressedManifestStaticFilesStorage"},
+    },
+    MIDDLEWARE=["mysite.static.StaticFilesMiddleware"],
+)
+class ProductionStaticTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        static_root = tempfile.mkdtemp(prefix="farm-static-")
+        cls.addClassCleanup(shutil.rmtree, static_root, ignore_errors=True)
+        cls.enterClassContext(override_settings(STATIC_ROOT=static_root))
+        call_command("collectstatic", interactive=False, verbosity=0)
+
+    def test_hashed_names_and_compressed_variants(self):
+        url = staticfiles_storage.url("css/farm.css")
+        self.assertRegex(url, r"/static/css/farm\.[0-9a-f]{12}\.css$")
+        hashed = staticfiles_storage.stored_name("admin/css/base.css")
+        self.assertTrue(staticfiles_storage.exists(hashed + ".gz"))
+        self.assertFalse(staticfiles_storage.exists(staticfiles_storage.stored_name("css/farm.css") + ".gz"))  # < MIN_SIZE
+
+    def test_hashed_file_is_immutable_and_precompressed(self):
+        url = staticfiles_storage.url("admin/css/base.css")
+        response = self.client.get(url, headers={"Accept-Encoding": "gzip, deflate"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/css")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertIn("Accept-Encoding", response["Vary"])
+        again = self.client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": response["ETag"]})
+        self.assertEqual(again.status_code, 304)
+
+    def test_accept_encoding_honours_q_values(self):
+        url = staticfiles_storage.url("admin/css/base.css")
+        for header, expected in [("gzip;q=0, deflate", None), ("gzip;q=0.5, *;q=0.1", "gzip"),
+                                 ("x-gzip-ish", None), ("*", "gzip"), ("GZIP; q=1", "gzip")]:
+            with self.subTest(header=header):
+                response = self.client.get(url, headers={"Accept-Encoding": header})
+                self.assertEqual(response.get("Content-Encoding"), expected)
+
+    def test_unhashed_file_revalidates_and_traversal_is_rejected(self):
+        response = self.client.get("/static/admin/css/base.css")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Content-Encoding", response)
+        self.assertIn("must-revalidate", response["Cache-Control"])
+        middleware = StaticFilesMiddleware(lambda request: None)
+        self.assertIsNone(middleware.serve(RequestFactory().get("/static/x"), "../../etc/passwd"))
@@ -1,8 +1,12 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     path("", views.home, name="home"),
     path("products/", views.products, name="products"),
+    path("products/export.csv", views.products_export, name="products_export"),
     path("services/", views.services, name="services"),
+    path("search/", views.search, name="search"),
+    path("api/products/", api.products, name="api_products"),
+    path("api/services/", api.services, name="api_services"),
 ]
@@ -1,13 +1,75 @@
+from urllib.parse import urlencode
+
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
+from .caching import catalog_page
+from .catalog_io import export_rows
 from .models import Product, Service
+from .pagination import keyset_page
+from .search import search_catalog
+
+PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+TRUE_VALUES = {"1", "true", "yes", "on"}
+FALSE_VALUES = {"0", "false", "no", "off"}
 
 def home(request):
     return render(request, "home.html")
 
+def product_filters(params) -> dict:
+    """?category=potato&in_stock=1 → ORM-suodattimet; tuntemattomat arvot ohitetaan."""
+    filters = {}
+    category = params.get("category", "")
+    if category in dict(Product.CATEGORY_CHOICES):
+        filters["category"] = category
+    in_stock = params.get("in_stock", "").lower()
+    if in_stock in TRUE_VALUES:
+        filters["in_stock"] = True
+    elif in_stock in FALSE_VALUES:
+        filters["in_stock"] = False
+    return filters
+
+def page_size(params) -> int:
+    try:
+        size = int(params.get("size", PAGE_SIZE))
+    except ValueError:
+        size = PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+@catalog_page(Product)
 def products(request):
-    items = Product.objects.all()
-    return render(request, "products.html", {"items": items})
+    filters = product_filters(request.GET)
+    size = page_size(request.GET)
+    page = keyset_page(Product.objects.filter(**filters),
+                       after=request.GET.get("after"), before=request.GET.get("before"), size=size)
 
+    # säilytetään suodattimet sivulinkeissä
+    keep = {k: request.GET[k] for k in ("category", "in_stock", "size") if request.GET.get(k)}
+    next_url = f"?{urlencode({**keep, 'after': page.next_cursor})}" if page.next_cursor else None
+    prev_url = f"?{urlencode({**keep, 'before': page.prev_cursor})}" if page.prev_cursor else None
+    return render(request, "products.html", {
+        "items": page.items,
+        "next_url": next_url,
+        "prev_url": prev_url,
+        "categories": Product.CATEGORY_CHOICES,
+        "selected_category": filters.get("category", ""),
+        "selected_in_stock": request.GET.get("in_stock", ""),
+    })
+
+def products_export(request):
+    """Koko (suodatettu) katalogi CSV:nä; rivit virtaavat paloissa, ei koko listaa muistiin."""
+    qs = Product.objects.filter(**product_filters(request.GET))
+    response = StreamingHttpResponse(export_rows(qs), content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = 'attachment; filename="products.csv"'
+    return response
+
+@catalog_page(Service)
 def services(request):
     items = Service.objects.all()
     return render(request, "services.html", {"items": items})
+
+@catalog_page(Product, Service, store=False)
+def search(request):
+    q = request.GET.get("q", "").strip()
+    hits = search_catalog(q) if q else []
+    return render(request, "search.html", {"q": q, "hits": hits})
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 # --- Perusasetukset ---
@@ -54,8 +55,47 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "CONN_MAX_AGE": int(os.environ.get("DJANGO_CONN_MAX_AGE", "600")),  # pysyvät yhteydet (s), 0 = per pyyntö
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "timeout": 20,                     # odota lukkoa (s) ennen "database is locked"
+            "transaction_mode": "IMMEDIATE",   # kirjoitustransaktio varaa lukon heti → ei lukon päivitys-deadlockia
+        },
+    }
+}
+
+# Ajetaan jokaiselle uudelle yhteydelle (mysite/sqlite.py, connection_created)
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 20000,      # ms
+    "cache_size": -65536,       # KiB (64 MiB)
+    "mmap_size": 268435456,     # 256 MiB
+    "temp_store": "MEMORY",
+}
+if os.environ.get("DJANGO_SQLITE_PRAGMAS", "1") == "0":
+    SQLITE_PRAGMAS = {}   # vertailuajoihin (stress_db) ilman viritystä
+
+# Valinnainen lukureititin: lukukyselyt erilliselle query_only-yhteydelle samaan tiedostoon
+if os.environ.get("DJANGO_SQLITE_READ_ROUTER") == "1":
+    DATABASES["read"] = {
+        **DATABASES["default"],
+        "OPTIONS": {"timeout": 20},
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_ROUTERS = ["mysite.sqlite.ReadRouter"]
+
+# --- Välimuisti ---
+# Oletuksena prosessin oma muisti; useammalle workerille jaettu backend ympäristömuuttujilla,
+# esim. DJANGO_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache DJANGO_CACHE_LOCATION=redis://127.0.0.1:6379
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("DJANGO_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("DJANGO_CACHE_LOCATION", "mottonen-farm"),
     }
 }
+FARM_CACHE_TIMEOUT = int(os.environ.get("FARM_CACHE_TIMEOUT", "600"))  # sivuvälimuistin TTL sekunteina
+FARM_STAMP_TIMEOUT = int(os.environ.get("FARM_STAMP_TIMEOUT", "60"))   # muutosleiman TTL (kilpailutilanteiden raja)
 
 # --- Kieli ja aikavyöhyke ---
 LANGUAGE_CODE = "fi-fi"
@@ -0,0 +1,39 @@
+"""
+Tuotantoprofiili: DJANGO_SETTINGS_MODULE=mysite.settings_prod
+
+  python manage.py collectstatic --noinput --settings=mysite.settings_prod
+  gunicorn mysite.wsgi -w 4 -e DJANGO_SETTINGS_MODULE=mysite.settings_prod
+"""
+import os
+from pathlib import Path
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, MIDDLEWARE, SECRET_KEY, TEMPLATES
+
+DEBUG = False
+SECRET_KEY = os.environ.get("DJANGO_SECRET_KEY", SECRET_KEY)
+
+# Templatet käännetään kerran per prosessi (ei automaattista uudelleenlatausta)
+TEMPLATES = [{
+    **TEMPLATES[0],
+    "APP_DIRS": False,
+    "OPTIONS": {
+        **TEMPLATES[0]["OPTIONS"],
+        "loaders": [
+            ("django.template.loaders.cached.Loader", [
+                "django.template.loaders.filesystem.Loader",
+                "django.template.loaders.app_directories.Loader",
+            ]),
+        ],
+    },
+}]
+
+# Sisältöhashatut nimet + valmiiksi pakatut .gz/.br (mysite/storage.py)
+STATIC_ROOT = Path(os.environ.get("DJANGO_STATIC_ROOT", BASE_DIR / "staticfiles"))
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "mysite.storage.CompressedManifestStaticFilesStorage"},
+}
+
+# Static-tiedostot heti SecurityMiddlewaren jälkeen, ennen sessioita (mysite/static.py)
+MIDDLEWARE = [MIDDLEWARE[0], "mysite.static.StaticFilesMiddleware", *MIDDLEWARE[1:]]
@@ -0,0 +1,44 @@
+"""
+SQLite-tuotantoasetukset: PRAGMAt jokaiselle uudelle yhteydelle ja valinnainen lukureititin.
+
+WAL sallii yhtäaikaiset lukijat kirjoittajan rinnalla, busy_timeout odottaa lukkoa
+virheen sijaan ("database is locked"), ja synchronous=NORMAL on WAL-tilassa turvallinen
+(vain viimeisimmät transaktiot voivat kadota sähkökatkossa, kanta ei korruptoidu).
+"""
+from django.conf import settings
+from django.db import connections
+
+READ_ALIAS = "read"
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """connection_created-signaali: settings.SQLITE_PRAGMAS + query_only lukuyhteydelle."""
+    if connection.vendor != "sqlite":
+        return
+    pragmas = dict(getattr(settings, "SQLITE_PRAGMAS", {}))
+    if connection.alias == READ_ALIAS:
+        pragmas["query_only"] = "ON"   # lukureitin: kirjoitus tällä yhteydellä on virhe, ei hiljainen
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+class ReadRouter:
+    """
+    Lukukyselyt omalle (query_only) yhteydelle, kirjoitukset ja migraatiot defaultille.
+    Transaktion sisällä luetaan defaultista, jotta omat kirjoitukset näkyvät heti.
+    """
+
+    def db_for_read(self, model, **hints):
+        if connections["default"].in_atomic_block:
+            return "default"
+        return READ_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True   # sama tiedosto → viittaukset yhteyksien välillä ovat ok
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
@@ -0,0 +1,93 @@
+"""
+STATIC_ROOTin tarjoilu sovelluksesta ilman erillistä www-palvelinta (tuotantoprofiili).
+
+- Hashatut nimet (manifestissa) saavat `Cache-Control: public, max-age=31536000, immutable`.
+  Sisällön muuttuessa nimi muuttuu, joten selaimen ei tarvitse koskaan tarkistaa niitä uudelleen.
+- Muut tiedostot tarkistetaan ETagilla joka kerta.
+- Valmiiksi pakattu .br/.gz valitaan Accept-Encodingin mukaan (q-arvot huomioiden, q=0 = ei kelpaa).
+"""
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, max-age=0, must-revalidate"
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+
+def accepted_encodings(header: str) -> dict:
+    """Accept-Encoding → {koodaus: q}. Virheellinen q tulkitaan nollaksi."""
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def choose_encoding(header: str, path: str):
+    """Korkeimman q-arvon valmiiksi pakattu variantti (tasapelissä ENCODINGS-järjestys) tai (None, "")."""
+    accepted = accepted_encodings(header)
+    best, best_q = (None, ""), 0.0
+    for enc, ext in ENCODINGS:
+        q = accepted.get(enc, accepted.get("*", 0.0))
+        if q > best_q and os.path.isfile(path + ext):
+            best, best_q = (enc, ext), q
+    return best
+
+
+class StaticFilesMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = "/" + settings.STATIC_URL.lstrip("/")
+        self.root = str(settings.STATIC_ROOT)
+        self.immutable = set(getattr(staticfiles_storage, "hashed_files", {}).values())
+
+    def __call__(self, request):
+        if request.method in ("GET", "HEAD") and request.path.startswith(self.prefix):
+            response = self.serve(request, request.path[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name: str):
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        encoding, suffix = choose_encoding(request.headers.get("Accept-Encoding", ""), path)
+
+        stat = os.stat(path + suffix)
+        etag = f'"{int(stat.st_mtime)}-{stat.st_size}{suffix}"'
+        cache_control = IMMUTABLE if name in self.immutable else REVALIDATE
+        if request.headers.get("If-None-Match") == etag:
+            response = HttpResponseNotModified()
+        else:
+            content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            response = FileResponse(open(path + suffix, "rb"), content_type=content_type)
+            del response["Content-Disposition"]
+            if encoding:
+                response["Content-Encoding"] = encoding
+        response["ETag"] = etag
+        response["Cache-Control"] = cache_control
+        patch_vary_headers(response, ["Accept-Encoding"])
+        return response
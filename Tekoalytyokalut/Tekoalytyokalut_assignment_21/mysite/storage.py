@@ -0,0 +1,54 @@
+"""
+Static-tiedostot tuotantoon: sisältöhash tiedostonimessä (ManifestStaticFilesStorage) ja
+valmiiksi pakatut .gz- ja .br-versiot, jotka tehdään collectstaticin aikana.
+
+Brotli on valinnainen (pip install brotli). Ilman sitä tehdään vain .gz.
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # valinnainen riippuvuus
+    brotli = None
+
+COMPRESSIBLE = (".css", ".js", ".mjs", ".map", ".svg", ".json", ".txt", ".html", ".xml", ".ico")
+MIN_SIZE = 256          # pienempiä ei kannata pakata
+MAX_RATIO = 0.95        # pakattu versio talteen vain, jos se säästää vähintään 5 %
+
+
+def compress_variants(data: bytes) -> list:
+    """[(pääte, pakattu data)] pakkaustavoittain."""
+    variants = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", brotli.compress(data, quality=11)))
+    return [(suffix, blob) for suffix, blob in variants if len(blob) <= len(data) * MAX_RATIO]
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if not isinstance(processed, Exception):
+                names.add(name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        # vasta kaikkien kierrosten jälkeen: CSS:n url()-viittaukset voivat muuttaa lopullista hashia
+        for name in sorted(names):
+            for target in {name, self.stored_name(name)}:
+                self._compress(target)
+
+    def _compress(self, name: str) -> None:
+        if not name.endswith(COMPRESSIBLE):
+            return
+        with self.open(name) as f:
+            data = f.read()
+        if len(data) < MIN_SIZE:
+            return
+        for suffix, blob in compress_variants(data):
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(blob))
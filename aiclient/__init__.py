@@ -0,0 +1,42 @@
+"""
+aiclient — yhteinen OpenAI-asiakas CLI-skripteille
+
+- yksi AsyncOpenAI-asiakas ja httpx-yhteyspooli omassa event loop -säikeessään
+  (sync-skriptit kutsuvat samaa asiakasta säikeistä, async-koodi awaitaa)
+- RPM/TPM token bucket -ajastin: pyynnöt odottavat vuoroaan eivätkä törmää 429:ään
+- retry eksponentiaalisella backoffilla + jitterillä, Retry-After huomioiden
+- käyttökirjanpito (pyynnöt, tokenit, kuvat, odotukset) mallikohtaisesti
+- .env-lataus (cwd:stä ylöspäin, sitten repon juuri)
+
+Skriptit lisäävät repon juuren sys.pathiin ja tuovat tästä; raskaat riippuvuudet
+(asyncio, openai, httpx) ladataan vasta kun asiakas luodaan (nopea --help).
+"""
+
+import importlib
+
+# nimi → alimoduuli; ladataan ensimmäisellä käytöllä (PEP 562)
+_EXPORTS = {
+    "AIClient": "client",
+    "add_client_args": "cli",
+    "client_from_args": "cli",
+    "print_usage": "cli",
+    "MissingAPIKey": "env",
+    "load_env": "env",
+    "RateLimiter": "limits",
+    "TokenBucket": "limits",
+    "RetryPolicy": "retry",
+    "RETRYABLE_STATUS": "retry",
+    "is_retryable": "retry",
+    "retry_after_seconds": "retry",
+    "Usage": "usage",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module 'aiclient' has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,35 @@
+"""argparse-apurit skripteille (kevyt: AIClient ladataan vasta client_from_args-kutsussa)."""
+
+import sys
+
+DEFAULT_MAX_CONNECTIONS = 20
+
+
+def add_client_args(parser, retries: bool = True):
+    """retries=False: skriptillä on oma uusintakerroksensa (imggen_cli), --api-retries jätetään pois."""
+    g = parser.add_argument_group("OpenAI-asiakas (aiclient)")
+    g.add_argument("--rpm", type=float, default=None, help="Pyyntöjä/min (oletus OPENAI_RPM tai rajaton)")
+    g.add_argument("--tpm", type=float, default=None, help="Tokeneita/min (oletus OPENAI_TPM tai rajaton)")
+    g.add_argument("--max-connections", type=int, default=DEFAULT_MAX_CONNECTIONS,
+                   help="HTTP-yhteyspoolin koko")
+    if retries:
+        g.add_argument("--api-retries", type=int, default=4, help="Uusinnat per API-kutsu (429/5xx/verkko)")
+    g.add_argument("--usage", action="store_true", help="Tulosta käyttöyhteenveto lopuksi (stderr)")
+    return g
+
+
+def client_from_args(args, **overrides):
+    """AIClient komentoriviargumenteista; overrides voittaa (esim. base_url, max_retries=0)."""
+    from .client import AIClient
+    options = dict(rpm=args.rpm, tpm=args.tpm, max_connections=args.max_connections,
+                   max_retries=getattr(args, "api_retries", 4))
+    options.update(overrides)
+    return AIClient(**options)
+
+
+def print_usage(client, args=None):
+    """Käyttöyhteenveto stderriin, jos --usage (tai args=None)."""
+    if client is not None and (args is None or getattr(args, "usage", False)):
+        summary = client.usage.summary()
+        if summary:
+            print("\n=== API USAGE ===\n" + summary, file=sys.stderr)
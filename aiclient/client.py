@@ -0,0 +1,268 @@
+"""
+AIClient: yksi AsyncOpenAI-asiakas ja httpx-yhteyspooli omassa event loop -säikeessään.
+
+Sync-skriptit kutsuvat `client.chat(...)` mistä tahansa säikeestä, async-koodi `await client.achat(...)`.
+Kaikki pyynnöt kulkevat saman RPM/TPM-rajoittimen, retry-politiikan ja käyttökirjanpidon läpi.
+
+  from aiclient import AIClient
+  client = AIClient(rpm=500, tpm=200_000)
+  resp = client.chat(model="gpt-4o-mini", messages=[...])
+  print(client.usage.summary())
+"""
+
+import asyncio
+import atexit
+import os
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+from .cli import DEFAULT_MAX_CONNECTIONS
+from .env import MissingAPIKey, load_env
+from .limits import RateLimiter
+from .retry import RetryPolicy, retry_after_seconds, status_and_headers
+from .usage import Usage
+
+DEFAULT_COMPLETION_TOKENS = 512    # TPM-arvio, jos max_tokens puuttuu
+IMAGE_INPUT_TOKENS = 765           # vision-kuva (1024 px, detail=high) ≈ 765 tokenia
+
+
+def _env_float(name: str) -> Optional[float]:
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
+def estimate_chat_tokens(kwargs: dict) -> int:
+    """Karkea TPM-arvio ennen pyyntöä (~4 merkkiä/token + vastauksen yläraja); usage korjaa jälkikäteen."""
+    messages = kwargs.get("messages") or []
+    chars, images = 0, 0
+    for msg in messages:
+        content = msg.get("content")
+        if isinstance(content, str):
+            chars += len(content)
+        elif isinstance(content, list):
+            for part in content:
+                if part.get("type") == "text":
+                    chars += len(part.get("text", ""))
+                else:
+                    images += 1
+    completion = kwargs.get("max_tokens") or kwargs.get("max_completion_tokens") or DEFAULT_COMPLETION_TOKENS
+    return chars // 4 + 4 * len(messages) + images * IMAGE_INPUT_TOKENS + completion * (kwargs.get("n") or 1)
+
+
+class AIClient:
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None, *,
+                 rpm: Optional[float] = None, tpm: Optional[float] = None,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS, keepalive_s: float = 30.0,
+                 timeout: float = 600.0, max_retries: int = 4, verbose: bool = True):
+        if not api_key and not os.getenv("OPENAI_API_KEY"):
+            load_env()
+        self.base_url = base_url or os.getenv("OPENAI_BASE_URL") or None
+        # paikallinen stub ei tarkista avainta
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY") or ("local-stub" if self.base_url else None)
+        if not self.api_key:
+            raise MissingAPIKey("OPENAI_API_KEY puuttuu (ympäristö tai .env)")
+        self.max_connections = max_connections
+        self.keepalive_s = keepalive_s
+        self.timeout = timeout
+        self.verbose = verbose
+        self.retry = RetryPolicy(max_retries=max_retries)
+        self.limiter = RateLimiter(rpm if rpm is not None else _env_float("OPENAI_RPM"),
+                                   tpm if tpm is not None else _env_float("OPENAI_TPM"))
+        self.usage = Usage()
+        self._client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    # ---------- event loop -säie ----------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="aiclient-loop", daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+                atexit.register(self.close)
+        return self._loop
+
+    def _submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def run(self, coro):
+        """Aja korutiini asiakkaan loopissa ja odota tulos (sync-kutsujille)."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("AIClient.run() kutsuttu asiakkaan omasta event loopista; käytä await")
+        return self._submit(coro).result()
+
+    async def _on_loop(self, coro):
+        """Async-kutsujan loopista asiakkaan loopiin (pooli ja rajoitin ovat yhteisiä)."""
+        return await asyncio.wrap_future(self._submit(coro))
+
+    def _async_client(self):
+        if self._client is None:
+            import httpx
+            from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+            limits = httpx.Limits(max_connections=self.max_connections,
+                                  max_keepalive_connections=self.max_connections,
+                                  keepalive_expiry=self.keepalive_s)
+            # SDK:n omat uusinnat pois: retry + rajoitin hoidetaan täällä kaikille kutsuille yhdessä
+            self._client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, timeout=self.timeout,
+                                       max_retries=0, http_client=DefaultAsyncHttpxClient(limits=limits))
+        return self._client
+
+    def close(self):
+        if self._loop is None or not self._loop.is_running():
+            return
+        if self._client is not None:
+            try:
+                self._submit(self._client.close()).result(timeout=5)
+            except Exception:
+                pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- ydin: rajoitin + retry + kirjanpito ----------
+
+    def _log(self, msg: str):
+        if self.verbose:
+            print(f"    [api] {msg}", file=sys.stderr)
+
+    async def _request(self, model: str, tokens: int, send, retry_ok=lambda: True):
+        attempt, waited = 0, 0.0
+        while True:
+            waited += await self.limiter.acquire(tokens)
+            t0 = time.perf_counter()
+            try:
+                resp = await send()
+            except Exception as e:
+                self.limiter.settle(tokens, 0)   # epäonnistunut pyyntö ei kuluta tokeneita
+                status, _ = status_and_headers(e)
+                if status == 429:
+                    hinted = retry_after_seconds(e)
+                    self.limiter.pause(hinted if hinted is not None else self.retry.delay(attempt, e))
+                if retry_ok() and self.retry.should_retry(attempt, e):
+                    delay = self.retry.delay(attempt, e)
+                    attempt += 1
+                    self._log(f"retry {model} {attempt}/{self.retry.max_retries} in {delay:.1f}s ({e})")
+                    await asyncio.sleep(delay)
+                    waited += delay
+                    continue
+                self.usage.add(model, errors=1, retries=attempt)
+                raise
+            self.usage.record_response(model, resp, time.perf_counter() - t0, waited, attempt)
+            usage = getattr(resp, "usage", None)
+            self.limiter.settle(tokens, getattr(usage, "total_tokens", None))
+            return resp
+
+    async def _call(self, endpoint: str, tokens: int = 0, **kwargs):
+        target = self._async_client()
+        for part in endpoint.split("."):
+            target = getattr(target, part)
+        return await self._request(kwargs.get("model", endpoint), tokens, lambda: target(**kwargs))
+
+    # ---------- julkinen API: async ----------
+
+    async def arequest(self, endpoint: str, tokens: int = 0, **kwargs):
+        """Mikä tahansa SDK-kutsu pistepolulla, esim. arequest("embeddings.create", model=..., input=...)."""
+        return await self._on_loop(self._call(endpoint, tokens, **kwargs))
+
+    async def achat(self, **kwargs):
+        return await self.arequest("chat.completions.create", estimate_chat_tokens(kwargs), **kwargs)
+
+    async def aimages(self, **kwargs):
+        return await self.arequest("images.generate", **kwargs)
+
+    async def atranscribe(self, **kwargs):
+        kwargs = _buffer_upload(kwargs)
+        self.usage.add(kwargs.get("model"), upload_bytes=len(kwargs["file"][1]))
+        return await self.arequest("audio.transcriptions.create", **kwargs)
+
+    # ---------- julkinen API: sync (mistä tahansa säikeestä) ----------
+
+    def request(self, endpoint: str, tokens: int = 0, **kwargs):
+        return self.run(self._call(endpoint, tokens, **kwargs))
+
+    def chat(self, **kwargs):
+        return self.run(self._call("chat.completions.create", estimate_chat_tokens(kwargs), **kwargs))
+
+    def images(self, **kwargs):
+        return self.run(self._call("images.generate", **kwargs))
+
+    def transcribe(self, **kwargs):
+        kwargs = _buffer_upload(kwargs)
+        self.usage.add(kwargs.get("model"), upload_bytes=len(kwargs["file"][1]))
+        return self.run(self._call("audio.transcriptions.create", **kwargs))
+
+    @contextmanager
+    def speech_stream(self, chunk_size: int = 4096, **kwargs):
+        """
+        Striimattu TTS sync-kutsujalle: `with client.speech_stream(...) as chunks: for c in chunks: ...`
+        Palat siirtyvät loopista jonon kautta; uusinta vain ennen ensimmäistä palaa.
+        """
+        chunks: queue.Queue = queue.Queue()
+        end = object()
+        started = False
+
+        async def send():
+            nonlocal started
+            speech = self._async_client().audio.speech.with_streaming_response
+            async with speech.create(**kwargs) as resp:
+                async for chunk in resp.iter_bytes(chunk_size):
+                    started = True
+                    chunks.put(chunk)
+            return None
+
+        async def pump():
+            try:
+                self.usage.add(kwargs.get("model"), tts_chars=len(kwargs.get("input", "")))
+                await self._request(kwargs.get("model", "speech"), 0, send, retry_ok=lambda: not started)
+            except BaseException as e:
+                chunks.put(e)
+                raise
+            finally:
+                chunks.put(end)
+
+        future = self._submit(pump())
+
+        def iterate():
+            while (item := chunks.get()) is not end:
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+
+        try:
+            yield iterate()
+        finally:
+            if not future.done():
+                future.cancel()
+
+    def warm(self):
+        """Avaa TLS-yhteyden taustalla (esim. nauhoituksen aikana); virheet ohitetaan."""
+        async def _ping():
+            try:
+                await self._async_client().models.list()
+            except Exception:
+                pass
+        self._submit(_ping())
+
+
+def _buffer_upload(kwargs: dict) -> dict:
+    """Tiedosto-olio → (nimi, tavut), jotta uusinta lähettää saman sisällön uudelleen."""
+    f = kwargs.get("file")
+    if hasattr(f, "read"):
+        kwargs = {**kwargs, "file": (Path(getattr(f, "name", "audio")).name, f.read())}
+    elif isinstance(f, (str, Path)):
+        kwargs = {**kwargs, "file": (Path(f).name, Path(f).read_bytes())}
+    return kwargs
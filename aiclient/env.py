@@ -0,0 +1,50 @@
+""".env-tiedoston lataus ilman python-dotenvia."""
+
+import os
+from pathlib import Path
+from typing import Optional
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+class MissingAPIKey(RuntimeError):
+    """OPENAI_API_KEY puuttuu sekä ympäristöstä että .env-tiedostosta."""
+
+
+def find_env(start: Optional[Path] = None) -> Optional[Path]:
+    """Lähin .env nykyhakemistosta ylöspäin; muuten repon juuren .env."""
+    here = (start or Path.cwd()).resolve()
+    for folder in (here, *here.parents):
+        candidate = folder / ".env"
+        if candidate.is_file():
+            return candidate
+    candidate = REPO_ROOT / ".env"
+    return candidate if candidate.is_file() else None
+
+
+def parse_env(text: str) -> dict:
+    values = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#") or "=" not in line:
+            continue
+        if line.startswith("export "):
+            line = line[len("export "):]
+        key, value = line.split("=", 1)
+        value = value.strip()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+            value = value[1:-1]
+        elif " #" in value:
+            value = value.split(" #", 1)[0].rstrip()   # rivin lopun kommentti
+        values[key.strip()] = value
+    return values
+
+
+def load_env(path: Optional[Path] = None) -> Optional[Path]:
+    """Asettaa .env-arvot, joita ympäristössä ei vielä ole (ympäristö voittaa). Palauttaa käytetyn polun."""
+    path = path or find_env()
+    if path is None:
+        return None
+    for key, value in parse_env(path.read_text(encoding="utf-8")).items():
+        os.environ.setdefault(key, value)
+    return path
@@ -0,0 +1,85 @@
+"""RPM/TPM-rajoitin: kaksi token bucketia ja yhteinen tauko 429-vastauksen jälkeen."""
+
+import asyncio
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    `rate_per_min` yksikköä minuutissa, enintään `capacity` kerralla (oletus minuutin kiintiö).
+    Taso voi mennä negatiiviseksi, kun todellinen kulutus tarkentuu jälkikäteen (`adjust`).
+    """
+
+    def __init__(self, rate_per_min: float, capacity: Optional[float] = None, clock=time.monotonic):
+        self.rate = rate_per_min / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_min
+        self.clock = clock
+        self.level = self.capacity
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Sekunnit, kunnes `amount` on saatavilla (ei kuluta)."""
+        self._refill()
+        amount = min(amount, self.capacity)   # yli kapasiteetin menevä pyyntö odottaa täyttä ämpäriä
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def consume(self, amount: float):
+        self._refill()
+        self.level -= amount
+
+    def adjust(self, delta: float):
+        """Arvio → todellinen: delta > 0 palauttaa, delta < 0 kuluttaa lisää."""
+        self._refill()
+        self.level = min(self.capacity, self.level + delta)
+
+
+class RateLimiter:
+    """
+    Pyynnöt saavat vuoron saapumisjärjestyksessä (asyncio.Lock): ensimmäinen odottaa,
+    kunnes sekä RPM- että TPM-ämpärissä on tilaa, muut jonottavat sen takana.
+    """
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None, clock=time.monotonic):
+        self.requests = TokenBucket(rpm, clock=clock) if rpm else None
+        self.tokens = TokenBucket(tpm, clock=clock) if tpm else None
+        self.clock = clock
+        self.paused_until = 0.0
+        self._lock = None   # luodaan asiakkaan event loopissa
+
+    def wait_time(self, tokens: int) -> float:
+        waits = [self.paused_until - self.clock()]
+        if self.requests:
+            waits.append(self.requests.wait_time(1))
+        if self.tokens and tokens:
+            waits.append(self.tokens.wait_time(tokens))
+        return max(0.0, *waits)
+
+    async def acquire(self, tokens: int = 0) -> float:
+        """Odottaa vuoron ja varaa kiintiön; palauttaa odotetun ajan (s)."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        waited = 0.0
+        async with self._lock:
+            while (delay := self.wait_time(tokens)) > 0:
+                await asyncio.sleep(delay)
+                waited += delay
+            if self.requests:
+                self.requests.consume(1)
+            if self.tokens and tokens:
+                self.tokens.consume(tokens)
+        return waited
+
+    def settle(self, estimated: int, actual: Optional[int]):
+        """Vastauksen usage-luku korjaa TPM-arvion."""
+        if self.tokens and actual is not None:
+            self.tokens.adjust(estimated - actual)
+
+    def pause(self, seconds: float):
+        """429 + Retry-After: kaikki pyynnöt odottavat, ei vain uusittava."""
+        self.paused_until = max(self.paused_until, self.clock() + seconds)
@@ -0,0 +1,69 @@
+"""Uusintapolitiikka: mitkä virheet uusitaan ja kuinka kauan odotetaan (Retry-After huomioiden)."""
+
+import random
+import time
+from typing import Optional, Tuple
+
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+# openai-, httpx- ja requests-kirjastojen verkkovirheet nimen perusteella (ei importteja)
+RETRYABLE_ERRORS = {"APIConnectionError", "APITimeoutError", "ConnectError", "ConnectTimeout",
+                    "ReadTimeout", "ReadError", "RemoteProtocolError", "PoolTimeout",
+                    "ConnectionError", "Timeout"}
+
+
+def status_and_headers(exc: Exception) -> Tuple[Optional[int], dict]:
+    # requests.HTTPError ja openai.APIStatusError kantavat molemmat .response-olion
+    resp = getattr(exc, "response", None)
+    status = getattr(exc, "status_code", None) or getattr(resp, "status_code", None)
+    headers = getattr(resp, "headers", None) or {}
+    return status, headers
+
+
+def is_retryable(exc: Exception) -> bool:
+    if any(cls.__name__ in RETRYABLE_ERRORS for cls in type(exc).__mro__):
+        return True
+    status, _ = status_and_headers(exc)
+    return status in RETRYABLE_STATUS
+
+
+def retry_after_seconds(exc: Exception) -> Optional[float]:
+    """retry-after-ms, retry-after (sekunnit tai HTTP-päivämäärä) → sekunnit; None jos ei vihjettä."""
+    _, headers = status_and_headers(exc)
+    value = headers.get("retry-after-ms") or None
+    if value is not None:
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        from email.utils import parsedate_to_datetime
+        when = parsedate_to_datetime(value)
+        return max(0.0, when.timestamp() - time.time())
+    except Exception:
+        return None
+
+
+class RetryPolicy:
+    def __init__(self, max_retries: int = 4, base_delay: float = 1.0, max_delay: float = 30.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, exc: Exception) -> float:
+        """Full jitter: uniform(0, base * 2^attempt), mutta vähintään Retry-After."""
+        cap = min(self.max_delay, self.base_delay * (2 ** attempt))
+        delay = random.uniform(0, cap)
+        hinted = retry_after_seconds(exc)
+        if hinted is not None:
+            delay = max(delay, min(hinted, self.max_delay))
+        return delay
+
+    def should_retry(self, attempt: int, exc: Exception) -> bool:
+        return attempt < self.max_retries and is_retryable(exc)
@@ -0,0 +1,55 @@
+"""Käyttökirjanpito: pyynnöt, tokenit, kuvat, ääni ja odotukset mallikohtaisesti."""
+
+import threading
+from collections import defaultdict
+
+FIELDS = ("requests", "errors", "retries", "prompt_tokens", "completion_tokens", "total_tokens",
+          "images", "tts_chars", "upload_bytes", "wait_s", "latency_s")
+
+
+class Usage:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.models = defaultdict(lambda: dict.fromkeys(FIELDS, 0))
+
+    def add(self, model: str, **counts):
+        with self._lock:
+            row = self.models[model or "?"]
+            for key, value in counts.items():
+                row[key] += value or 0
+
+    def record_response(self, model: str, resp, latency: float, waited: float, retries: int):
+        usage = getattr(resp, "usage", None)
+        data = getattr(resp, "data", None)
+        prompt = getattr(usage, "prompt_tokens", None) or getattr(usage, "input_tokens", 0)
+        completion = getattr(usage, "completion_tokens", None) or getattr(usage, "output_tokens", 0)
+        self.add(model, requests=1, retries=retries, prompt_tokens=prompt, completion_tokens=completion,
+                 total_tokens=getattr(usage, "total_tokens", 0) or (prompt or 0) + (completion or 0),
+                 images=len(data) if isinstance(data, list) else 0, latency_s=latency, wait_s=waited)
+
+    def totals(self) -> dict:
+        with self._lock:
+            out = dict.fromkeys(FIELDS, 0)
+            for row in self.models.values():
+                for key in FIELDS:
+                    out[key] += row[key]
+            return out
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {model: {k: round(v, 3) if isinstance(v, float) else v for k, v in row.items()}
+                    for model, row in self.models.items()}
+
+    def summary(self) -> str:
+        lines = []
+        for model, row in sorted(self.as_dict().items()):
+            avg = row["latency_s"] / row["requests"] if row["requests"] else 0.0
+            parts = [f"{model:<20} req={row['requests']}"]
+            if row["total_tokens"]:
+                parts.append(f"tokens={row['prompt_tokens']}+{row['completion_tokens']}")
+            for key in ("images", "tts_chars", "upload_bytes", "retries", "errors"):
+                if row[key]:
+                    parts.append(f"{key}={row[key]}")
+            parts.append(f"avg={avg:.2f}s wait={row['wait_s']:.2f}s")
+            lines.append(" ".join(parts))
+        return "\n".join(lines)
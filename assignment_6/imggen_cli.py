@@ -9,29 +9,30 @@ Backends:
 Features:
 - --prompt (required), --negative (best-effort), --seed (if supported),
   --ratio (1:1,16:9,4:3,3:4), --n, --outdir
+- Resilience: retry with exponential backoff + jitter (honours Retry-After),
+  per-backend circuit breaker (--retries, --breaker-threshold, --breaker-cooldown)
+  and per-backend success/latency stats printed at the end.
+- Optional post-processing (--postprocess): thumbnails, metadata stripping,
+  perceptual hash + duplicate detection and a JSON sidecar per image. Runs in a
+  process pool on the in-memory bytes while later images are still downloading.
 
 Prints download URLs (when available) and saves images to --outdir.
 """
 
-import argparse, datetime, os, sys, base64, traceback
+import argparse, datetime, os, sys, base64, traceback, time, io, json
 from pathlib import Path
-from typing import Tuple, List, Optional
-import requests
+from typing import Tuple, List, Optional, Callable, Dict
+# requests / openai / numpy / PIL tuodaan vasta käyttökohdassa (nopea käynnistys)
+
+# yhteinen OpenAI-asiakas ja retry-politiikka (repon juuren aiclient)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from aiclient import MissingAPIKey, RetryPolicy, add_client_args, client_from_args, load_env, print_usage
 
 # ----------------- utils -----------------
 
 def ts() -> str:
     return datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
 
-def load_env_from_file(path: Path):
-    if path.exists():
-        for line in path.read_text(encoding="utf-8").splitlines():
-            line = line.strip()
-            if not line or line.startswith("#") or "=" not in line:
-                continue
-            k, v = line.split("=", 1)
-            os.environ.setdefault(k.strip(), v.strip())
-
 RATIO_TO_SIZE = {
     "1:1":  (1024, 1024),
     "16:9": (1280, 720),
@@ -44,59 +45,300 @@ def pick_size(ratio: str) -> Tuple[int, int]:
         raise SystemExit(f"Unsupported ratio: {ratio}. Use one of {list(RATIO_TO_SIZE)}")
     return RATIO_TO_SIZE[ratio]
 
-# ----------------- OpenAI (optional) -----------------
+# ----------------- resilience (retry / circuit breaker / stats) -----------------
+
+class BackendStats:
+    """Onnistumiset, virheet ja viiveet yhdelle backendille."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.ok = 0
+        self.failed = 0
+        self.retries = 0
+        self.short_circuited = 0
+        self.latencies: List[float] = []
+
+    def summary(self) -> str:
+        lat = sorted(self.latencies)
+        if lat:
+            avg = sum(lat) / len(lat)
+            p50 = lat[len(lat) // 2]
+            lat_s = f"avg={avg:.2f}s p50={p50:.2f}s max={lat[-1]:.2f}s"
+        else:
+            lat_s = "avg=-  p50=-  max=-"
+        return (f"{self.name:<13} ok={self.ok} failed={self.failed} retries={self.retries} "
+                f"skipped={self.short_circuited} {lat_s}")
+
+class CircuitBreaker:
+    """
+    Avautuu `threshold` peräkkäisen virheen jälkeen. Auki ollessa kutsuja ei tehdä
+    ennen kuin `cooldown` sekuntia on kulunut; sen jälkeen yksi koekutsu (half-open).
+    """
+
+    def __init__(self, threshold: int = 3, cooldown: float = 60.0):
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        return time.monotonic() - self.opened_at >= self.cooldown
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+class BackendUnavailable(Exception):
+    """Circuit breaker on auki — kutsua ei tehty."""
+
+STATS = {"pollinations": BackendStats("pollinations"), "openai": BackendStats("openai")}
+BREAKERS = {"pollinations": CircuitBreaker(), "openai": CircuitBreaker()}
+RETRY = RetryPolicy(max_retries=3, base_delay=1.0, max_delay=30.0)
+
+def configure_resilience(max_retries: int, threshold: int, cooldown: float):
+    RETRY.max_retries = max(0, max_retries)
+    for name in BREAKERS:
+        BREAKERS[name] = CircuitBreaker(threshold, cooldown)
+
+def call_with_resilience(backend: str, fn, *args, **kwargs):
+    """Kutsu fn:ää backendin circuit breakerin ja retry-politiikan läpi."""
+    stats, breaker = STATS[backend], BREAKERS[backend]
+    if not breaker.allow():
+        stats.short_circuited += 1
+        raise BackendUnavailable(f"{backend}: circuit open")
+    attempt = 0
+    while True:
+        t0 = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            if RETRY.should_retry(attempt, e):
+                delay = RETRY.delay(attempt, e)
+                attempt += 1
+                stats.retries += 1
+                print(f"    [retry] {backend} {attempt}/{RETRY.max_retries} in {delay:.1f}s ({e})", file=sys.stderr)
+                time.sleep(delay)
+                continue
+            stats.failed += 1
+            breaker.record_failure()
+            if breaker.is_open:
+                print(f"    [breaker] {backend} circuit open after "
+                      f"{breaker.consecutive_failures} consecutive failures", file=sys.stderr)
+            raise
+        breaker.record_success()
+        stats.ok += 1
+        stats.latencies.append(time.perf_counter() - t0)
+        return result
+
+def print_backend_stats():
+    used = [s for s in STATS.values() if s.ok or s.failed or s.short_circuited]
+    if not used:
+        return
+    print("\n=== BACKEND STATS ===")
+    for s in used:
+        print(s.summary())
+
+# ----------------- post-processing (thumbnails / metadata / pHash) -----------------
 
-def get_openai_client():
+OnSaved = Callable[[Path, bytes], None]
+
+_DCT_CACHE: Dict[int, "object"] = {}
+
+def _dct_matrix(n: int):
+    import numpy as np
+    if n not in _DCT_CACHE:
+        k = np.arange(n)[:, None]
+        i = np.arange(n)[None, :]
+        m = np.sqrt(2.0 / n) * np.cos(np.pi * (2 * i + 1) * k / (2 * n))
+        m[0, :] /= np.sqrt(2.0)
+        _DCT_CACHE[n] = m
+    return _DCT_CACHE[n]
+
+def perceptual_hash(img, hash_size: int = 8, highfreq_factor: int = 4) -> str:
+    """pHash: 2D-DCT (matriisitulona) harmaasävykuvasta, matalat taajuudet vs. mediaani → 64-bit hex."""
+    import numpy as np
+    from PIL import Image
+    n = hash_size * highfreq_factor
+    gray = np.asarray(img.convert("L").resize((n, n), Image.LANCZOS), dtype=np.float64)
+    d = _dct_matrix(n)
+    low = (d @ gray @ d.T)[:hash_size, :hash_size]
+    bits = low > np.median(low.ravel()[1:])   # DC-termi ei vaikuta kynnykseen
+    return np.packbits(bits.ravel()).tobytes().hex()
+
+def postprocess_image(path_str: str, raw: bytes, thumb_sizes: Tuple[int, ...],
+                      strip_metadata: bool) -> dict:
+    """Ajetaan prosessipoolissa: kuva käsitellään muistissa olevista tavuista, ei levyltä."""
+    from PIL import Image
+    t0 = time.perf_counter()
+    path = Path(path_str)
+    img = Image.open(io.BytesIO(raw))
+    img.load()
+    info = {"file": path.name, "width": img.width, "height": img.height,
+            "mode": img.mode, "bytes": len(raw), "thumbnails": []}
+
+    if strip_metadata:
+        # uusi kuva pelkistä pikseleistä → ei tEXt/iTXt/eXIf/ICC-chunkeja
+        clean = Image.frombytes(img.mode, img.size, img.tobytes())
+        if img.mode == "P":
+            clean.putpalette(img.getpalette())
+        clean.save(path, "PNG", optimize=True)
+        info["metadata_stripped"] = True
+        info["bytes_stripped"] = path.stat().st_size
+        img = clean
+
+    if thumb_sizes:
+        thumb_dir = path.parent / "thumbs"
+        thumb_dir.mkdir(exist_ok=True)
+        rgb = img.convert("RGB") if img.mode not in ("RGB", "RGBA", "L") else img
+        for size in thumb_sizes:
+            th = rgb.copy()
+            th.thumbnail((size, size), Image.LANCZOS)
+            out = thumb_dir / f"{path.stem}_{size}.png"
+            th.save(out, "PNG", optimize=True)
+            info["thumbnails"].append({"size": size, "file": str(out.relative_to(path.parent)),
+                                       "width": th.width, "height": th.height})
+
+    info["phash"] = perceptual_hash(img)
+    info["seconds"] = round(time.perf_counter() - t0, 4)
+    return info
+
+def find_duplicates(hashes: List[str], max_distance: int) -> List[Tuple[int, int, int]]:
+    """Kaikki parit (i, j, hamming) joiden pHash-etäisyys <= max_distance (vektoroitu XOR + popcount)."""
+    import numpy as np
+    if len(hashes) < 2:
+        return []
+    bits = np.unpackbits(np.array([bytes.fromhex(h) for h in hashes], dtype="S8")
+                         .view(np.uint8).reshape(len(hashes), -1), axis=1).astype(bool)
+    dist = (bits[:, None, :] != bits[None, :, :]).sum(axis=2)
+    ii, jj = np.nonzero(np.triu(dist <= max_distance, k=1))
+    return [(int(i), int(j), int(dist[i, j])) for i, j in zip(ii, jj)]
+
+class PostProcessor:
+    """Vastaanottaa tallennetut kuvat heti latauksen jälkeen ja käsittelee ne taustalla."""
+
+    def __init__(self, thumb_sizes: Tuple[int, ...], strip_metadata: bool,
+                 dup_distance: int, workers: Optional[int] = None):
+        self.thumb_sizes = thumb_sizes
+        self.strip_metadata = strip_metadata
+        self.dup_distance = dup_distance
+        # multiprocessing (~12 ms) tuodaan vasta kun --postprocess on päällä
+        from concurrent.futures import Future, ProcessPoolExecutor
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.jobs: List[Tuple[Path, Future]] = []
+
+    def __call__(self, path: Path, raw: bytes):
+        fut = self.pool.submit(postprocess_image, str(path), raw, self.thumb_sizes, self.strip_metadata)
+        self.jobs.append((path, fut))
+
+    def finish(self) -> List[dict]:
+        results: List[dict] = []
+        try:
+            for path, fut in self.jobs:
+                try:
+                    info = fut.result()
+                except Exception as e:
+                    print(f"[post] {path.name} failed: {e}", file=sys.stderr)
+                    continue
+                info["path"] = path
+                results.append(info)
+        finally:
+            self.pool.shutdown()
+
+        for info in results:
+            info["duplicates"] = []
+        for i, j, dist in find_duplicates([r["phash"] for r in results], self.dup_distance):
+            results[i]["duplicates"].append({"file": results[j]["file"], "distance": dist})
+            results[j]["duplicates"].append({"file": results[i]["file"], "distance": dist})
+
+        for info in results:
+            path = info.pop("path")
+            sidecar = path.with_suffix(".json")
+            sidecar.write_text(json.dumps(info, indent=2, ensure_ascii=False), encoding="utf-8")
+            dup = f" duplicates={[d['file'] for d in info['duplicates']]}" if info["duplicates"] else ""
+            print(f"[post] {info['file']} phash={info['phash']} thumbs={len(info['thumbnails'])}"
+                  f" ({info['seconds']:.2f}s){dup}")
+        return results
+
+def parse_thumb_sizes(value: str) -> Tuple[int, ...]:
     try:
-        from openai import OpenAI
-    except Exception:
+        sizes = tuple(int(v) for v in value.split(",") if v.strip())
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"--thumb-sizes must be comma-separated ints, got {value!r}")
+    if any(s <= 0 for s in sizes):
+        raise argparse.ArgumentTypeError("--thumb-sizes must be positive")
+    return sizes
+
+# ----------------- OpenAI (optional) -----------------
+
+def get_openai_client(args):
+    import importlib.util
+    if importlib.util.find_spec("openai") is None:
         print("[WARN] 'openai' pakettia ei löytynyt. Asenna se tai käytä --backend pollinations.", file=sys.stderr)
         return None
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        # yritä lukea repon juuren .env
-        load_env_from_file(Path(__file__).resolve().parents[1] / ".env")
-        api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
+    load_env()
+    try:
+        # uusinnat hoitaa call_with_resilience (--retries, breaker, tilastot) → ei tuplauusintoja
+        return client_from_args(args, max_retries=0)
+    except MissingAPIKey:
         print("ERROR: OPENAI_API_KEY puuttuu. Käytä --backend pollinations tai aseta avain.", file=sys.stderr)
         return None
-    return OpenAI(api_key=api_key)
 
 # ----------------- Pollinations backend -----------------
 
+POLLINATIONS_BASE = os.getenv("POLLINATIONS_BASE", "https://image.pollinations.ai")
+
 def pollinations_build_url(prompt: str, negative: Optional[str], w: int, h: int, seed: Optional[int]) -> str:
     from urllib.parse import quote
     p = prompt
     if negative:
         p += f". Negative prompt: {negative}."
-    url = "https://image.pollinations.ai/prompt/" + quote(p)
+    url = f"{POLLINATIONS_BASE}/prompt/" + quote(p)
     url += f"?width={w}&height={h}"
     return url
 
+def pollinations_fetch(url: str) -> bytes:
+    import requests
+    r = requests.get(url, timeout=120)
+    r.raise_for_status()
+    return r.content
+
 def pollinations_generate(prompt: str, negative: Optional[str], seed: Optional[int],
-                          ratio: str, n: int, outdir: Path) -> List[Path]:
+                          ratio: str, n: int, outdir: Path,
+                          on_saved: Optional[OnSaved] = None) -> List[Path]:
     w, h = pick_size(ratio)
     print(f"[gen] backend=pollinations ratio={ratio} size={w}x{h} n={n}")
     out_paths: List[Path] = []
     for i in range(1, n + 1):
         url = pollinations_build_url(prompt, negative, w, h, seed)
         print(f"[{i}] URL: {url}")
-        r = requests.get(url, timeout=120)
-        r.raise_for_status()
+        content = call_with_resilience("pollinations", pollinations_fetch, url)
         out = outdir / f"gen_{ts()}_{i:03d}.png"
-        out.write_bytes(r.content)
+        out.write_bytes(content)
         print(f"    saved: {out}")
         out_paths.append(out)
+        if on_saved:
+            on_saved(out, content)
     return out_paths
 
 # ----------------- OpenAI backend -----------------
 
-def openai_generate(prompt: str, negative: Optional[str], seed: Optional[int],
-                    ratio: str, n: int, outdir: Path) -> List[Path]:
-    client = get_openai_client()
+def openai_generate(client, prompt: str, negative: Optional[str], seed: Optional[int],
+                    ratio: str, n: int, outdir: Path,
+                    on_saved: Optional[OnSaved] = None) -> List[Path]:
     if client is None:
         print("[INFO] Siirrytään fallbackiin: pollinations.")
-        return pollinations_generate(prompt, negative, seed, ratio, n, outdir)
+        return pollinations_generate(prompt, negative, seed, ratio, n, outdir, on_saved)
 
     w, h = pick_size(ratio)
     size = f"{w}x{h}"
@@ -108,8 +350,15 @@ def openai_generate(prompt: str, negative: Optional[str], seed: Optional[int],
 
     out_paths: List[Path] = []
     for i in range(1, n + 1):
+        if not BREAKERS["openai"].allow():
+            # OpenAI on kaatunut toistuvasti → suoraan terveelle backendille ilman turhaa kierrosta
+            STATS["openai"].short_circuited += 1
+            print(f"[{i}] openai circuit open → pollinations")
+            out_paths += pollinations_generate(prompt, negative, seed, ratio, 1, outdir, on_saved)
+            continue
         try:
-            resp = client.images.generate(
+            resp = call_with_resilience(
+                "openai", client.images,
                 model="gpt-image-1",
                 prompt=eff_prompt,
                 size=size,        # HUOM: ei seed-parametria
@@ -121,6 +370,8 @@ def openai_generate(prompt: str, negative: Optional[str], seed: Optional[int],
             print(f"[{i}] URL: (binary from OpenAI)")
             print(f"    saved: {out}")
             out_paths.append(out)
+            if on_saved:
+                on_saved(out, raw)
         except Exception as e:
             msg = str(e)
             if "must be verified" in msg.lower():
@@ -128,7 +379,7 @@ def openai_generate(prompt: str, negative: Optional[str], seed: Optional[int],
             else:
                 print(f"[WARN] OpenAI generation failed: {e}", file=sys.stderr)
             print("→ fallback pollinations for this image.")
-            out_paths += pollinations_generate(prompt, negative, seed, ratio, 1, outdir)
+            out_paths += pollinations_generate(prompt, negative, seed, ratio, 1, outdir, on_saved)
     return out_paths
 
 # ----------------- main -----------------
@@ -142,21 +393,52 @@ def main() -> int:
     ap.add_argument("--ratio", choices=list(RATIO_TO_SIZE.keys()), default="1:1")
     ap.add_argument("--n", type=int, default=1)
     ap.add_argument("--outdir", default="outputs")
+    ap.add_argument("--retries", type=int, default=3, help="Uusintayritykset per kuva (429/5xx/verkko)")
+    ap.add_argument("--breaker-threshold", type=int, default=3,
+                    help="Peräkkäiset virheet ennen kuin backend ohitetaan (circuit breaker)")
+    ap.add_argument("--breaker-cooldown", type=float, default=60.0,
+                    help="Sekunnit ennen kuin avattu breaker kokeilee backendiä uudelleen")
+    ap.add_argument("--postprocess", action="store_true",
+                    help="Thumbnailit, metadatan poisto, pHash + duplikaatit ja JSON-sidecar (prosessipoolissa)")
+    ap.add_argument("--thumb-sizes", type=parse_thumb_sizes, default=(256, 128),
+                    help="Thumbnail-koot pikseleinä, pilkuilla eroteltuna (oletus 256,128)")
+    ap.add_argument("--keep-metadata", action="store_true", help="Älä poista PNG-metadataa post-processingissa")
+    ap.add_argument("--dup-distance", type=int, default=6,
+                    help="pHash Hamming-etäisyys, jolla kuvat tulkitaan duplikaateiksi")
+    ap.add_argument("--post-workers", type=int, default=None, help="Post-processing prosessien määrä")
+    add_client_args(ap, retries=False)
     args = ap.parse_args()
+    configure_resilience(args.retries, args.breaker_threshold, args.breaker_cooldown)
 
     print(f"[start] backend={args.backend} prompt='{args.prompt[:60]}' ratio={args.ratio} n={args.n}")
     outdir = Path(args.outdir); outdir.mkdir(parents=True, exist_ok=True)
 
+    client = None
+    post = None
+    if args.postprocess:
+        post = PostProcessor(args.thumb_sizes, not args.keep_metadata, args.dup_distance, args.post_workers)
+
     try:
         if args.backend == "pollinations":
-            paths = pollinations_generate(args.prompt, args.negative, args.seed, args.ratio, args.n, outdir)
+            paths = pollinations_generate(args.prompt, args.negative, args.seed, args.ratio, args.n, outdir, post)
         else:
-            paths = openai_generate(args.prompt, args.negative, args.seed, args.ratio, args.n, outdir)
+            client = get_openai_client(args)
+            paths = openai_generate(client, args.prompt, args.negative, args.seed, args.ratio, args.n, outdir, post)
         print(f"[done] {len(paths)} image(s) saved to {outdir.resolve()}")
+        if post:
+            t0 = time.perf_counter()
+            results = post.finish()
+            post = None
+            print(f"[post] {len(results)} image(s) processed, waited {time.perf_counter() - t0:.2f}s after downloads")
         return 0
     except Exception as e:
         print("[ERROR] Unhandled exception:\n" + "".join(traceback.format_exception(e)), file=sys.stderr)
         return 1
+    finally:
+        if post:
+            post.pool.shutdown(cancel_futures=True)
+        print_backend_stats()
+        print_usage(client, args)
 
 if __name__ == "__main__":
     raise SystemExit(main())
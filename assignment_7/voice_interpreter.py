@@ -7,39 +7,63 @@ Assignment 7 — Voice Interpreter (record → STT → translate → TTS → pla
 - Käännös: GPT-4o-mini
 - TTS: gpt-4o-mini-tts (fallback macOS 'say' jos ei onnistu)
 - Tulostaa transkription, käännöksen, tiedostopolut ja viiveet.
+- Käännösmuisti (SQLite, exact + fuzzy): toistuva fraasi ohittaa käännös- ja TTS-kutsun.
+- --live: jatkuva tila. Ääni pilkotaan taukojen kohdalta segmenteiksi ja jokainen
+  segmentti kulkee asyncio-putken läpi (STT segmentille N+1 samaan aikaan kun
+  segmenttiä N käännetään / puhutaan). Raportoi puheen lopusta ensimmäiseen ääneen.
 
 Esimerkit:
   python voice_interpreter.py --src-lang en --tgt-lang fr --duration 6
   python voice_interpreter.py --src-lang fi --tgt-lang en --press-enter
   python voice_interpreter.py --input sample.wav --src-lang en --tgt-lang de
+  python voice_interpreter.py --live --src-lang en --tgt-lang fr
+  python voice_interpreter.py --session --src-lang fi --tgt-lang en --auto-stop-ms 1200
+  python voice_interpreter.py --live --live-file sample.wav --tgt-lang de
+  python voice_interpreter.py bench --fixtures fixtures/ --iterations 10 --base-url http://127.0.0.1:8080/v1
+  python voice_interpreter.py bench --compare bench/old.json bench/new.json
 """
 
-import argparse, os, sys, time, subprocess, platform, shutil, select, traceback
+from __future__ import annotations
+
+import argparse, atexit, os, sys, time, subprocess, platform, shutil, traceback, signal
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import numpy as np
-import sounddevice as sd
-from scipy.io.wavfile import write as wav_write
-from openai import OpenAI
+# raskaat riippuvuudet (numpy, sounddevice, scipy, openai) ladataan vasta käytössä;
+# sounddevice tuodaan vain nauhoitus-/toistopoluissa, joten --input toimii ilman PortAudiota
+# yhteinen OpenAI-asiakas (repon juuren aiclient): pooli, RPM/TPM-rajoitin, retry, käyttökirjanpito
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from aiclient import MissingAPIKey, add_client_args, print_usage
+# VAD, nauhoitus, STT ja bench-apurit jaetaan voice_imggenin kanssa (repon juuren voicekit)
+from voicekit.audio import (RecordingBuffer, SilenceEndpointer, UPLOAD_FORMATS, UtteranceSegmenter, lazy_import,
+                            read_audio_any, record_until_stopped, to_mono_16k, trim_silence, wait_for_stop,
+                            wav_write)
+from voicekit.bench import bench_arg_parser, compare_bench, load_fixture, write_bench_results
+from voicekit.stt import TranscriptCache, transcribe_audio
+np = lazy_import("numpy")
+asyncio = lazy_import("asyncio")   # vain --live-tilassa (~28 ms)
+if TYPE_CHECKING:
+    from aiclient import AIClient
 
 # ---------- utils ----------
 
-def load_env_from_repo_root():
-    root_env = Path(__file__).resolve().parents[1] / ".env"
-    if root_env.exists():
-        for line in root_env.read_text(encoding="utf-8").splitlines():
-            if "=" in line and not line.strip().startswith("#"):
-                k, v = line.split("=", 1)
-                os.environ.setdefault(k.strip(), v.strip())
-
-def get_client() -> OpenAI:
-    if not os.getenv("OPENAI_API_KEY"):
-        load_env_from_repo_root()
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
+def get_client(args, base_url: str | None = None, keepalive_s: float | None = None) -> AIClient:
+    """
+    Yksi AIClient koko ajolle. Pitkäikäinen sessio pitää TLS-yhteydet poolissa vuorojen välissä
+    (keepalive_s); .env luetaan aiclient.load_envillä, paikallinen stub (base_url) ei vaadi avainta.
+    """
+    from aiclient import client_from_args
+    try:
+        client = client_from_args(args, base_url=base_url, keepalive_s=keepalive_s or 30.0)
+    except MissingAPIKey:
         print("ERROR: OPENAI_API_KEY puuttuu (.env).", file=sys.stderr)
         sys.exit(2)
-    return OpenAI(api_key=api_key)
+    atexit.register(print_usage, client, args)
+    return client
+
+def warm_connection(client: AIClient):
+    """Avaa/lämmittää TLS-yhteyden taustalla (esim. nauhoituksen aikana), virheet ohitetaan."""
+    client.warm()
 
 def play_audio(path: Path) -> bool:
     try:
@@ -59,7 +83,48 @@ def play_audio(path: Path) -> bool:
 
 # ---------- Recording ----------
 
-def record_wav(out_path: Path, duration: int | None, press_enter: bool, sr: int = 16000):
+class SessionRecorder:
+    """
+    Session-tilan mikrofoni: InputStream avataan kerran ja pidetään auki. Callback kirjoittaa
+    puskuriin vain kun nauhoitus on käynnissä, joten laitteen avaamisen viive maksetaan vain kerran.
+    """
+
+    def __init__(self, sr: int, auto_stop_ms: int = 0):
+        import threading
+        import sounddevice as sd
+        self.sr = sr
+        self.auto_stop_ms = auto_stop_ms
+        self.armed = threading.Event()
+        self.stop = threading.Event()
+        self.buf = RecordingBuffer(sr)
+        self.endpointer = SilenceEndpointer(sr, auto_stop_ms)
+        self.stream = sd.InputStream(samplerate=sr, channels=1, dtype="float32", callback=self._callback)
+        self.stream.start()
+
+    def _callback(self, indata, frames, time_info, status):
+        if not self.armed.is_set():
+            return
+        block = indata[:, 0]
+        self.buf.append(block)
+        if self.endpointer.feed(block):
+            self.armed.clear(); self.stop.set()
+
+    def record(self) -> np.ndarray:
+        self.buf.n = 0   # puskuri käytetään uudelleen, ei uutta varausta
+        self.endpointer = SilenceEndpointer(self.sr, self.auto_stop_ms)
+        self.stop.clear()
+        self.armed.set()
+        wait_for_stop(self.stop)
+        self.armed.clear()
+        return self.buf.view().copy()
+
+    def close(self):
+        self.stream.stop(); self.stream.close()
+
+def record_wav(out_path: Path, duration: int | None, press_enter: bool, sr: int = 16000,
+               vad: bool = True, auto_stop_ms: int = 0) -> float:
+    """Nauhoittaa WAVin; VAD leikkaa alun/lopun hiljaisuuden. Palauttaa säästetyt sekunnit."""
+    import sounddevice as sd
     print(f"[rec] sampling_rate={sr}Hz")
     sd.default.samplerate = sr
     sd.default.channels = 1
@@ -67,45 +132,47 @@ def record_wav(out_path: Path, duration: int | None, press_enter: bool, sr: int
     if press_enter:
         print("  Paina ENTER aloittaaksesi, ja ENTER lopettaaksesi.")
         input("  ENTER aloittaa…")
-        recording = []
-        stream = sd.InputStream(samplerate=sr, channels=1, dtype="float32")
-        stream.start()
-        print("  Nauhoitus käynnissä… (ENTER lopettaa)")
-        try:
-            while True:
-                frames, _ = stream.read(1024)
-                recording.append(frames.copy())
-                # lopetus kun ENTER painetaan
-                if sys.stdin in select.select([sys.stdin], [], [], 0)[0]:
-                    sys.stdin.readline()
-                    break
-        except KeyboardInterrupt:
-            pass
-        finally:
-            stream.stop(); stream.close()
-        audio = np.concatenate(recording, axis=0)
+        audio = record_until_stopped(sr, auto_stop_ms)
     else:
         print(f"  Nauhoitus {duration}s…")
         audio = sd.rec(int(duration * sr), samplerate=sr, channels=1, dtype="float32")
         sd.wait()
 
+    saved = 0.0
+    if vad:
+        trimmed = trim_silence(audio, sr)
+        saved = (len(audio) - len(trimmed)) / sr
+        print(f"[vad] {len(audio) / sr:.2f}s → {len(trimmed) / sr:.2f}s (saved {saved:.2f}s)")
+        audio = trimmed
+
     wav = np.int16(np.clip(audio, -1, 1) * 32767)
     wav_write(out_path, sr, wav)
     print(f"  saved: {out_path}")
+    return saved
 
 # ---------- STT / Translate / TTS ----------
 
-def stt_whisper(client: OpenAI, wav_path: Path, src_lang: str | None):
+def stt_whisper(client: AIClient, wav_path: Path, src_lang: str | None, fmt: str = "flac", cache=None):
     t0 = time.perf_counter()
-    with open(wav_path, "rb") as f:
-        tr = client.audio.transcriptions.create(model="whisper-1", file=f)
+    key = None
+    if cache is not None:
+        key = cache.make_key(wav_path, "whisper-1", src_lang)
+        text = cache.get(key)
+        if text is not None:
+            dur = time.perf_counter() - t0
+            print(f"[stt] cache hit ({dur * 1000:.0f} ms)")
+            return text, dur
+    text, sent = transcribe_audio(client, wav_path, fmt)
+    if cache is not None:
+        cache.put(key, text, wav_path.stat().st_size)
     dur = time.perf_counter() - t0
-    return tr.text.strip(), dur
+    print(f"[stt] uploaded {sent / 1024:.1f} KB (input {wav_path.stat().st_size / 1024:.1f} KB) in {dur:.2f}s")
+    return text, dur
 
-def translate(client: OpenAI, text: str, src: str, tgt: str):
+def translate(client: AIClient, text: str, src: str, tgt: str):
     t0 = time.perf_counter()
     system = f"You are a precise translator. Translate from {src} to {tgt}. Return only the translation."
-    resp = client.chat.completions.create(
+    resp = client.chat(
         model="gpt-4o-mini",
         messages=[{"role":"system","content":system},{"role":"user","content":text}],
         temperature=0.2,
@@ -113,75 +180,646 @@ def translate(client: OpenAI, text: str, src: str, tgt: str):
     dur = time.perf_counter() - t0
     return resp.choices[0].message.content.strip(), dur
 
-def tts_and_play(client: OpenAI, text: str, out_wav: Path):
-    import time, platform, shutil, subprocess
+TTS_SR = 24000  # gpt-4o-mini-tts "pcm": 24 kHz, 16-bit signed LE, mono
+
+def _open_output_stream():
+    try:
+        import sounddevice as sd
+        stream = sd.RawOutputStream(samplerate=TTS_SR, channels=1, dtype="int16")
+        stream.start()
+        return stream
+    except Exception as e:
+        print(f"[tts] audio output unavailable ({e}); playing the file afterwards.", file=sys.stderr)
+        return None
+
+def _start_player(stream):
+    """
+    Soittaa PCM-palat omassa säikeessään: blokkaava RawOutputStream.write ei hidasta vastaanottoa,
+    joten TTS-aika mittaa synteesiä eikä toistoa. None jonoon lopettaa.
+    started["t"] = perf_counter-hetki, jolloin ensimmäinen lohko kirjoitettiin laitteelle.
+    """
+    import queue, threading
+    q = queue.Queue()
+    started: dict = {}
+
+    def run():
+        while (chunk := q.get()) is not None:
+            stream.write(chunk)
+            started.setdefault("t", time.perf_counter())
+
+    player = threading.Thread(target=run, daemon=True)
+    player.start()
+    return q, player, started
+
+def tts_and_play(client: AIClient, text: str, out_wav: Path, play: bool = True) -> tuple[float, float]:
+    """
+    Striimattu TTS: PCM-palat soitetaan sounddevice-ulostuloon sitä mukaa kun ne saapuvat
+    ja kirjoitetaan samalla WAV-tiedostoon. Palauttaa (tts_total, time_to_first_audio);
+    tts_total päättyy viimeisen palan saapuessa (toiston loppua ei odoteta ajastimen sisällä).
+    play=False kirjoittaa vain tiedoston (rinnakkaiset kielet eivät soi päällekkäin) ja nostaa
+    virheen ilman järjestelmä-TTS-fallbackia.
+    """
+    import wave
     t0 = time.perf_counter()
+    first_audio = None
+    queued = False
+    stream = player = None
     try:
-        # HUOM: käytä response_format, ei "format"
-        resp = client.audio.speech.create(
+        stream = _open_output_stream() if play else None
+        if stream is not None:
+            pcm, player, started = _start_player(stream)
+        with client.speech_stream(
+            chunk_size=4096,
             model="gpt-4o-mini-tts",
             voice="alloy",
             input=text,
-            response_format="wav",
-        )
-        audio_bytes = resp.read()          # luetaan tavut
-        out_wav.write_bytes(audio_bytes)   # talletetaan WAV
-        dur = time.perf_counter() - t0
+            response_format="pcm",
+        ) as chunks, wave.open(str(out_wav), "wb") as wf:
+            wf.setnchannels(1); wf.setsampwidth(2); wf.setframerate(TTS_SR)
+            carry = b""
+            for chunk in chunks:
+                chunk = carry + chunk
+                cut = len(chunk) - (len(chunk) % 2)   # int16-rajalle
+                chunk, carry = chunk[:cut], chunk[cut:]
+                if not chunk:
+                    continue
+                wf.writeframes(chunk)
+                if player is not None:
+                    pcm.put(chunk)
+                    queued = True
+            dur = time.perf_counter() - t0
         print(f"[tts] saved: {out_wav}")
+        if player is not None:
+            pcm.put(None); player.join(); player = None   # soitetaan jonossa olevat palat loppuun
+            # ensimmäinen ääni = soitinsäikeen ensimmäinen kirjoitus laitteelle, ei jonoon vienti
+            first_audio = started["t"] - t0 if "t" in started else None
 
-        # Toista (macOS: afplay)
-        played = False
-        try:
-            if platform.system() == "Darwin" and shutil.which("afplay"):
-                subprocess.Popen(["afplay", str(out_wav)])
-                played = True
-            elif platform.system() == "Linux" and shutil.which("aplay"):
-                subprocess.Popen(["aplay", str(out_wav)])
-                played = True
-            elif platform.system() == "Windows":
-                ps = 'Add-Type –AssemblyName presentationCore; (New-Object System.Media.SoundPlayer "{}").PlaySync()'.format(str(out_wav))
-                subprocess.Popen(["powershell", "-c", ps]); played = True
-        except Exception:
-            played = False
-
-        if not played:
-            print("  (Vihje: avaa WAV manuaalisesti mediasoittimella.)")
-        return dur
+        if stream is None and play:
+            if play_audio(out_wav):
+                first_audio = time.perf_counter() - t0
+            else:
+                print("  (Vihje: avaa WAV manuaalisesti mediasoittimella.)")
+        return dur, first_audio if first_audio is not None else dur
 
     except Exception as e:
+        # katkennut striimi jättäisi typistetyn WAVin → ei tiedostoa, ei käännösmuistiin
+        out_wav.unlink(missing_ok=True)
+        if not play:
+            # tiedostotila (fan-out): rinnakkaiset 'say'-fallbackit puhuisivat päällekkäin eikä
+            # tiedostoa synny → virhe kutsujalle, joka raportoi kielen epäonnistuneeksi
+            raise
+        if queued:
+            # osa käännöksestä on jo soinut → 'say' toistaisi sen alusta; virhe kutsujalle
+            print(f"[tts] OpenAI TTS stream failed mid-playback: {e}", file=sys.stderr)
+            raise
         print(f"[tts] OpenAI TTS failed: {e}\n  → fallback to system TTS (macOS 'say' jos saatavilla).", file=sys.stderr)
         dur = time.perf_counter() - t0
         # macOS fallback
         try:
             if platform.system() == "Darwin" and shutil.which("say"):
                 subprocess.run(["say", text], check=True)
-                return dur
+                return dur, dur
         except Exception:
             pass
         print("  (Ei TTS-toistoa saatavilla. Teksti alla.)")
         print("  SPOKEN:", text)
-        return dur
+        return dur, dur
+    finally:
+        if player is not None:
+            pcm.put(None); player.join()   # soitetaan jonossa olevat palat loppuun
+        if stream is not None:
+            stream.stop(); stream.close()   # stop() odottaa että puskuri on soitettu
+
+# ---------- Translation memory (käännös- ja TTS-välimuisti) ----------
+
+TM_DIM = 4096   # trigrammien hash-ulottuvuus fuzzy-indeksissä
+
+def normalize_phrase(text: str) -> str:
+    import re, unicodedata
+    t = unicodedata.normalize("NFKC", text).casefold()
+    t = re.sub(r"[^\w\s]", " ", t)
+    return " ".join(t.split())
+
+def trigram_vector(norm: str) -> np.ndarray:
+    """Merkkitrigrammit hashattuna TM_DIM-vektoriin, L2-normalisoitu (kosini = pistetulo)."""
+    import zlib
+    padded = f"  {norm} "
+    v = np.zeros(TM_DIM, dtype=np.float32)
+    for i in range(len(padded) - 2):
+        v[zlib.crc32(padded[i:i + 3].encode("utf-8")) % TM_DIM] += 1.0
+    n = float(np.linalg.norm(v))
+    return v / n if n else v
+
+# sanat, joiden ero muuttaa merkityksen vaikka trigrammit ovat lähes samat ("gate 12" / "gate 13")
+TM_GUARD_WORDS = frozenset("""
+    not no never none nothing nobody neither nor t cannot ei en et emme ette eivät älä älkää ikinä koskaan
+    nicht kein keine keinen nie ne pas jamais non nunca inte aldrig
+    zero one two three four five six seven eight nine ten eleven twelve thirteen fourteen fifteen sixteen
+    seventeen eighteen nineteen twenty thirty forty fifty sixty seventy eighty ninety hundred thousand
+    half first second third nolla yksi kaksi kolme neljä viisi kuusi seitsemän kahdeksan yhdeksän
+    kymmenen sata tuhat puoli""".split())
+
+def fuzzy_guard(norm: str) -> tuple:
+    """Luvut ja kieltosanat; fuzzy-osuma sallitaan vain jos nämä ovat täsmälleen samat."""
+    return tuple(t for t in norm.split() if t in TM_GUARD_WORDS or any(c.isdigit() for c in t))
+
+class TranslationMemory:
+    """
+    Pysyvä SQLite-käännösmuisti. Avain: normalisoitu lähdeteksti + src/tgt.
+    Tasot: exact (sama normalisoitu avain) ja fuzzy (trigrammi-kosini >= fuzzy_threshold ja samat
+    luvut + kieltosanat, ks. fuzzy_guard).
+    Käännökselle syntetisoitu WAV talletetaan audio_dir:iin, jolloin toistuva fraasi ohittaa myös TTS:n.
+    Fuzzy-indeksi pitää kieliparia kohden index_max uusinta fraasia (TM_DIM float32 -rivi kukin,
+    2048 riviä ≈ 32 MB); vanhemmat löytyvät edelleen exact-tasolta.
+    """
+
+    def __init__(self, path: Path, audio_dir: Path, fuzzy_threshold: float = 0.9, index_max: int = 2048):
+        import sqlite3, threading
+        self.audio_dir = audio_dir
+        self.fuzzy_threshold = fuzzy_threshold
+        self.index_max = index_max
+        self.lock = threading.Lock()   # live-tila kutsuu säikeistä (asyncio.to_thread)
+        self.db = sqlite3.connect(str(path), check_same_thread=False)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS tm (
+            src TEXT NOT NULL, tgt TEXT NOT NULL, norm TEXT NOT NULL,
+            source TEXT NOT NULL, translation TEXT NOT NULL, audio TEXT,
+            hits INTEGER NOT NULL DEFAULT 0, created REAL NOT NULL,
+            PRIMARY KEY (src, tgt, norm))""")
+        self.db.commit()
+        self._index: dict = {}   # (src, tgt) -> (norms, matrix, guards), vanhin ensin
+
+    def _pair_index(self, src: str, tgt: str):
+        key = (src, tgt)
+        if key not in self._index:
+            rows = self.db.execute("SELECT norm FROM tm WHERE src=? AND tgt=? ORDER BY created DESC LIMIT ?",
+                                   (src, tgt, self.index_max)).fetchall()
+            norms = [r[0] for r in reversed(rows)]
+            matrix = np.stack([trigram_vector(n) for n in norms]) if norms else np.zeros((0, TM_DIM), np.float32)
+            self._index[key] = (norms, matrix, [fuzzy_guard(n) for n in norms])
+        return self._index[key]
+
+    def lookup(self, text: str, src: str, tgt: str):
+        """Palauttaa (käännös, audio_path tai None, taso, samankaltaisuus) tai None."""
+        norm = normalize_phrase(text)
+        with self.lock:
+            row = self.db.execute("SELECT norm, translation, audio FROM tm WHERE src=? AND tgt=? AND norm=?",
+                                  (src, tgt, norm)).fetchone()
+            tier, score = "exact", 1.0
+            if row is None and self.fuzzy_threshold < 1.0:
+                norms, matrix, guards = self._pair_index(src, tgt)
+                if norms:
+                    guard = fuzzy_guard(norm)
+                    same = np.fromiter((g == guard for g in guards), dtype=bool, count=len(guards))
+                    sims = np.where(same, matrix @ trigram_vector(norm), -1.0)
+                    best = int(np.argmax(sims))
+                    if sims[best] >= self.fuzzy_threshold:
+                        row = self.db.execute("SELECT norm, translation, audio FROM tm WHERE src=? AND tgt=? AND norm=?",
+                                              (src, tgt, norms[best])).fetchone()
+                        tier, score = "fuzzy", float(sims[best])
+            if row is None:
+                return None
+            self.db.execute("UPDATE tm SET hits = hits + 1 WHERE src=? AND tgt=? AND norm=?", (src, tgt, row[0]))
+            self.db.commit()
+        audio = Path(row[2]) if row[2] and Path(row[2]).exists() else None
+        return row[1], audio, tier, score
+
+    def store(self, text: str, src: str, tgt: str, translation: str):
+        norm = normalize_phrase(text)
+        if not norm:
+            return
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO tm (src, tgt, norm, source, translation, audio, hits, created) "
+                            "VALUES (?, ?, ?, ?, ?, NULL, 0, ?)", (src, tgt, norm, text, translation, time.time()))
+            self.db.commit()
+            self._index_append((src, tgt), norm)
+
+    def _index_append(self, key, norm: str):
+        """Lisää uuden fraasin jo rakennettuun indeksiin (ei uudelleenrakennusta); ylijäämä pois vanhimmasta päästä."""
+        if key not in self._index:
+            return   # rakennetaan kannasta vasta kun lookup tarvitsee
+        norms, matrix, guards = self._index[key]
+        if norm in norms:
+            return
+        norms, guards = norms + [norm], guards + [fuzzy_guard(norm)]
+        matrix = np.vstack([matrix, trigram_vector(norm)[None, :]])
+        if len(norms) > self.index_max:
+            drop = len(norms) - self.index_max
+            norms, matrix, guards = norms[drop:], matrix[drop:], guards[drop:]
+        self._index[key] = (norms, matrix, guards)
+
+    def store_audio(self, text: str, src: str, tgt: str, wav: Path):
+        import hashlib
+        norm = normalize_phrase(text)
+        self.audio_dir.mkdir(parents=True, exist_ok=True)
+        dest = self.audio_dir / (hashlib.sha1(f"{src}|{tgt}|{norm}".encode("utf-8")).hexdigest() + ".wav")
+        shutil.copyfile(wav, dest)
+        with self.lock:
+            self.db.execute("UPDATE tm SET audio=? WHERE src=? AND tgt=? AND norm=?", (str(dest), src, tgt, norm))
+            self.db.commit()
+
+def play_cached(wav: Path) -> tuple[float, float]:
+    """Toistaa välimuistin WAVin suoraan laitteelle; palauttaa (kesto, aika ensimmäiseen ääneen)."""
+    from scipy.io.wavfile import read as wav_read
+    t0 = time.perf_counter()
+    try:
+        import sounddevice as sd
+        rate, data = wav_read(str(wav))
+        sd.play(data, rate)
+        t_first = time.perf_counter() - t0
+        sd.wait()
+    except Exception:
+        play_audio(wav)
+        t_first = time.perf_counter() - t0
+    return time.perf_counter() - t0, t_first
+
+def translate_and_speak(client: AIClient, tm, text: str, src: str, tgt: str, out_wav: Path, play: bool = True):
+    """
+    Käännös + TTS käännösmuistin kautta.
+    Palauttaa (käännös, t_translate, t_tts, t_first_audio, tm_status).
+    """
+    t0 = time.perf_counter()
+    hit = tm.lookup(text, src, tgt) if tm else None
+    if hit is not None:
+        translated, cached_wav, tier, score = hit
+        t_tr = time.perf_counter() - t0
+        status = f"{tier} hit" + (f" ({score:.2f})" if tier == "fuzzy" else "")
+        if cached_wav is not None:
+            if play:
+                t_tts, t_first = play_cached(cached_wav)
+                shutil.copyfile(cached_wav, out_wav)   # toiston jälkeen, ei viivästä ensimmäistä ääntä
+            else:
+                shutil.copyfile(cached_wav, out_wav)
+                t_tts = t_first = time.perf_counter() - t0 - t_tr
+            return translated, t_tr, t_tts, t_first, status + " + audio"
+    else:
+        translated, t_tr = translate(client, text, src, tgt)
+        status = "miss" if tm else "off"
+        if tm:
+            tm.store(text, src, tgt, translated)
+
+    out_wav.unlink(missing_ok=True)
+    t_tts, t_first = tts_and_play(client, translated, out_wav, play)
+    # WAV on olemassa vain jos striimi valmistui (katkennut poistetaan tts_and_playssa)
+    if tm and out_wav.exists() and out_wav.stat().st_size > 44:
+        tm.store_audio(text, src, tgt, out_wav)
+    return translated, t_tr, t_tts, t_first, status
+
+# ---------- Multi-language fan-out ----------
+
+def parse_langs(value: str) -> list:
+    langs = [l.strip() for l in value.split(",") if l.strip()]
+    if not langs:
+        raise argparse.ArgumentTypeError("--tgt-lang needs at least one language")
+    return list(dict.fromkeys(langs))   # duplikaatit pois, järjestys säilyy
+
+def fan_out(client: AIClient, tm, text: str, src: str, targets: list, outdir: Path, workers: int) -> list:
+    """
+    Käännös + TTS kaikille kohdekielille rinnakkain (rajattu säiepooli).
+    Palauttaa listan (kieli, käännös, t_translate, t_tts, tm_status, wav|None, virhe|None) syötejärjestyksessä.
+    """
+    from concurrent.futures import ThreadPoolExecutor
 
+    def _one(tgt: str):
+        wav = outdir / f"output_translated_{tgt}.wav"
+        try:
+            translated, t_tr, t_tts, _, status = translate_and_speak(client, tm, text, src, tgt, wav, play=False)
+            return tgt, translated, t_tr, t_tts, status, wav if wav.exists() else None, None
+        except Exception as e:
+            return tgt, None, 0.0, 0.0, "-", None, e
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(targets)))) as ex:
+        return list(ex.map(_one, targets))
+
+# ---------- Live mode (VAD-segmentit + asyncio-putki) ----------
+
+LIVE_SR = 16000
+LIVE_BLOCK = 480  # 30 ms @ 16 kHz
+
+async def file_blocks(path: Path, stop: asyncio.Event, sr: int = LIVE_SR):
+    """Toistaa WAVin reaaliajassa lohkoina (testaukseen ilman mikrofonia)."""
+    decoded = read_audio_any(path)
+    if decoded is None:
+        raise ValueError(f"{path}: tiedostoa ei voi dekoodata (WAV tai soundfile tarvitaan)")
+    audio = to_mono_16k(*decoded, sr=sr)
+    t0 = time.perf_counter()
+    for i in range(0, len(audio), LIVE_BLOCK):
+        if stop.is_set():
+            break
+        delay = t0 + (i + LIVE_BLOCK) / sr - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        yield audio[i:i + LIVE_BLOCK], time.perf_counter()
+
+async def mic_blocks(stop: asyncio.Event, sr: int = LIVE_SR):
+    """Mikrofonin callback työntää lohkot asyncio-jonoon (ei pollausta)."""
+    import sounddevice as sd
+    loop = asyncio.get_running_loop()
+    q: asyncio.Queue = asyncio.Queue()
+
+    def callback(indata, frames, time_info, status):
+        loop.call_soon_threadsafe(q.put_nowait, (indata[:, 0].copy(), time.perf_counter()))
+
+    with sd.InputStream(samplerate=sr, channels=1, dtype="float32", blocksize=LIVE_BLOCK, callback=callback):
+        while not stop.is_set():
+            try:
+                yield await asyncio.wait_for(q.get(), timeout=0.5)
+            except asyncio.TimeoutError:
+                continue
+
+async def live_pipeline(client: AIClient, args, outdir: Path, tm=None, stt_cache=None) -> list:
+    stop = asyncio.Event()
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGINT, stop.set)
+    except (NotImplementedError, RuntimeError):
+        pass  # Windows: Ctrl+C keskeyttää suoraan
+
+    segmenter = UtteranceSegmenter(LIVE_SR, args.min_silence_ms, preroll_ms=200, max_s=15.0, min_speech_ms=250)
+    source = file_blocks(Path(args.live_file), stop) if args.live_file else mic_blocks(stop)
+    seg_q: asyncio.Queue = asyncio.Queue()
+    tr_q: asyncio.Queue = asyncio.Queue()
+    results: list = []
+
+    async def capture():
+        idx = 0
+        async for block, t in source:
+            audio = segmenter.feed(block)
+            if audio is not None:
+                idx += 1
+                print(f"[live] segment {idx}: {len(audio) / LIVE_SR:.2f}s")
+                # puheen loppuhetki: lohkon aika miinus segmentin päättänyt hiljaisuus
+                await seg_q.put((idx, audio, t - segmenter.tail / LIVE_SR))
+        audio = segmenter.flush()
+        if audio is not None:
+            idx += 1
+            await seg_q.put((idx, audio, time.perf_counter() - segmenter.tail / LIVE_SR))
+        await seg_q.put(None)
+
+    async def stt_stage():
+        while (item := await seg_q.get()) is not None:
+            idx, audio, eos = item
+            wav_path = outdir / f"live_{idx:03d}_in.wav"
+            wav_write(wav_path, LIVE_SR, np.int16(np.clip(audio, -1, 1) * 32767))
+            try:
+                text, t_stt = await asyncio.to_thread(stt_whisper, client, wav_path, args.src_lang,
+                                                       args.upload_format, stt_cache)
+            except Exception as e:
+                print(f"[live] #{idx} STT failed: {e}", file=sys.stderr)
+                continue
+            if text:
+                print(f"[live] #{idx} transcript: {text}")
+                await tr_q.put((idx, eos, text, t_stt, len(audio) / LIVE_SR))
+        await tr_q.put(None)
+
+    async def speak_stage():
+        while (item := await tr_q.get()) is not None:
+            idx, eos, text, t_stt, speech_s = item
+            try:
+                t_call = time.perf_counter()
+                translated, t_tr, t_tts, t_first, tm_status = await asyncio.to_thread(
+                    translate_and_speak, client, tm, text, args.src_lang, args.tgt_lang,
+                    outdir / f"live_{idx:03d}_out.wav")
+                print(f"[live] #{idx} translation: {translated}  [TM {tm_status}]")
+                t_first += t_tr
+            except Exception as e:
+                print(f"[live] #{idx} translate/TTS failed: {e}", file=sys.stderr)
+                continue
+            first_audio = t_call + t_first - eos
+            print(f"[live] #{idx} end-of-speech → first audio: {first_audio:.2f}s")
+            results.append((idx, speech_s, t_stt, t_tr, t_tts, first_audio))
+
+    await asyncio.gather(capture(), stt_stage(), speak_stage())
+    return results
+
+def run_live(client: AIClient, args, outdir: Path, tm=None, stt_cache=None) -> int:
+    if args.live_file and not Path(args.live_file).exists():
+        print(f"ERROR: input file not found: {args.live_file}", file=sys.stderr)
+        return 2
+    print("[live] kuunnellaan… (Ctrl+C lopettaa)" if not args.live_file else f"[live] playing {args.live_file}")
+    try:
+        results = asyncio.run(live_pipeline(client, args, outdir, tm, stt_cache))
+    except KeyboardInterrupt:
+        return 0
+
+    print("\n=== LIVE DELAYS (s) ===")
+    print(f"{'seg':>4} {'speech':>7} {'STT':>6} {'Tr':>6} {'TTS':>6} {'EOS→audio':>10}")
+    for idx, speech_s, t_stt, t_tr, t_tts, first_audio in results:
+        print(f"{idx:>4} {speech_s:>7.2f} {t_stt:>6.2f} {t_tr:>6.2f} {t_tts:>6.2f} {first_audio:>10.2f}")
+    if results:
+        avg = sum(r[5] for r in results) / len(results)
+        print(f"Segments: {len(results)}, mean EOS→audio: {avg:.2f}")
+    return 0
+
+def run_fan_out(client: AIClient, tm, args, text: str, t_stt: float, wav_in: Path, outdir: Path,
+                stt_cache=None) -> int:
+    print(f"[tr] {args.src_lang} → {', '.join(args.tgt_lang)} (workers={args.workers}) …")
+    t0 = time.perf_counter()
+    results = fan_out(client, tm, text, args.src_lang, args.tgt_lang, outdir, args.workers)
+    wall = time.perf_counter() - t0
+
+    for tgt, translated, *_, err in results:
+        print(f"  [{tgt}] " + (translated if err is None else f"FAILED: {err}"))
+    if args.play:
+        for tgt, *_, wav, err in results:
+            if wav is not None:
+                print(f"[play] {tgt}")
+                play_cached(wav)
+
+    print("\n=== DELAYS (s) ===")
+    print(f"STT:        {t_stt:.2f}")
+    print(f"{'lang':<6} {'Translate':>9} {'TTS':>6} {'Sum':>6}  TM")
+    for tgt, _, t_tr, t_tts, status, _, err in results:
+        print(f"{tgt:<6} {t_tr:>9.2f} {t_tts:>6.2f} {t_tr + t_tts:>6.2f}  {status if err is None else 'error'}")
+    serial = sum(r[2] + r[3] for r in results)
+    if stt_cache is not None:
+        print(f"STT cache:  {'hit' if stt_cache.hits else 'miss'}")
+    print(f"Fan-out:    {wall:.2f} (serial sum {serial:.2f}, slowest {max(r[2] + r[3] for r in results):.2f})")
+    print(f"Total:      {t_stt + wall:.2f}")
+    print(f"Files: input={wav_in}, tts=" + ", ".join(str(r[5]) for r in results if r[5] is not None))
+    return 0 if all(r[6] is None for r in results) else 4
+
+# ---------- Bench (viivejakaumat fixture-kansiosta) ----------
+
+def bench_main(argv: list) -> int:
+    ap = bench_arg_parser("voice_interpreter.py")
+    ap.add_argument("--src-lang", default="en")
+    ap.add_argument("--tgt-lang", default="fr")
+    ap.add_argument("--upload-format", choices=list(UPLOAD_FORMATS), default="flac")
+    args = ap.parse_args(argv)
+    if args.compare:
+        return compare_bench(Path(args.compare[0]), Path(args.compare[1]), args.threshold)
+    if not args.fixtures:
+        ap.error("--fixtures is required (or use --compare)")
+    fixtures = sorted(Path(args.fixtures).glob("*.wav"))
+    if not fixtures:
+        print(f"ERROR: no *.wav fixtures in {args.fixtures}", file=sys.stderr)
+        return 2
+
+    client = get_client(args, args.base_url)
+    work = Path(args.out).parent / "work"; work.mkdir(parents=True, exist_ok=True)
+    stages = ("record", "stt", "translate", "tts", "total")
+    samples: dict = {k: [] for k in stages}
+    errors: dict = {k: 0 for k in stages}
+    for it in range(args.warmup + args.iterations):
+        warm = it < args.warmup
+        for fx in fixtures:
+            stage = "record"
+            try:
+                wav = work / f"{fx.stem}_in.wav"
+                t_rec = load_fixture(fx, wav)
+                stage = "stt"
+                text, t_stt = stt_whisper(client, wav, args.src_lang, args.upload_format)
+                # vaiheet erikseen: käännös- ja TTS-virheet omiin laskureihinsa
+                stage = "translate"
+                translated, t_tr = translate(client, text, args.src_lang, args.tgt_lang)
+                stage = "tts"
+                t_tts, _ = tts_and_play(client, translated, work / f"{fx.stem}_out.wav", play=False)
+            except Exception as e:
+                print(f"[bench] {fx.name} {stage} failed: {e}", file=sys.stderr)
+                if not warm:
+                    errors[stage] += 1
+                continue
+            if not warm:
+                for k, v in zip(stages, (t_rec, t_stt, t_tr, t_tts, t_rec + t_stt + t_tr + t_tts)):
+                    samples[k].append(v)
+        print(f"[bench] iteration {it + 1}/{args.warmup + args.iterations}" + (" (warm-up)" if warm else ""))
+
+    meta = {"script": "voice_interpreter.py", "iterations": args.iterations, "warmup": args.warmup,
+            "fixtures": len(fixtures), "base_url": args.base_url, "src": args.src_lang, "tgt": args.tgt_lang,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "api_usage": client.usage.as_dict()}
+    write_bench_results(samples, errors, meta, Path(args.out), Path(args.csv) if args.csv else None)
+    return 0
+
+# ---------- Session (pitkäikäinen REPL) ----------
+
+def run_session(client: AIClient, tm, args, outdir: Path, stt_cache=None) -> int:
+    """Nauhoita → STT → käännä → puhu silmukassa; client, yhteyspooli ja mikrofoni pysyvät auki."""
+    sr = 16000
+    warm_connection(client)
+    try:
+        recorder = SessionRecorder(sr, args.auto_stop_ms)
+    except Exception as e:
+        print("[rec] audio device failed:", e, file=sys.stderr)
+        return 2
+    totals: list = []
+    to_audio: list = []
+    turn = 0
+    print(f"[session] {args.src_lang} → {args.tgt_lang[0]}. ENTER = puhu, q + ENTER = lopeta.")
+    try:
+        while True:
+            try:
+                cmd = input(f"\n[{turn + 1}] ENTER aloittaa (q lopettaa)… ").strip().lower()
+            except EOFError:
+                break
+            if cmd in ("q", "quit", "exit"):
+                break
+            turn += 1
+            warm_connection(client)   # yhteys auki sillä aikaa kun käyttäjä puhuu
+            audio = recorder.record()
+            t0 = time.perf_counter()
+            if not args.no_vad:
+                audio = trim_silence(audio, sr)
+            if len(audio) < sr // 10:
+                print("  (ei ääntä)")
+                continue
+            wav_in = outdir / f"session_{turn:03d}_in.wav"
+            wav_write(wav_in, sr, np.int16(np.clip(audio, -1, 1) * 32767))
+            try:
+                text, t_stt = stt_whisper(client, wav_in, args.src_lang, args.upload_format, stt_cache)
+                print("  transcript:", text)
+                if not text:
+                    continue
+                translated, t_tr, t_tts, t_first, tm_status = translate_and_speak(
+                    client, tm, text, args.src_lang, args.tgt_lang[0], outdir / f"session_{turn:03d}_out.wav")
+            except Exception as e:
+                print(f"[session] turn {turn} failed: {e}", file=sys.stderr)
+                continue
+            print("  translation:", translated)
+            total = time.perf_counter() - t0
+            totals.append(total)
+            to_audio.append(t_stt + t_tr + t_first)
+            print(f"  turn {turn}: STT={t_stt:.2f} Tr={t_tr:.2f} TTS={t_tts:.2f} to-audio={to_audio[-1]:.2f} "
+                  f"total={total:.2f} [TM {tm_status}]")
+            print(f"  session: {len(totals)} turns, mean to-audio={np.mean(to_audio):.2f}s, "
+                  f"p50 total={np.median(totals):.2f}s")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        recorder.close()
+
+    if totals:
+        print("\n=== SESSION ===")
+        print(f"Turns:          {len(totals)}")
+        print(f"Mean to-audio:  {np.mean(to_audio):.2f}")
+        print(f"Mean total:     {np.mean(totals):.2f}")
+        print(f"p90 total:      {np.percentile(totals, 90):.2f}")
+        if stt_cache is not None:
+            print(f"STT cache hits: {stt_cache.hits}/{stt_cache.hits + stt_cache.misses}")
+    return 0
 
 # ---------- Main ----------
 
 def main() -> int:
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        return bench_main(sys.argv[2:])
     ap = argparse.ArgumentParser(description="Voice Interpreter")
     ap.add_argument("--src-lang", default="en")
-    ap.add_argument("--tgt-lang", default="fr")
+    ap.add_argument("--tgt-lang", type=parse_langs, default=["fr"],
+                    help="Kohdekieli tai pilkuilla eroteltu lista (esim. fr,de,sv,en)")
+    ap.add_argument("--workers", type=int, default=4, help="Rinnakkaiset kielet (käännös + TTS)")
+    ap.add_argument("--play", action="store_true",
+                    help="Useilla kielillä: soita tiedostot peräkkäin valmistumisen jälkeen")
     ap.add_argument("--duration", type=int, default=6)
     ap.add_argument("--press-enter", action="store_true")
     ap.add_argument("--input", default=None, help="Valinnainen olemassa oleva WAV/MP3 → ohita nauhoitus")
     ap.add_argument("--outdir", default="outputs")
+    ap.add_argument("--upload-format", choices=list(UPLOAD_FORMATS), default="flac",
+                    help="STT-lähetyksen pakkaus (flac/opus vaatii soundfile-paketin, muuten WAV)")
+    ap.add_argument("--no-stt-cache", action="store_true", help="Älä käytä transkriptiovälimuistia")
+    ap.add_argument("--stt-cache", default=None, help="Välimuistin SQLite-tiedosto (oletus <outdir>/stt_cache.sqlite3)")
+    ap.add_argument("--stt-cache-size", type=int, default=10000, help="Välimuistin maksimirivimäärä (LRU)")
+    ap.add_argument("--no-vad", action="store_true", help="Älä leikkaa hiljaisuutta nauhoituksesta")
+    ap.add_argument("--auto-stop-ms", type=int, default=0,
+                    help="--press-enter: lopeta automaattisesti tämän hiljaisuuden jälkeen (0 = pois)")
+    ap.add_argument("--no-tm", action="store_true", help="Ohita käännösmuisti (käännös + TTS aina API:sta)")
+    ap.add_argument("--tm-path", default=None, help="Käännösmuistin SQLite-tiedosto (oletus <outdir>/tm.sqlite3)")
+    ap.add_argument("--tm-fuzzy", type=float, default=0.9,
+                    help="Fuzzy-osuman kynnys (trigrammi-kosini 0..1, 1 = vain exact)")
+    ap.add_argument("--session", action="store_true",
+                    help="Pitkäikäinen tila: nauhoita → käännä → puhu silmukassa ilman uudelleenkäynnistystä")
+    ap.add_argument("--live", action="store_true", help="Jatkuva tila: segmentoi tauoista ja tulkkaa putkessa")
+    ap.add_argument("--live-file", default=None, help="--live: toista WAV reaaliajassa mikrofonin sijaan")
+    ap.add_argument("--min-silence-ms", type=int, default=600, help="--live: tauko joka päättää segmentin")
+    add_client_args(ap)
     args = ap.parse_args()
 
     outdir = Path(args.outdir); outdir.mkdir(parents=True, exist_ok=True)
     wav_in  = outdir / "input.wav"
     wav_out = outdir / "output_translated.wav"
 
-    client = get_client()
+    client = get_client(args, keepalive_s=300.0 if args.session else None)
+    tm = None
+    if not args.no_tm:
+        tm = TranslationMemory(Path(args.tm_path) if args.tm_path else outdir / "tm.sqlite3",
+                               outdir / "tm_audio", args.tm_fuzzy)
+    stt_cache = None
+    if not args.no_stt_cache:
+        stt_cache = TranscriptCache(Path(args.stt_cache) if args.stt_cache else outdir / "stt_cache.sqlite3",
+                                    args.stt_cache_size)
+
+    if args.live or args.live_file:
+        if len(args.tgt_lang) > 1:
+            print("ERROR: --live supports a single --tgt-lang", file=sys.stderr)
+            return 2
+        args.tgt_lang = args.tgt_lang[0]
+        return run_live(client, args, outdir, tm, stt_cache)
+    if args.session:
+        if len(args.tgt_lang) > 1:
+            print("ERROR: --session supports a single --tgt-lang", file=sys.stderr)
+            return 2
+        return run_session(client, tm, args, outdir, stt_cache)
 
     # 1) Record or load existing file
+    vad_saved = 0.0
     if args.input:
         src = Path(args.input)
         if not src.exists():
@@ -192,7 +830,8 @@ def main() -> int:
         print(f"[rec] using existing file: {wav_in}")
     else:
         try:
-            record_wav(wav_in, None if args.press_enter else args.duration, args.press_enter)
+            vad_saved = record_wav(wav_in, None if args.press_enter else args.duration, args.press_enter,
+                                   vad=not args.no_vad, auto_stop_ms=args.auto_stop_ms)
         except Exception as e:
             print("[rec] recording failed:", e, file=sys.stderr)
             return 2
@@ -200,35 +839,38 @@ def main() -> int:
     # 2) STT
     print("[stt] transcribing…")
     try:
-        text, t_stt = stt_whisper(client, wav_in, args.src_lang)
+        text, t_stt = stt_whisper(client, wav_in, args.src_lang, args.upload_format, stt_cache)
     except Exception as e:
         print("[stt] failed:", e, file=sys.stderr)
         return 3
     print("  transcript:", text)
 
-    # 3) Translate
-    print(f"[tr] {args.src_lang} → {args.tgt_lang} …")
+    if len(args.tgt_lang) > 1:
+        return run_fan_out(client, tm, args, text, t_stt, wav_in, outdir, stt_cache)
+
+    # 3) Translate + 4) TTS (käännösmuistin kautta)
+    print(f"[tr] {args.src_lang} → {args.tgt_lang[0]} …")
     try:
-        translated, t_tr = translate(client, text, args.src_lang, args.tgt_lang)
+        translated, t_tr, t_tts, t_first, tm_status = translate_and_speak(
+            client, tm, text, args.src_lang, args.tgt_lang[0], wav_out)
     except Exception as e:
-        print("[tr] failed:", e, file=sys.stderr)
+        print("[tr/tts] failed:", e, file=sys.stderr)
         return 4
     print("  translation:", translated)
 
-    # 4) TTS
-    print("[tts] synthesizing…")
-    try:
-        t_tts = tts_and_play(client, translated, wav_out)
-    except Exception as e:
-        print("[tts] failed:", e, file=sys.stderr)
-        return 5
-
     # 5) Delays
     print("\n=== DELAYS (s) ===")
     print(f"STT:        {t_stt:.2f}")
     print(f"Translate:  {t_tr:.2f}")
-    print(f"TTS:        {t_tts:.2f}")
+    print(f"TTS first:  {t_first:.2f}")
+    print(f"TTS total:  {t_tts:.2f}")
+    print(f"To audio:   {(t_stt + t_tr + t_first):.2f}")
     print(f"Total:      {(t_stt + t_tr + t_tts):.2f}")
+    print(f"TM:         {tm_status}")
+    if stt_cache is not None:
+        print(f"STT cache:  {'hit' if stt_cache.hits else 'miss'}")
+    if vad_saved:
+        print(f"VAD saved:  {vad_saved:.2f} s audio")
     print(f"Files: input={wav_in}, tts={wav_out}")
     return 0
 
@@ -13,16 +13,32 @@ Usage examples:
   python voice_imggen.py --duration 6 --ratio 16:9 --n 2
   python voice_imggen.py --press-enter --ratio 1:1 --n 1
   python voice_imggen.py --input sample.wav --ratio 3:4 --n 1
+  python voice_imggen.py --continuous --workers 3 --queue-depth 6 --auto-stop-ms 1200 --n 2
+  python voice_imggen.py bench --fixtures fixtures/ --iterations 10 --base-url http://127.0.0.1:8080/v1 \
+      --pollinations-base http://127.0.0.1:8080
+  python voice_imggen.py bench --compare bench/old.json bench/new.json
 """
 
-import argparse, os, sys, time, platform, shutil, subprocess
+from __future__ import annotations
+
+import argparse, atexit, os, sys, time, platform, shutil, subprocess, select, threading
 from pathlib import Path
-from typing import Optional, Tuple, List
-import requests
-import numpy as np
-import sounddevice as sd
-from scipy.io.wavfile import write as wav_write
-from openai import OpenAI
+from typing import Optional, Tuple, List, TYPE_CHECKING
+
+# raskaat riippuvuudet (requests, numpy, sounddevice, scipy, openai) ladataan vasta käytössä;
+# sounddevice tuodaan vain nauhoitus-/toistopoluissa, joten --input toimii ilman PortAudiota
+# yhteinen OpenAI-asiakas (repon juuren aiclient): pooli, RPM/TPM-rajoitin, retry, käyttökirjanpito
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from aiclient import MissingAPIKey, add_client_args, print_usage
+# VAD, nauhoitus, STT ja bench-apurit jaetaan voice_interpreterin kanssa (repon juuren voicekit)
+from voicekit.audio import (UPLOAD_FORMATS, UtteranceSegmenter, lazy_import, record_until_stopped,
+                            trim_silence, wav_write)
+from voicekit.bench import bench_arg_parser, compare_bench, load_fixture, write_bench_results
+from voicekit.stt import TranscriptCache, transcribe_audio
+np = lazy_import("numpy")
+if TYPE_CHECKING:
+    import requests
+    from aiclient import AIClient
 
 # ---------- helpers ----------
 
@@ -39,23 +55,18 @@ def pick_size(ratio: str) -> Tuple[int, int]:
 
 def ts() -> str:
     import datetime
-    return datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
-
-def load_env_from_repo_root():
-    root_env = Path(__file__).resolve().parents[1] / ".env"
-    if root_env.exists():
-        for line in root_env.read_text(encoding="utf-8").splitlines():
-            if "=" in line and not line.strip().startswith("#"):
-                k, v = line.split("=", 1)
-                os.environ.setdefault(k.strip(), v.strip())
-
-def get_openai_client() -> OpenAI:
-    if not os.getenv("OPENAI_API_KEY"):
-        load_env_from_repo_root()
-    key = os.getenv("OPENAI_API_KEY")
-    if not key:
+    # millisekunnit mukaan: saman sekunnin erät eivät törmää
+    return datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")[:-3]
+
+def get_openai_client(args, base_url: Optional[str] = None) -> AIClient:
+    """Yksi AIClient koko ajolle (.env aiclient.load_envillä; paikallinen stub ei vaadi avainta)."""
+    from aiclient import client_from_args
+    try:
+        client = client_from_args(args, base_url=base_url)
+    except MissingAPIKey:
         print("ERROR: OPENAI_API_KEY puuttuu (.env).", file=sys.stderr); sys.exit(2)
-    return OpenAI(api_key=key)
+    atexit.register(print_usage, client, args)
+    return client
 
 def speak(text: str):
     # kevyt kuittaus ääneen (valinnainen)
@@ -67,100 +78,359 @@ def speak(text: str):
 
 # ---------- recording ----------
 
-def record_wav(out_path: Path, duration: Optional[int], press_enter: bool, sr=16000):
-    import select
+def record_wav(out_path: Path, duration: Optional[int], press_enter: bool, sr=16000,
+               vad: bool = True, auto_stop_ms: int = 0) -> float:
+    """Nauhoittaa WAVin; VAD leikkaa alun/lopun hiljaisuuden. Palauttaa säästetyt sekunnit."""
+    import sounddevice as sd
     print(f"[rec] sampling_rate={sr}Hz")
     sd.default.samplerate = sr; sd.default.channels = 1
     if press_enter:
         print("  Paina ENTER aloittaaksesi, ja ENTER lopettaaksesi.")
         input("  ENTER aloittaa…")
-        recording = []
-        stream = sd.InputStream(samplerate=sr, channels=1, dtype="float32")
-        stream.start()
-        print("  Nauhoitus käynnissä… (ENTER lopettaa)")
-        try:
-            while True:
-                frames, _ = stream.read(1024)
-                recording.append(frames.copy())
-                if sys.stdin in select.select([sys.stdin], [], [], 0)[0]:
-                    sys.stdin.readline()
-                    break
-        finally:
-            stream.stop(); stream.close()
-        audio = np.concatenate(recording, axis=0)
+        audio = record_until_stopped(sr, auto_stop_ms)
     else:
         print(f"  Nauhoitus {duration}s…")
         audio = sd.rec(int(duration * sr), samplerate=sr, channels=1, dtype="float32")
         sd.wait()
+    saved = 0.0
+    if vad:
+        trimmed = trim_silence(audio, sr)
+        saved = (len(audio) - len(trimmed)) / sr
+        print(f"[vad] {len(audio) / sr:.2f}s → {len(trimmed) / sr:.2f}s (saved {saved:.2f}s)")
+        audio = trimmed
     wav = np.int16(np.clip(audio, -1, 1) * 32767)
     wav_write(out_path, sr, wav)
     print(f"  saved: {out_path}")
+    return saved
 
 # ---------- STT ----------
 
-def transcribe_prompt(client: OpenAI, audio_file: Path) -> Tuple[str, float]:
+def transcribe_prompt(client: AIClient, audio_file: Path, fmt: str = "flac", cache=None) -> Tuple[str, float]:
     t0 = time.perf_counter()
-    with open(audio_file, "rb") as f:
-        tr = client.audio.transcriptions.create(model="whisper-1", file=f)
+    key = None
+    if cache is not None:
+        key = cache.make_key(audio_file, "whisper-1", None)
+        text = cache.get(key)
+        if text is not None:
+            dur = time.perf_counter() - t0
+            print(f"[stt] cache hit ({dur * 1000:.0f} ms)")
+            return text, dur
+    text, sent = transcribe_audio(client, audio_file, fmt)
+    if cache is not None:
+        cache.put(key, text, audio_file.stat().st_size)
     dur = time.perf_counter() - t0
-    text = tr.text.strip()
+    print(f"[stt] uploaded {sent / 1024:.1f} KB (input {audio_file.stat().st_size / 1024:.1f} KB) in {dur:.2f}s")
     return text, dur
 
 # ---------- image generation (Pollinations) ----------
 
-def pollinations_url(prompt: str, w: int, h: int) -> str:
+POLLINATIONS_BASE = os.getenv("POLLINATIONS_BASE", "https://image.pollinations.ai")
+HTTP_POOL_SIZE = 16
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+def http_session() -> requests.Session:
+    """Yksi jaettu Session: TLS-yhteydet käytetään uudelleen kuvasta toiseen (luonti lukon alla, poolisäikeet)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+def pollinations_url(prompt: str, w: int, h: int, seed: Optional[int] = None) -> str:
     from urllib.parse import quote
-    return f"https://image.pollinations.ai/prompt/{quote(prompt)}?width={w}&height={h}"
+    url = f"{POLLINATIONS_BASE}/prompt/{quote(prompt)}?width={w}&height={h}"
+    if seed is not None:
+        url += f"&seed={seed}"
+    return url
+
+def download_image(url: str, out: Path) -> Path:
+    """Striimattu lataus .part-tiedostoon ja atominen uudelleennimeäminen valmiina."""
+    tmp = out.with_suffix(out.suffix + ".part")
+    with http_session().get(url, timeout=120, stream=True) as r:
+        r.raise_for_status()
+        with open(tmp, "wb") as f:
+            for chunk in r.iter_content(chunk_size=64 * 1024):
+                f.write(chunk)
+    tmp.replace(out)
+    return out
 
-def generate_images_pollinations(prompt: str, ratio: str, n: int, outdir: Path) -> List[Path]:
+def generate_images_pollinations(prompt: str, ratio: str, n: int, outdir: Path, prefix: str = "vcgen",
+                                 seed: Optional[int] = None, concurrency: int = 4) -> List[Path]:
+    """
+    n kuvaa rinnakkain (enintään `concurrency` latausta kerrallaan). Jokainen kuva saa oman
+    seedin (seed + i), jotta kuvat oikeasti eroavat toisistaan.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    import random
     w, h = pick_size(ratio)
-    print(f"[gen] backend=pollinations ratio={ratio} size={w}x{h} n={n}")
-    saved = []
+    base_seed = seed if seed is not None else random.randrange(1_000_000)
+    stamp = ts()
+    print(f"[gen] backend=pollinations ratio={ratio} size={w}x{h} n={n} seed={base_seed}")
+    jobs = []
     for i in range(1, n + 1):
-        url = pollinations_url(prompt, w, h)
+        url = pollinations_url(prompt, w, h, base_seed + i - 1)
         print(f"[{i}] URL: {url}")
-        r = requests.get(url, timeout=120); r.raise_for_status()
-        out = outdir / f"vcgen_{ts()}_{i:03d}.png"
-        out.write_bytes(r.content)
-        print(f"    saved: {out}")
-        saved.append(out)
-    return saved
+        jobs.append((url, outdir / f"{prefix}_{stamp}_{i:03d}.png"))
+
+    def _one(job):
+        path = download_image(*job)
+        print(f"    saved: {path}")
+        return path
+
+    if n == 1:
+        return [_one(jobs[0])]
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, n))) as ex:
+        return list(ex.map(_one, jobs))
+
+# ---------- Bench (viivejakaumat fixture-kansiosta) ----------
+
+def bench_main(argv: list) -> int:
+    global POLLINATIONS_BASE
+    ap = bench_arg_parser("voice_imggen.py")
+    ap.add_argument("--pollinations-base", default=None, help="Pollinations-endpoint (esim. paikallinen stub)")
+    ap.add_argument("--ratio", choices=list(RATIO_TO_SIZE.keys()), default="1:1")
+    ap.add_argument("--n", type=int, default=1)
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--upload-format", choices=list(UPLOAD_FORMATS), default="flac")
+    args = ap.parse_args(argv)
+    if args.compare:
+        return compare_bench(Path(args.compare[0]), Path(args.compare[1]), args.threshold)
+    if not args.fixtures:
+        ap.error("--fixtures is required (or use --compare)")
+    fixtures = sorted(Path(args.fixtures).glob("*.wav"))
+    if not fixtures:
+        print(f"ERROR: no *.wav fixtures in {args.fixtures}", file=sys.stderr)
+        return 2
+    if args.pollinations_base:
+        POLLINATIONS_BASE = args.pollinations_base.rstrip("/")
+
+    client = get_openai_client(args, args.base_url)
+    work = Path(args.out).parent / "work"; work.mkdir(parents=True, exist_ok=True)
+    stages = ("record", "stt", "image", "total")
+    samples: dict = {k: [] for k in stages}
+    errors: dict = {k: 0 for k in stages}
+    for it in range(args.warmup + args.iterations):
+        warm = it < args.warmup
+        for fx in fixtures:
+            stage = "record"
+            try:
+                wav = work / f"{fx.stem}_in.wav"
+                t_rec = load_fixture(fx, wav)
+                stage = "stt"
+                prompt, t_stt = transcribe_prompt(client, wav, args.upload_format)
+                stage = "image"
+                t0 = time.perf_counter()
+                generate_images_pollinations(prompt, args.ratio, args.n, work, concurrency=args.concurrency)
+                t_img = time.perf_counter() - t0
+            except Exception as e:
+                print(f"[bench] {fx.name} {stage} failed: {e}", file=sys.stderr)
+                if not warm:
+                    errors[stage] += 1
+                continue
+            if not warm:
+                for k, v in zip(stages, (t_rec, t_stt, t_img, t_rec + t_stt + t_img)):
+                    samples[k].append(v)
+        print(f"[bench] iteration {it + 1}/{args.warmup + args.iterations}" + (" (warm-up)" if warm else ""))
+
+    meta = {"script": "voice_imggen.py", "iterations": args.iterations, "warmup": args.warmup,
+            "fixtures": len(fixtures), "base_url": args.base_url, "pollinations_base": POLLINATIONS_BASE,
+            "ratio": args.ratio, "n": args.n, "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "api_usage": client.usage.as_dict()}
+    write_bench_results(samples, errors, meta, Path(args.out), Path(args.csv) if args.csv else None)
+    return 0
+
+# ---------- continuous mode (kuuntelu + taustageneroinnit) ----------
+
+CONTINUOUS_SILENCE_MS = 900   # promptin päättävä tauko, jos --auto-stop-ms ei ole asetettu
+
+def generation_worker(client: AIClient, jobs, args, outdir: Path, done: list, lock, stt_cache=None):
+    """Hakee äänipromptteja jonosta, transkriboi ja generoi kuvat; None lopettaa."""
+    name = threading.current_thread().name
+    while True:
+        job = jobs.get()
+        if job is None:
+            jobs.task_done()
+            return
+        job_id, wav, t_queued = job
+        t0 = time.perf_counter()
+        waited = t0 - t_queued
+        try:
+            prompt, t_stt = transcribe_prompt(client, wav, args.upload_format, stt_cache)
+        except Exception as e:
+            print(f"\n[{name}] job {job_id} STT failed: {e}", file=sys.stderr)
+            prompt, t_stt = "", time.perf_counter() - t0
+        if not prompt:
+            print(f"\n[{name}] job {job_id}: ei tekstiä, ohitetaan")
+            jobs.task_done()
+            continue
+        print(f"\n[{name}] job {job_id} started (waited {waited:.1f}s, STT {t_stt:.2f}s): {prompt[:60]}")
+        t0 = time.perf_counter()
+        try:
+            images = generate_images_pollinations(prompt, args.ratio, args.n, outdir,
+                                                  prefix=f"vcgen_j{job_id:03d}", seed=args.seed,
+                                                  concurrency=args.concurrency)
+            err = None
+        except Exception as e:
+            images, err = [], e
+        t_gen = time.perf_counter() - t0
+        with lock:
+            done.append((job_id, prompt, images, waited, t_stt, t_gen, err))
+        status = f"{len(images)} image(s) in {t_gen:.1f}s" if err is None else f"FAILED: {err}"
+        print(f"\n[{name}] job {job_id} done: {status} (queue {jobs.qsize()})")
+        jobs.task_done()
+
+def quit_requested() -> bool:
+    """q + ENTER lopettaa jatkuvan tilan; tarkistus ei blokkaa."""
+    if sys.stdin in select.select([sys.stdin], [], [], 0)[0]:
+        return sys.stdin.readline().strip().lower() in ("q", "quit", "exit")
+    return False
+
+def run_continuous(client: AIClient, args, outdir: Path, stt_cache=None) -> int:
+    """
+    Yksi InputStream koko istunnolle: UtteranceSegmenter pilkkoo puheen prompteiksi taukojen kohdalta
+    ja WAV työnnetään jonoon; workerit transkriboivat ja lataavat kuvat taustalla. Mikrofonisilmukka
+    ei odota verkkoa: täyden jonon (--queue-depth) aikana puhuttu prompt pudotetaan ja raportoidaan.
+    """
+    import queue
+    import sounddevice as sd
+    sr = 16000
+    jobs: queue.Queue = queue.Queue(maxsize=max(1, args.queue_depth))
+    done: list = []
+    lock = threading.Lock()
+    workers = [threading.Thread(target=generation_worker, name=f"gen{i + 1}", daemon=True,
+                                args=(client, jobs, args, outdir, done, lock, stt_cache))
+               for i in range(max(1, args.workers))]
+    for w in workers:
+        w.start()
+
+    silence_ms = args.auto_stop_ms or CONTINUOUS_SILENCE_MS
+    segmenter = UtteranceSegmenter(sr, silence_ms)
+    blocks: queue.Queue = queue.Queue()
+
+    def callback(indata, frames, time_info, status):
+        blocks.put(indata[:, 0].copy())
+
+    print(f"[continuous] workers={len(workers)} queue-depth={jobs.maxsize}. Puhu prompt; "
+          f"{silence_ms} ms tauko päättää sen. q + ENTER tai Ctrl+C lopettaa.")
+    job_id = dropped = 0
+    try:
+        with sd.InputStream(samplerate=sr, channels=1, dtype="float32", callback=callback):
+            while not quit_requested():
+                try:
+                    audio = segmenter.feed(blocks.get(timeout=0.1))
+                except queue.Empty:
+                    continue
+                if audio is None:
+                    continue
+                job_id += 1
+                if not args.no_vad:
+                    audio = trim_silence(audio, sr)
+                wav = outdir / f"voice_prompt_{job_id:03d}.wav"
+                wav_write(wav, sr, np.int16(np.clip(audio, -1, 1) * 32767))
+                try:
+                    jobs.put_nowait((job_id, wav, time.perf_counter()))
+                except queue.Full:
+                    dropped += 1
+                    print(f"  (jono täynnä {jobs.maxsize}: prompt {job_id} pudotettu, yhteensä {dropped})")
+                    continue
+                print(f"  queued job {job_id} ({len(audio) / sr:.1f}s audio, queue {jobs.qsize()})")
+    except KeyboardInterrupt:
+        pass
+
+    if job_id:
+        print(f"\n[continuous] waiting for {jobs.qsize()} queued job(s) to finish…")
+    for _ in workers:
+        jobs.put(None)
+    for w in workers:
+        w.join()
+
+    print("\n=== SUMMARY ===")
+    if dropped:
+        print(f"dropped {dropped} prompt(s) (queue full, raise --queue-depth or --workers)")
+    for jid, prompt, images, waited, t_stt, t_gen, err in sorted(done):
+        status = f"{len(images)} file(s)" if err is None else f"error: {err}"
+        print(f"job {jid}: wait={waited:.1f}s STT={t_stt:.1f}s IMG={t_gen:.1f}s {status} — {prompt[:60]}")
+        for p in images:
+            print("   -", p)
+    return 0 if all(d[6] is None for d in done) else 1
 
 # ---------- main ----------
 
 def main() -> int:
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        return bench_main(sys.argv[2:])
     ap = argparse.ArgumentParser(description="Voice-controlled AI Image Generator")
     ap.add_argument("--duration", type=int, default=6, help="Nauhoituksen kesto (s)")
     ap.add_argument("--press-enter", action="store_true", help="ENTER aloita/lopeta nauhoitus")
     ap.add_argument("--input", default=None, help="Valmis audio (WAV/MP3) → ohita nauhoitus")
     ap.add_argument("--ratio", choices=list(RATIO_TO_SIZE.keys()), default="1:1")
     ap.add_argument("--n", type=int, default=1, help="Kuvien määrä")
+    ap.add_argument("--seed", type=int, default=None, help="Perusseed; kuva i saa seedin seed+i (oletus satunnainen)")
+    ap.add_argument("--concurrency", type=int, default=4, help="Samanaikaiset kuvalataukset")
     ap.add_argument("--outdir", default="outputs")
+    ap.add_argument("--continuous", action="store_true",
+                    help="Kuuntele promptteja jatkuvasti; kuvat generoidaan taustalla jonosta")
+    ap.add_argument("--workers", type=int, default=2, help="--continuous: rinnakkaiset generointiworkerit")
+    ap.add_argument("--queue-depth", type=int, default=4, help="--continuous: jonon maksimipituus")
+    ap.add_argument("--upload-format", choices=list(UPLOAD_FORMATS), default="flac",
+                    help="STT-lähetyksen pakkaus (flac/opus vaatii soundfile-paketin, muuten WAV)")
+    ap.add_argument("--no-stt-cache", action="store_true", help="Älä käytä transkriptiovälimuistia")
+    ap.add_argument("--stt-cache", default=None, help="Välimuistin SQLite-tiedosto (oletus <outdir>/stt_cache.sqlite3)")
+    ap.add_argument("--stt-cache-size", type=int, default=10000, help="Välimuistin maksimirivimäärä (LRU)")
+    ap.add_argument("--no-vad", action="store_true", help="Älä leikkaa hiljaisuutta nauhoituksesta")
+    ap.add_argument("--auto-stop-ms", type=int, default=0,
+                    help="--press-enter: lopeta automaattisesti tämän hiljaisuuden jälkeen (0 = pois); "
+                         f"--continuous: promptin päättävä tauko (oletus {CONTINUOUS_SILENCE_MS})")
+    add_client_args(ap)
     args = ap.parse_args()
 
     outdir = Path(args.outdir); outdir.mkdir(parents=True, exist_ok=True)
     wav_in = outdir / "voice_prompt.wav"
 
-    client = get_openai_client()
+    client = get_openai_client(args)
+
+    if args.continuous:
+        stt_cache = None if args.no_stt_cache else TranscriptCache(
+            Path(args.stt_cache) if args.stt_cache else outdir / "stt_cache.sqlite3", args.stt_cache_size)
+        return run_continuous(client, args, outdir, stt_cache)
 
     # 1) Record or use file
+    vad_saved = 0.0
     if args.input:
         src = Path(args.input)
         if not src.exists(): print(f"ERROR: file not found: {src}", file=sys.stderr); return 2
         wav_in = src
         print(f"[rec] using existing file: {wav_in}")
     else:
-        record_wav(wav_in, args.duration if not args.press_enter else None, args.press_enter)
+        vad_saved = record_wav(wav_in, args.duration if not args.press_enter else None, args.press_enter,
+                               vad=not args.no_vad, auto_stop_ms=args.auto_stop_ms)
 
     # 2) STT
     print("[stt] transcribing…")
-    prompt, t_stt = transcribe_prompt(client, wav_in)
+    stt_cache = None
+    if not args.no_stt_cache:
+        stt_cache = TranscriptCache(Path(args.stt_cache) if args.stt_cache else outdir / "stt_cache.sqlite3",
+                                    args.stt_cache_size)
+    try:
+        prompt, t_stt = transcribe_prompt(client, wav_in, args.upload_format, stt_cache)
+    except Exception as e:
+        print("[stt] failed:", e, file=sys.stderr)
+        return 3
     print("  prompt:", prompt)
     speak("I will generate images from your voice prompt.")
 
     # 3) Generate images
     t0 = time.perf_counter()
-    images = generate_images_pollinations(prompt, args.ratio, args.n, outdir)
+    images = generate_images_pollinations(prompt, args.ratio, args.n, outdir, seed=args.seed,
+                                          concurrency=args.concurrency)
     t_gen = time.perf_counter() - t0
 
     # 4) Done
@@ -168,7 +438,10 @@ def main() -> int:
     print(f"Prompt: {prompt}")
     print(f"Saved files ({len(images)}):")
     for p in images: print(" -", p)
-    print(f"Delays: STT={t_stt:.2f}s, IMG={t_gen:.2f}s, TOTAL={(t_stt+t_gen):.2f}s")
+    cache_note = f" (cache {'hit' if stt_cache.hits else 'miss'})" if stt_cache is not None else ""
+    print(f"Delays: STT={t_stt:.2f}s{cache_note}, IMG={t_gen:.2f}s, TOTAL={(t_stt+t_gen):.2f}s")
+    if vad_saved:
+        print(f"VAD: trimmed {vad_saved:.2f}s of silence before upload")
     return 0
 
 if __name__ == "__main__":
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+ai_stub.py — paikallinen OpenAI- ja Pollinations-tynkäpalvelin suorituskykytesteihin
+
+Toteuttaa repon käyttämät endpointit (pelkkä stdlib, ei API-avainta eikä verkkoa):
+  POST /v1/chat/completions       (myös stream=True → SSE)
+  POST /v1/images/generations     (b64_json, kohinakuva pyydetyssä koossa)
+  POST /v1/audio/transcriptions   (json tai text)
+  POST /v1/audio/speech           (pcm/wav, chunked-striimi)
+  GET  /v1/models                 (aiclient.warm)
+  GET  /prompt/<teksti>?width=&height=   (Pollinations)
+  GET  /__stats                   (pyyntö-, virhe- ja tavulaskurit endpointeittain)
+
+Viive, virheprosentti ja vastausten koko ovat säädettäviä:
+  --latency 200                         kaikille 200 ms
+  --latency images=lognormal:3000:0.4   endpointille oma jakauma
+      jakaumat: MS | fixed:MS | uniform:LO:HI | normal:MEAN:SD | lognormal:MEDIAN:SIGMA
+  --error-rate 0.05 --error-status 429,500   (429 saa Retry-After-otsakkeen)
+
+Käyttö:
+  python tools/ai_stub.py --port 8799 --latency chat=lognormal:400:0.5 --latency images=2000
+  OPENAI_BASE_URL=http://127.0.0.1:8799/v1 POLLINATIONS_BASE=http://127.0.0.1:8799 \\
+      python Assignment_5/img2txt2img.py --image kuva.png
+"""
+
+import argparse, array, json, math, random, re, struct, sys, threading, time, zlib
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+ENDPOINTS = ("chat", "images", "transcriptions", "speech", "pollinations", "models")
+TTS_SR = 24000
+WORDS = ("the quick brown fox jumps over a lazy dog while farmers harvest golden wheat under "
+         "a calm evening sky and rivers carry light toward distant hills").split()
+
+Sampler = Callable[[random.Random], float]
+
+# ---------- viivejakaumat ----------
+
+def parse_latency(spec: str) -> Sampler:
+    """'200' | 'fixed:200' | 'uniform:100:300' | 'normal:200:50' | 'lognormal:200:0.5' → näytteistin (s)."""
+    kind, *params = spec.split(":") if ":" in spec else ("fixed", spec)
+    try:
+        p = [float(x) for x in params]
+    except ValueError:
+        raise ValueError(f"bad latency spec: {spec!r}")
+    ms = [x / 1000.0 for x in p]
+    if kind == "fixed" and len(p) == 1:
+        return lambda rng: ms[0]
+    if kind == "uniform" and len(p) == 2:
+        return lambda rng: rng.uniform(ms[0], ms[1])
+    if kind == "normal" and len(p) == 2:
+        return lambda rng: max(0.0, rng.gauss(ms[0], ms[1]))
+    if kind == "lognormal" and len(p) == 2:   # MEDIAN ms, SIGMA dimensioton
+        return lambda rng: ms[0] * math.exp(rng.gauss(0.0, p[1]))
+    raise ValueError(f"bad latency spec: {spec!r}")
+
+def parse_latency_args(specs) -> Dict[str, Sampler]:
+    """['300', 'images=uniform:1000:3000'] → {endpoint: näytteistin}; ilman nimeä = kaikki endpointit."""
+    out: Dict[str, Sampler] = {}
+    for spec in specs or []:
+        name, _, dist = spec.rpartition("=")
+        if name and name not in ENDPOINTS:
+            raise ValueError(f"unknown endpoint {name!r} (choose from {', '.join(ENDPOINTS)})")
+        sampler = parse_latency(dist)
+        for ep in ([name] if name else ENDPOINTS):
+            out[ep] = sampler
+    return out
+
+# ---------- konfiguraatio ja laskurit ----------
+
+@dataclass
+class StubConfig:
+    latency: Dict[str, Sampler] = field(default_factory=dict)
+    error_rate: float = 0.0
+    error_status: Tuple[int, ...] = (429, 500)
+    retry_after: float = 0.5
+    completion_tokens: int = 120
+    stream_interval: float = 0.005      # SSE-/TTS-palojen väli (s)
+    image_scale: float = 1.0            # kuvan sivun kerroin pyydetystä koosta (payloadin koko)
+    transcript: str = "a red barn in a snowy field at sunrise"
+    speech_cps: float = 15.0            # TTS: syötemerkkejä per sekunti ääntä
+    seed: Optional[int] = None
+
+class Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = {ep: {"requests": 0, "errors": 0, "bytes_in": 0, "bytes_out": 0} for ep in ENDPOINTS}
+
+    def add(self, ep: str, **counts):
+        with self._lock:
+            for k, v in counts.items():
+                self.endpoints[ep][k] += v
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            eps = {ep: dict(c) for ep, c in self.endpoints.items()}
+        total = {k: sum(c[k] for c in eps.values()) for k in ("requests", "errors", "bytes_in", "bytes_out")}
+        return {"endpoints": eps, "total": total}
+
+# ---------- payloadit ----------
+
+def make_png(w: int, h: int, rng: random.Random) -> bytes:
+    """Kohina-PNG (RGB, ei pakkaudu) → kokoluokaltaan todellisen generoidun kuvan kaltainen payload."""
+    row = 3 * w
+    noise = rng.randbytes(row * h)
+    raw = b"".join(b"\x00" + noise[y * row:(y + 1) * row] for y in range(h))
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw, 1)) + chunk(b"IEND", b""))
+
+def wav_header(n_bytes: int, sr: int = TTS_SR) -> bytes:
+    return (b"RIFF" + struct.pack("<I", 36 + n_bytes) + b"WAVEfmt "
+            + struct.pack("<IHHIIHH", 16, 1, 1, sr, sr * 2, 2, 16) + b"data" + struct.pack("<I", n_bytes))
+
+def tone_pcm(seconds: float, sr: int = TTS_SR) -> bytes:
+    """Hiljainen 220 Hz siniääni int16-PCM:nä (TTS-vastauksen runko)."""
+    n = max(1, int(seconds * sr))
+    return array.array("h", (int(3000 * math.sin(2 * math.pi * 220 * i / sr)) for i in range(n))).tobytes()
+
+def parse_size(size, default=(1024, 1024)) -> Tuple[int, int]:
+    m = re.fullmatch(r"(\d+)x(\d+)", str(size or ""))
+    return (int(m.group(1)), int(m.group(2))) if m else default
+
+# ---------- HTTP-käsittelijä ----------
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "ai-stub/1.0"
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def cfg(self) -> StubConfig:
+        return self.server.config
+
+    # --- apurit ---
+
+    def _read_body(self, ep: str) -> bytes:
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.server.stats.add(ep, requests=1, bytes_in=len(body))
+        return body
+
+    def _send(self, ep: str, status: int, body, ctype: str = "application/json", headers: dict = None):
+        data = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+        if ep:
+            self.server.stats.add(ep, bytes_out=len(data))
+
+    def _start_chunked(self, ctype: str):
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_chunk(self, ep: str, data: bytes):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+        self.server.stats.add(ep, bytes_out=len(data))
+
+    def _end_chunked(self):
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _delay_or_fail(self, ep: str) -> bool:
+        """Simuloitu palvelinviive; True jos pyyntöön vastattiin injektoidulla virheellä."""
+        rng = self.server.rng()
+        sampler = self.cfg.latency.get(ep)
+        if sampler:
+            time.sleep(sampler(rng))
+        if self.cfg.error_rate and rng.random() < self.cfg.error_rate:
+            status = rng.choice(self.cfg.error_status)
+            headers = {}
+            if status == 429:
+                headers = {"retry-after-ms": str(int(self.cfg.retry_after * 1000)),
+                           "retry-after": str(max(1, math.ceil(self.cfg.retry_after)))}
+            error = {"error": {"message": f"injected {status}", "type": "stub_error", "code": status}}
+            self.server.stats.add(ep, errors=1)
+            self._send(ep, status, error, headers=headers)
+            return True
+        return False
+
+    # --- reititys ---
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/__stats":
+            return self._send(None, 200, self.server.stats.snapshot())
+        if url.path.startswith("/prompt/"):
+            return self.pollinations(unquote(url.path[len("/prompt/"):]), parse_qs(url.query))
+        if url.path.endswith("/models"):
+            self._read_body("models")
+            if not self._delay_or_fail("models"):
+                self._send("models", 200, {"object": "list", "data": [
+                    {"id": m, "object": "model", "created": 0, "owned_by": "stub"}
+                    for m in ("gpt-4o-mini", "gpt-4.1", "gpt-image-1", "whisper-1", "gpt-4o-mini-tts")]})
+            return
+        self._send(None, 404, {"error": {"message": f"no route for GET {url.path}", "type": "not_found"}})
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        for suffix, ep, handler in (("/chat/completions", "chat", self.chat),
+                                    ("/images/generations", "images", self.images),
+                                    ("/audio/transcriptions", "transcriptions", self.transcriptions),
+                                    ("/audio/speech", "speech", self.speech)):
+            if path.endswith(suffix):
+                body = self._read_body(ep)
+                if not self._delay_or_fail(ep):
+                    handler(body)
+                return
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self._send(None, 404, {"error": {"message": f"no route for POST {path}", "type": "not_found"}})
+
+    # --- endpointit ---
+
+    def chat(self, body: bytes):
+        req = json.loads(body or b"{}")
+        model = req.get("model", "gpt-4o-mini")
+        limit = req.get("max_tokens") or req.get("max_completion_tokens") or self.cfg.completion_tokens
+        n_tokens = min(limit, self.cfg.completion_tokens)
+        prompt_tokens = max(1, len(body) // 4)
+        words = [WORDS[i % len(WORDS)] for i in range(n_tokens)]
+        created = int(time.time())
+        n = req.get("n") or 1
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": n_tokens * n,
+                 "total_tokens": prompt_tokens + n_tokens * n}
+
+        if not req.get("stream"):
+            self._send("chat", 200, {
+                "id": "chatcmpl-stub", "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": i, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": " ".join(words)}} for i in range(n)],
+                "usage": usage})
+            return
+
+        def event(delta: dict, finish=None, **extra) -> bytes:
+            chunk = {"id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": created, "model": model,
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": finish}], **extra}
+            return b"data: " + json.dumps(chunk).encode() + b"\n\n"
+
+        self._start_chunked("text/event-stream")
+        self._write_chunk("chat", event({"role": "assistant", "content": ""}))
+        for i, word in enumerate(words):
+            time.sleep(self.cfg.stream_interval)
+            self._write_chunk("chat", event({"content": word if i == 0 else " " + word}))
+        self._write_chunk("chat", event({}, "stop"))
+        if (req.get("stream_options") or {}).get("include_usage"):
+            self._write_chunk("chat", b"data: " + json.dumps({
+                "id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [], "usage": usage}).encode() + b"\n\n")
+        self._write_chunk("chat", b"data: [DONE]\n\n")
+        self._end_chunked()
+
+    def images(self, body: bytes):
+        import base64
+        req = json.loads(body or b"{}")
+        w, h = parse_size(req.get("size"))
+        png = self.server.image(w, h)
+        n = req.get("n") or 1
+        self._send("images", 200, {
+            "created": int(time.time()),
+            "data": [{"b64_json": base64.b64encode(png).decode("ascii")} for _ in range(n)],
+            "usage": {"input_tokens": max(1, len(req.get("prompt", "")) // 4), "output_tokens": 1056 * n,
+                      "total_tokens": max(1, len(req.get("prompt", "")) // 4) + 1056 * n,
+                      "input_tokens_details": {"image_tokens": 0, "text_tokens": len(req.get("prompt", "")) // 4}}})
+
+    def transcriptions(self, body: bytes):
+        # multipart: riittää tunnistaa response_format-kenttä
+        m = re.search(rb'name="response_format"\r\n\r\n([a-z_]+)', body)
+        fmt = m.group(1).decode() if m else "json"
+        if fmt in ("text", "srt", "vtt"):
+            return self._send("transcriptions", 200, self.cfg.transcript.encode(), "text/plain; charset=utf-8")
+        self._send("transcriptions", 200, {"text": self.cfg.transcript})
+
+    def speech(self, body: bytes):
+        req = json.loads(body or b"{}")
+        seconds = max(0.5, len(req.get("input", "")) / self.cfg.speech_cps)
+        pcm = self.server.tone(seconds)
+        fmt = req.get("response_format", "mp3")
+        # muut formaatit (mp3/opus/aac/flac) palautetaan WAVina: sisältö ei ole testien kohde, koko on
+        payload = pcm if fmt == "pcm" else wav_header(len(pcm)) + pcm
+        self._start_chunked("audio/pcm" if fmt == "pcm" else "audio/wav")
+        step = TTS_SR // 10 * 2   # 100 ms ääntä per pala
+        for i in range(0, len(payload), step):
+            if i:
+                time.sleep(self.cfg.stream_interval)
+            self._write_chunk("speech", payload[i:i + step])
+        self._end_chunked()
+
+    def pollinations(self, prompt: str, query: dict):
+        self.server.stats.add("pollinations", requests=1)
+        if self._delay_or_fail("pollinations"):
+            return
+        w = int(query.get("width", ["1024"])[0])
+        h = int(query.get("height", ["1024"])[0])
+        self._send("pollinations", 200, self.server.image(w, h), "image/png")
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, config: StubConfig):
+        super().__init__(address, StubHandler)
+        self.config = config
+        self.stats = Stats()
+        self._seed = random.Random(config.seed)
+        self._seed_lock = threading.Lock()
+        self._images: Dict[Tuple[int, int], bytes] = {}
+        self._tones: Dict[int, bytes] = {}
+        self._cache_lock = threading.Lock()
+
+    def rng(self) -> random.Random:
+        """Säiekohtainen satunnaislähde, johdettu --seedistä (toistettavat viiveet/virheet)."""
+        with self._seed_lock:
+            return random.Random(self._seed.random())
+
+    def image(self, w: int, h: int) -> bytes:
+        s = self.config.image_scale
+        key = (max(1, round(w * s)), max(1, round(h * s)))
+        with self._cache_lock:
+            if key not in self._images:
+                self._images[key] = make_png(*key, random.Random(0))
+            return self._images[key]
+
+    def tone(self, seconds: float) -> bytes:
+        key = round(seconds * 10)   # 100 ms tarkkuus
+        with self._cache_lock:
+            if key not in self._tones:
+                self._tones[key] = tone_pcm(key / 10)
+            return self._tones[key]
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+def start_stub(config: StubConfig, host: str = "127.0.0.1", port: int = 0) -> StubServer:
+    """Käynnistä tynkä taustasäikeeseen (port 0 = vapaa portti); pysäytys: server.shutdown()."""
+    server = StubServer((host, port), config)
+    threading.Thread(target=server.serve_forever, name="ai-stub", daemon=True).start()
+    return server
+
+# ---------- CLI ----------
+
+def add_stub_args(ap: argparse.ArgumentParser):
+    ap.add_argument("--latency", action="append", default=[], metavar="[ENDPOINT=]DIST",
+                    help=f"Viivejakauma ms (toistettava); endpointit: {', '.join(ENDPOINTS)}")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="Injektoitujen virheiden osuus (0..1)")
+    ap.add_argument("--error-status", default="429,500", help="Virhekoodit pilkuilla (esim. 429,500,503)")
+    ap.add_argument("--retry-after", type=float, default=0.5, help="429-vastausten Retry-After (s)")
+    ap.add_argument("--completion-tokens", type=int, default=120, help="Chat-vastauksen pituus (tokenia)")
+    ap.add_argument("--stream-interval-ms", type=float, default=5.0, help="SSE-/TTS-palojen väli (ms)")
+    ap.add_argument("--image-scale", type=float, default=1.0, help="Kuvan sivun kerroin (payloadin koko)")
+    ap.add_argument("--transcript", default=StubConfig.transcript, help="Transkription teksti")
+    ap.add_argument("--speech-cps", type=float, default=15.0, help="TTS: merkkiä per sekunti ääntä")
+    ap.add_argument("--seed", type=int, default=None, help="Satunnaissiemen (viiveet ja virheet)")
+
+def config_from_args(args) -> StubConfig:
+    return StubConfig(latency=parse_latency_args(args.latency), error_rate=args.error_rate,
+                      error_status=tuple(int(s) for s in args.error_status.split(",") if s),
+                      retry_after=args.retry_after, completion_tokens=args.completion_tokens,
+                      stream_interval=args.stream_interval_ms / 1000.0, image_scale=args.image_scale,
+                      transcript=args.transcript, speech_cps=args.speech_cps, seed=args.seed)
+
+def stub_argv(args) -> list:
+    """add_stub_args-arvot takaisin komentoriviksi (tyngän ajo omana prosessinaan)."""
+    argv = [x for spec in args.latency for x in ("--latency", spec)]
+    for name in ("error_rate", "error_status", "retry_after", "completion_tokens", "stream_interval_ms",
+                 "image_scale", "transcript", "speech_cps", "seed"):
+        value = getattr(args, name)
+        if value is not None:
+            argv += ["--" + name.replace("_", "-"), str(value)]
+    return argv
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Paikallinen OpenAI/Pollinations-tynkä suorituskykytesteihin")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8799, help="0 = vapaa portti (osoite tulostetaan stdoutiin)")
+    add_stub_args(ap)
+    args = ap.parse_args()
+    try:
+        config = config_from_args(args)
+    except ValueError as e:
+        ap.error(str(e))
+    server = StubServer((args.host, args.port), config)
+    print(f"ai-stub listening on {server.base_url}  (OPENAI_BASE_URL={server.base_url}/v1, "
+          f"POLLINATIONS_BASE={server.base_url})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+e2e_bench.py — päästä päähän -läpäisybenchmark CLI-skripteille paikallista tynkää vasten
+
+Käynnistää tools/ai_stub.py:n omaksi prosessikseen (tai käyttää --stub-urlia), ajaa jokaisen
+entry pointin oikeana aliprosessina (OPENAI_BASE_URL / POLLINATIONS_BASE → tynkä) eri
+rinnakkaisuustasoilla ja mittaa:
+  - seinäkelloajan ja läpäisyn (ajoa / s) per taso
+  - yksittäisen ajon keston p50/p95/max
+  - aliprosessin huippumuistin (ru_maxrss, MB; suurin prosessi puussa). Linux perii exec-hetkellä
+    vanhemman RSS:n lattiaksi, joten benchmark pidetään kevyenä ja tynkä ajetaan erillään.
+  - tyngän näkemät API-pyynnöt, virheet ja tavut per ajo (sisältää uusinnat)
+
+Fixturet (teksti, PNG, puhe-WAV) generoidaan stdlibillä; mitään ei lähetetä verkkoon.
+
+Käyttö:
+  python tools/e2e_bench.py                                  # kaikki skenaariot, tasot 1 ja 4
+  python tools/e2e_bench.py --only creative mux --concurrency 1 2 8 --runs 8
+  python tools/e2e_bench.py --latency chat=lognormal:400:0.5 --latency images=2000 --error-rate 0.05
+  python tools/e2e_bench.py --json bench/e2e_new.json
+  python tools/e2e_bench.py --compare bench/e2e_old.json bench/e2e_new.json --threshold 0.2
+
+Exit code 1, jos ajoja epäonnistui tai --compare löytää regression.
+"""
+
+import argparse, json, math, os, platform, random, statistics, struct, subprocess, sys, tempfile, time, wave
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from ai_stub import add_stub_args, config_from_args, make_png, stub_argv  # noqa: E402
+
+# skenaario → (skripti, argumentit); {fixtures} ja {out} korvataan ajokohtaisesti, cwd = {out}
+SCENARIOS = {
+    "creative": ("Assignment_3_CreativeWriterCLI/creative_cli.py",
+                 ["--prompt", "Autumn harvest at a small family farm", "--n", "3"]),
+    "mux": ("Assignment_4/mux_cli.py",
+            ["-i", "{fixtures}/source.txt", "-q", "What does the farm sell?", "-o", "{out}/summary.md"]),
+    "img2txt2img": ("Assignment_5/img2txt2img.py", ["--image", "{fixtures}/input.png", "--outdir", "{out}"]),
+    "img2txt2img_pollinations": ("Assignment_5/img2txt2img.py",
+                                 ["--image", "{fixtures}/input.png", "--outdir", "{out}", "--pollinations"]),
+    "imggen_pollinations": ("assignment_6/imggen_cli.py",
+                            ["--prompt", "red barn in snow", "--n", "2", "--outdir", "{out}"]),
+    "imggen_openai": ("assignment_6/imggen_cli.py",
+                      ["--backend", "openai", "--prompt", "red barn in snow", "--n", "2", "--outdir", "{out}"]),
+    "imggen_postprocess": ("assignment_6/imggen_cli.py",
+                           ["--prompt", "red barn in snow", "--n", "2", "--outdir", "{out}", "--postprocess"]),
+    "voice_interpreter": ("assignment_7/voice_interpreter.py",
+                          ["--input", "{fixtures}/speech.wav", "--tgt-lang", "fr", "--outdir", "{out}"]),
+    "voice_fanout": ("assignment_7/voice_interpreter.py",
+                     ["--input", "{fixtures}/speech.wav", "--tgt-lang", "fr,de,sv", "--outdir", "{out}"]),
+    "voice_imggen": ("assignment_8/voice_imggen.py",
+                     ["--input", "{fixtures}/speech.wav", "--n", "2", "--outdir", "{out}"]),
+}
+
+# vertailtavat mittarit: (avain, suurempi on huonompi)
+COMPARE_METRICS = (("p50_s", True), ("throughput", False), ("rss_peak_mb", True))
+
+# ---------- fixturet ----------
+
+def write_fixtures(root: Path) -> Path:
+    root.mkdir(parents=True, exist_ok=True)
+    (root / "source.txt").write_text(
+        "Our family farm sells organic potatoes, carrots, free-range eggs and honey.\n" * 60, encoding="utf-8")
+    (root / "input.png").write_bytes(make_png(512, 512, random.Random(1)))
+    # ~3 s "puhetta": moduloitu siniääni 16 kHz monona, ylittää VAD-kynnyksen
+    sr, seconds = 16000, 3.0
+    envelope = lambda i: 0.6 + 0.4 * math.sin(2 * math.pi * 3 * i / sr)
+    frames = b"".join(struct.pack("<h", int(12000 * envelope(i) * math.sin(2 * math.pi * 180 * i / sr)))
+                      for i in range(int(sr * seconds)))
+    with wave.open(str(root / "speech.wav"), "wb") as w:
+        w.setnchannels(1); w.setsampwidth(2); w.setframerate(sr)
+        w.writeframes(frames)
+    return root
+
+# ---------- ajot ----------
+
+def run_once(script: Path, argv: list, out: Path, env: dict, timeout: float) -> dict:
+    """Yksi aliprosessiajo: kesto, paluukoodi ja huippumuisti (os.wait4 → ru_maxrss)."""
+    out.mkdir(parents=True, exist_ok=True)
+    with open(out / "stdout.log", "wb") as so, open(out / "stderr.log", "wb") as se:
+        t0 = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, str(script), *argv], cwd=out, env=env,
+                                stdin=subprocess.DEVNULL, stdout=so, stderr=se)
+        rss_mb = None
+        if hasattr(os, "wait4"):
+            deadline = t0 + timeout
+            while True:
+                pid, status, usage = os.wait4(proc.pid, os.WNOHANG)
+                if pid:
+                    proc.returncode = os.waitstatus_to_exitcode(status)
+                    # Linux: kilotavuja, macOS: tavuja
+                    rss_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+                    break
+                if time.perf_counter() > deadline:
+                    proc.kill(); proc.wait()
+                    break
+                time.sleep(0.005)
+        else:
+            try:
+                proc.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                proc.kill(); proc.wait()
+        seconds = time.perf_counter() - t0
+    return {"rc": proc.returncode, "seconds": seconds, "rss_mb": rss_mb, "out": str(out)}
+
+def launch_stub(args) -> tuple:
+    """Tynkä omaksi prosessikseen vapaaseen porttiin; palauttaa (Popen, base_url)."""
+    proc = subprocess.Popen([sys.executable, str(Path(__file__).resolve().parent / "ai_stub.py"),
+                             "--port", "0", *stub_argv(args)], stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()   # "ai-stub listening on http://127.0.0.1:PORT ..."
+    if not line.startswith("ai-stub listening on "):
+        proc.kill()
+        raise SystemExit(f"ai_stub failed to start: {line.strip()}")
+    return proc, line.split()[3]
+
+def stub_stats(base_url: str) -> dict:
+    from urllib.request import urlopen
+    with urlopen(f"{base_url}/__stats", timeout=10) as r:
+        return json.loads(r.read())["total"]
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))]
+
+def run_level(name: str, concurrency: int, runs: int, work: Path, fixtures: Path, env: dict,
+              base_url: str, timeout: float) -> dict:
+    script_rel, template = SCENARIOS[name]
+    script = REPO_ROOT / script_rel
+
+    def one(i: int) -> dict:
+        out = work / name / f"c{concurrency}" / f"run{i:03d}"
+        argv = [a.format(fixtures=fixtures, out=out) for a in template]
+        return run_once(script, argv, out, env, timeout)
+
+    before = stub_stats(base_url)
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(runs)))
+    wall = time.perf_counter() - t0
+    after = stub_stats(base_url)
+
+    ok = [r for r in results if r["rc"] == 0]
+    times = [r["seconds"] for r in ok]
+    rss = [r["rss_mb"] for r in results if r["rss_mb"] is not None]
+    api = {k: after[k] - before[k] for k in after}
+    return {
+        "scenario": name, "concurrency": concurrency, "runs": runs, "ok": len(ok),
+        "failed": [r["out"] for r in results if r["rc"] != 0],
+        "wall_s": round(wall, 3),
+        "throughput": round(len(ok) / wall, 3) if wall else None,
+        "p50_s": round(statistics.median(times), 3) if times else None,
+        "p95_s": round(percentile(times, 95), 3) if times else None,
+        "max_s": round(max(times), 3) if times else None,
+        "rss_peak_mb": round(max(rss), 1) if rss else None,
+        "rss_mean_mb": round(statistics.mean(rss), 1) if rss else None,
+        "api_requests_per_run": round(api["requests"] / runs, 2),
+        "api_errors": api["errors"],
+        "api_mb_out_per_run": round(api["bytes_out"] / runs / 1e6, 3),
+    }
+
+# ---------- raportointi ----------
+
+def print_table(rows: list):
+    print(f"{'scenario':<26} {'conc':>4} {'ok':>5} {'wall s':>7} {'runs/s':>7} {'p50 s':>7} {'p95 s':>7} "
+          f"{'RSS MB':>7} {'req/run':>7} {'err':>4} {'MB/run':>7}")
+    for r in rows:
+        fmt = lambda v, spec: format(v, spec) if v is not None else "-"
+        print(f"{r['scenario']:<26} {r['concurrency']:>4} {r['ok']:>2}/{r['runs']:<2} {r['wall_s']:>7.2f} "
+              f"{fmt(r['throughput'], '>7.2f')} {fmt(r['p50_s'], '>7.2f')} {fmt(r['p95_s'], '>7.2f')} "
+              f"{fmt(r['rss_peak_mb'], '>7.1f')} {r['api_requests_per_run']:>7.2f} {r['api_errors']:>4} "
+              f"{r['api_mb_out_per_run']:>7.2f}")
+
+def compare(old_path: Path, new_path: Path, threshold: float) -> int:
+    """Vertaa kahta tulos-JSONia (skenaario + rinnakkaisuus); 1 jos jokin mittari huononi yli kynnyksen."""
+    def index(path: Path) -> dict:
+        return {(r["scenario"], r["concurrency"]): r
+                for r in json.loads(path.read_text(encoding="utf-8"))["results"]}
+    old, new = index(old_path), index(new_path)
+    regressions = 0
+    print(f"{'scenario':<26} {'conc':>4} {'metric':<12} {'old':>8} {'new':>8} {'Δ%':>7}")
+    for key in sorted(set(old) & set(new)):
+        for metric, higher_is_worse in COMPARE_METRICS:
+            a, b = old[key].get(metric), new[key].get(metric)
+            if not a or b is None:
+                continue
+            delta = (b - a) / a
+            worse = delta > threshold if higher_is_worse else delta < -threshold
+            flag = "  REGRESSION" if worse else ""
+            regressions += bool(flag)
+            print(f"{key[0]:<26} {key[1]:>4} {metric:<12} {a:>8.3f} {b:>8.3f} {delta * 100:>6.1f}%{flag}")
+    print(f"{regressions} regression(s) over {threshold * 100:.0f}%")
+    return 1 if regressions else 0
+
+# ---------- main ----------
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1],
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--only", nargs="+", choices=list(SCENARIOS), default=None, help="Vain nämä skenaariot")
+    ap.add_argument("--concurrency", nargs="+", type=int, default=[1, 4], help="Rinnakkaiset prosessit (tasot)")
+    ap.add_argument("--runs", type=int, default=4, help="Ajoja per taso (vähintään tason rinnakkaisuus)")
+    ap.add_argument("--warmup", type=int, default=1, help="Lämmittelyajot per skenaario (ei tilastoihin)")
+    ap.add_argument("--timeout", type=float, default=300.0, help="Yksittäisen ajon aikaraja (s)")
+    ap.add_argument("--workdir", default=None, help="Ajojen tulostekansio (oletus: väliaikainen, poistetaan)")
+    ap.add_argument("--stub-url", default=None, help="Käytä jo käynnissä olevaa tynkää (esim. http://127.0.0.1:8799)")
+    ap.add_argument("--json", default=None, help="Kirjoita tulokset JSON-tiedostoon")
+    ap.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Vertaa kahta tulos-JSONia")
+    ap.add_argument("--threshold", type=float, default=0.20, help="Regressiokynnys (0.20 = 20 %%)")
+    add_stub_args(ap)
+    args = ap.parse_args()
+
+    if args.compare:
+        return compare(Path(args.compare[0]), Path(args.compare[1]), args.threshold)
+
+    try:
+        config_from_args(args)   # virheelliset tynkäasetukset kiinni ennen käynnistystä
+    except ValueError as e:
+        ap.error(str(e))
+    stub = None
+    if args.stub_url:
+        base_url = args.stub_url.rstrip("/")
+    else:
+        stub, base_url = launch_stub(args)
+
+    tmp = None
+    if args.workdir:
+        work = Path(args.workdir).resolve()
+    else:
+        tmp = tempfile.TemporaryDirectory(prefix="e2e_bench_")
+        work = Path(tmp.name)
+    fixtures = write_fixtures(work / "fixtures")
+    # oikea avain korvataan: mikään ajo ei saa päätyä maksulliseen API:in
+    env = {**os.environ, "OPENAI_BASE_URL": f"{base_url}/v1", "OPENAI_API_KEY": "local-stub",
+           "POLLINATIONS_BASE": base_url, "PYTHONDONTWRITEBYTECODE": "1"}
+
+    names = args.only or list(SCENARIOS)
+    print(f"stub: {base_url}  scenarios: {len(names)}  concurrency: {args.concurrency}  workdir: {work}",
+          file=sys.stderr)
+    rows = []
+    try:
+        for name in names:
+            for i in range(args.warmup):
+                run_once(REPO_ROOT / SCENARIOS[name][0],
+                         [a.format(fixtures=fixtures, out=work / name / f"warmup{i}") for a in SCENARIOS[name][1]],
+                         work / name / f"warmup{i}", env, args.timeout)
+            for level in args.concurrency:
+                row = run_level(name, level, max(args.runs, level), work, fixtures, env, base_url, args.timeout)
+                rows.append(row)
+                print(f"[e2e] {name} c={level}: {row['ok']}/{row['runs']} ok, {row['wall_s']:.2f} s", file=sys.stderr)
+    finally:
+        if stub is not None:
+            stub.terminate(); stub.wait()
+
+    print()
+    print_table(rows)
+    failed = [path for r in rows for path in r["failed"]]
+    if failed:
+        print(f"\n{len(failed)} failed run(s); logs: {', '.join(failed[:3])}" + (" …" if len(failed) > 3 else ""))
+        if tmp is not None:
+            print("(tmp workdir removed; use --workdir to keep logs)")
+
+    if args.json:
+        meta = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                "platform": platform.platform(), "cpus": os.cpu_count(), "stub_url": args.stub_url,
+                "runs": args.runs, "warmup": args.warmup,
+                "stub": {k: getattr(args, k) for k in ("latency", "error_rate", "error_status", "retry_after",
+                                                       "completion_tokens", "stream_interval_ms", "image_scale",
+                                                       "speech_cps", "seed")}}
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.json).write_text(json.dumps({"meta": meta, "results": rows}, indent=2), encoding="utf-8")
+        print(f"\nwrote {args.json}")
+    if tmp is not None:
+        tmp.cleanup()
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
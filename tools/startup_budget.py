@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+startup_budget.py — käynnistysajan regressiotarkistus CLI-skripteille
+
+Ajaa jokaisen entry pointin `python -X importtime <script> --help` -komennolla ja
+tarkistaa, että
+  1) raskaita riippuvuuksia (openai, numpy, PIL, bs4, ...) ei tuoda --help-polulla
+  2) importtien kumulatiivinen aika pysyy budjetissa (ms); tulkin oma käynnistys
+     (`python -X importtime -c pass`, esim. site/.pth-tiedostot) vähennetään
+
+Käyttö:
+  python tools/startup_budget.py              # kaikki skriptit, skriptikohtaiset budjetit
+  python tools/startup_budget.py --budget-ms 80 --runs 5   # sama budjetti kaikille
+  python tools/startup_budget.py --only voice_interpreter
+
+Exit code 1, jos jokin skripti ylittää budjetin tai tuo kielletyn moduulin.
+"""
+
+import argparse, re, statistics, subprocess, sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+# skripti → (importbudjetti ms, moduulit joita ei saa ladata pelkässä --help-ajossa)
+# budjetit ~2x mitattu taso, vähintään 30 ms (mittauskohina)
+# aiclient.client (asyncio, httpx, openai) ladataan vasta kun asiakas luodaan
+ENTRY_POINTS = {
+    "Assignment_3_CreativeWriterCLI/creative_cli.py": (30, ["openai", "asyncio", "aiclient.client"]),
+    "Assignment_4/mux_cli.py": (30, ["openai", "requests", "bs4", "docx", "pypdf", "asyncio", "aiclient.client"]),
+    "Assignment_5/img2txt2img.py": (40, ["openai", "requests", "PIL", "asyncio", "aiclient.client"]),
+    "assignment_6/imggen_cli.py": (40, ["openai", "requests", "numpy", "PIL", "asyncio", "aiclient.client"]),
+    "assignment_7/voice_interpreter.py": (40, ["openai", "numpy", "sounddevice", "scipy", "soundfile", "httpx",
+                                               "asyncio", "aiclient.client"]),
+    "assignment_8/voice_imggen.py": (50, ["openai", "requests", "numpy", "sounddevice", "scipy", "soundfile",
+                                          "asyncio", "aiclient.client"]),
+}
+
+# "import time:       123 |        456 |   package.sub"
+LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)$")
+
+def parse_importtime(stderr: str) -> tuple[float, set]:
+    total_us, modules = 0, set()
+    for line in stderr.splitlines():
+        m = LINE_RE.match(line)
+        if not m:
+            continue
+        modules.add(m.group(4))
+        if len(m.group(3)) == 1:   # ylimmän tason import → kumulatiivinen sisältää alimoduulit
+            total_us += int(m.group(2))
+    return total_us / 1000.0, modules
+
+def measure(script: Path) -> tuple[float, set]:
+    """Yksi ajo: palauttaa (importtien kokonaisaika ms, ladatut moduulit)."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", str(script), "--help"],
+                          capture_output=True, text=True, cwd=script.parent)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{script.name} --help failed (rc={proc.returncode}):\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr)
+
+def baseline_ms(runs: int) -> float:
+    """Tyhjän tulkin importtiaika (site, .pth-hookit), jota skripti ei voi itse vähentää."""
+    times = []
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "pass"], capture_output=True, text=True)
+        times.append(parse_importtime(proc.stderr)[0])
+    return statistics.median(times)
+
+def check(script_rel: str, forbidden: list, budget_ms: float, runs: int, base_ms: float) -> bool:
+    script = REPO_ROOT / script_rel
+    times, modules = [], set()
+    for _ in range(runs):
+        ms, mods = measure(script)
+        times.append(ms); modules |= mods
+    median = max(0.0, statistics.median(times) - base_ms)
+    leaked = sorted(f for f in forbidden if f in modules)
+    ok = median <= budget_ms and not leaked
+    status = "OK  " if ok else "FAIL"
+    print(f"{status} {script_rel:50s} imports {median:6.1f} ms (budget {budget_ms:.0f} ms)"
+          + (f"  leaked: {', '.join(leaked)}" if leaked else ""))
+    return ok
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Startup/import-time budget check for the CLI scripts")
+    ap.add_argument("--budget-ms", type=float, default=None, help="Ohita skriptikohtaiset budjetit (ms)")
+    ap.add_argument("--runs", type=int, default=3, help="Ajoja per skripti (mediaani)")
+    ap.add_argument("--only", default=None, help="Aja vain skriptit, joiden polku sisältää tämän")
+    args = ap.parse_args()
+
+    runs = max(1, args.runs)
+    base = baseline_ms(runs)
+    print(f"interpreter baseline {base:.1f} ms (vähennetty)")
+    results = [check(rel, forbidden, args.budget_ms or budget, runs, base)
+               for rel, (budget, forbidden) in ENTRY_POINTS.items()
+               if not args.only or args.only in rel]
+    if not results:
+        print("Ei skriptejä valittuna.", file=sys.stderr)
+        return 2
+    return 0 if all(results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
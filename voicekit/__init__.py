@@ -0,0 +1,11 @@
+"""
+voicekit — puheskriptien (assignment_7 voice_interpreter, assignment_8 voice_imggen) yhteiset osat
+
+- audio: numpyn lazy-lataus, VAD (energia + ZCR, hystereesi), hiljaisuuden tunnistus,
+  nauhoituspuskuri ja STT-uploadin dekoodaus/pakkaus/pilkonta
+- stt: whisper-1-transkriptio ja SQLite-transkriptiovälimuisti
+- bench: bench-alikomennon fixturet, tilastot, tulostiedostot ja vertailu
+
+Skriptit lisäävät repon juuren sys.pathiin (kuten aiclientille) ja tuovat alimoduuleista;
+alimoduulit tuovat moduulitasolla vain standardikirjastoa, numpy ladataan vasta käytössä.
+"""
@@ -0,0 +1,315 @@
+"""Äänen käsittely: lazy numpy, VAD (energia + ZCR, hystereesi), nauhoitus ja STT-upload-koodaus."""
+
+from __future__ import annotations
+
+import select
+import sys
+from pathlib import Path
+
+
+def lazy_import(name: str):
+    """Moduuli, joka ladataan vasta ensimmäisellä attribuuttiviittauksella (nopea --help / --input)."""
+    if name in sys.modules:
+        return sys.modules[name]
+    import importlib.util
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+np = lazy_import("numpy")
+
+
+def wav_write(path, sr: int, data):
+    from scipy.io.wavfile import write
+    write(path, sr, data)
+
+
+# ---------- VAD (energia + ZCR, hystereesi) ----------
+
+VAD_FRAME_MS = 30
+
+
+def frame_features(audio: np.ndarray, sr: int, frame_ms: int = VAD_FRAME_MS):
+    """Kehyskohtainen energia (dBFS) ja nollanylitystiheys, vektoroituna."""
+    n = max(1, sr * frame_ms // 1000)
+    k = len(audio) // n
+    frames = np.asarray(audio[:k * n], dtype=np.float32).reshape(k, n)
+    energy_db = 10.0 * np.log10(np.mean(np.square(frames), axis=1) + 1e-10)
+    zcr = np.mean(np.signbit(frames[:, 1:]) != np.signbit(frames[:, :-1]), axis=1)
+    return energy_db, zcr
+
+
+def vad_thresholds(noise_db: float, hi_margin: float = 12.0, lo_margin: float = 6.0):
+    # absoluuttinen lattia, ettei hiljainen huone laukaise puhetta kohinasta
+    return max(noise_db + hi_margin, -45.0), max(noise_db + lo_margin, -52.0)
+
+
+def vad_mask(audio: np.ndarray, sr: int, frame_ms: int = VAD_FRAME_MS, hang_ms: int = 200) -> np.ndarray:
+    """
+    Puhe-/hiljaisuusmaski kehyksille. Hystereesi: yhtenäinen "matalan kynnyksen" jakso on puhetta
+    vain jos siinä on vähintään yksi korkean kynnyksen kehys. Korkea ZCR hyväksyy hiljaiset
+    frikatiivit (s, f) matalan kynnyksen alta.
+    """
+    energy, zcr = frame_features(audio, sr, frame_ms)
+    if len(energy) == 0:
+        return np.zeros(0, dtype=bool)
+    hi, lo = vad_thresholds(float(np.percentile(energy, 10)))
+    active = (energy > lo) | ((energy > lo - 6.0) & (zcr > 0.25))
+    strong = energy > hi
+    # aktiivisten jaksojen tunnisteet → jakso puhetta jos sisältää strong-kehyksen
+    run_id = np.cumsum(np.diff(np.concatenate(([0], active.astype(np.int8)))) == 1) * active
+    has_strong = np.bincount(run_id, weights=strong & active, minlength=run_id.max() + 1) > 0
+    has_strong[0] = False
+    mask = has_strong[run_id]
+    hang = max(0, hang_ms // frame_ms)
+    if hang and mask.any():
+        mask = np.convolve(mask, np.ones(2 * hang + 1), mode="same") > 0
+    return mask
+
+
+def trim_silence(audio: np.ndarray, sr: int, pad_ms: int = 150) -> np.ndarray:
+    """Leikkaa alun ja lopun hiljaisuuden. Jos puhetta ei löydy, palauttaa äänen ennallaan."""
+    flat = audio.reshape(-1)
+    mask = vad_mask(flat, sr)
+    idx = np.flatnonzero(mask)
+    if idx.size == 0:
+        return audio
+    n = sr * VAD_FRAME_MS // 1000
+    pad = sr * pad_ms // 1000
+    start = max(0, idx[0] * n - pad)
+    end = min(len(flat), (idx[-1] + 1) * n + pad)
+    return audio[start:end]
+
+
+class SilenceEndpointer:
+    """Press-enter -tilan automaattinen lopetus: True kun puheen jälkeen on ollut `silence_ms` hiljaisuutta."""
+
+    def __init__(self, sr: int, silence_ms: int):
+        self.sr = sr
+        self.limit = sr * silence_ms // 1000
+        self.noise_db = -60.0   # tyypillinen mikrofonin pohjakohina; adaptoituu alla
+        self.heard_speech = False
+        self.silent = 0
+
+    def feed(self, block: np.ndarray) -> bool:
+        if self.limit <= 0 or len(block) == 0:
+            return False
+        energy, _ = frame_features(block.reshape(-1), self.sr)
+        if len(energy) == 0:
+            return False
+        floor = float(energy.min())
+        # laskee heti, nousee hitaasti → puhe alussa ei nosta kohinatasoa puheen tasolle
+        self.noise_db = floor if floor < self.noise_db else self.noise_db + 0.02 * (floor - self.noise_db)
+        hi, lo = vad_thresholds(self.noise_db)
+        if (energy > hi).any():
+            self.heard_speech = True
+            self.silent = 0
+        elif self.heard_speech and (energy < lo).all():
+            self.silent += len(block)
+        else:
+            self.silent = 0
+        return self.heard_speech and self.silent >= self.limit
+
+
+# ---------- Recording ----------
+
+class RecordingBuffer:
+    """
+    Esivaraattu float32-puskuri nauhoitukselle. Kasvaa tuplaamalla, joten pitkäkään sanelu ei
+    rakenna tuhansia pieniä taulukoita eikä vaadi np.concatenatea lopussa.
+    """
+
+    def __init__(self, sr: int, initial_s: float = 30.0):
+        self.data = np.empty(int(sr * initial_s), dtype=np.float32)
+        self.n = 0
+
+    def append(self, block: np.ndarray):
+        end = self.n + len(block)
+        if end > len(self.data):
+            grown = np.empty(max(end, 2 * len(self.data)), dtype=np.float32)
+            grown[:self.n] = self.data[:self.n]
+            self.data = grown
+        self.data[self.n:end] = block
+        self.n = end
+
+    def view(self) -> np.ndarray:
+        return self.data[:self.n].reshape(-1, 1)
+
+
+class UtteranceSegmenter:
+    """
+    Jatkuvan mikrofonivirran pilkkominen lausumiksi (yksi InputStream koko istunnolle).
+    SilenceEndpointer päättää lausuman tauon kohdalla; ennen puhetta pidetään vain lyhyt esirulla.
+    feed() palauttaa valmiin lausuman (float32 mono) tai None; `tail` on palautetun lausuman
+    lopun hiljaisuus näytteinä (puheen loppuhetki = nyt - tail / sr). Alle min_speech_ms
+    puhetta sisältävät lausumat (naksahdukset, yskäisyt) hylätään.
+    """
+
+    def __init__(self, sr: int, silence_ms: int, preroll_ms: int = 300, max_s: float = 30.0,
+                 min_speech_ms: int = 0):
+        self.sr = sr
+        self.silence_ms = silence_ms
+        self.preroll = max(1, sr * preroll_ms // 1000)
+        self.max_len = int(sr * max_s)
+        self.min_speech = sr * min_speech_ms // 1000
+        self.buf = RecordingBuffer(sr, initial_s=max_s)
+        self.endpointer = SilenceEndpointer(sr, silence_ms)
+        self.lead = 0   # esirullan pituus puheen alkaessa
+        self.tail = 0
+
+    def feed(self, block: np.ndarray):
+        self.buf.append(block)
+        heard = self.endpointer.heard_speech
+        ended = self.endpointer.feed(block)
+        if not self.endpointer.heard_speech:
+            if self.buf.n > 2 * self.preroll:
+                self.buf.data[:self.preroll] = self.buf.data[self.buf.n - self.preroll:self.buf.n].copy()
+                self.buf.n = self.preroll
+            return None
+        if not heard:
+            self.lead = self.buf.n - len(block)
+        if not ended and self.buf.n < self.max_len:
+            return None
+        return self._close(self.endpointer.silent if ended else 0)
+
+    def flush(self):
+        """Keskeneräinen lausuma virran loputtua (tai None)."""
+        if not self.endpointer.heard_speech:
+            return None
+        return self._close(self.endpointer.silent)
+
+    def _close(self, tail: int):
+        audio = self.buf.data[:self.buf.n].copy()
+        speech = self.buf.n - self.lead - tail
+        # seuraava lausuma: sama puskuri ja opittu kohinataso
+        noise_db = self.endpointer.noise_db
+        self.endpointer = SilenceEndpointer(self.sr, self.silence_ms)
+        self.endpointer.noise_db = noise_db
+        self.buf.n = 0
+        self.tail = tail
+        return audio if speech >= self.min_speech else None
+
+
+def record_until_stopped(sr: int, auto_stop_ms: int = 0) -> np.ndarray:
+    """Callback-InputStream kirjoittaa puskuriin; ENTER tai hiljaisuus asettaa stop-eventin."""
+    import threading
+    import sounddevice as sd
+    buf = RecordingBuffer(sr)
+    endpointer = SilenceEndpointer(sr, auto_stop_ms)
+    stop = threading.Event()
+    auto_stopped = threading.Event()
+
+    def callback(indata, frames, time_info, status):
+        if stop.is_set():
+            return
+        block = indata[:, 0]
+        buf.append(block)
+        if endpointer.feed(block):
+            auto_stopped.set(); stop.set()
+
+    with sd.InputStream(samplerate=sr, channels=1, dtype="float32", callback=callback):
+        wait_for_stop(stop)
+    if auto_stopped.is_set():
+        print(f"  (hiljaisuus {auto_stop_ms} ms → lopetetaan)")
+    return buf.view()
+
+
+def wait_for_stop(stop):
+    print("  Nauhoitus käynnissä… (ENTER lopettaa)")
+    try:
+        while not stop.is_set():
+            # odotetaan ENTERiä 100 ms jaksoissa, jotta auto-stop ehtii katkaista odotuksen
+            if sys.stdin in select.select([sys.stdin], [], [], 0.1)[0]:
+                sys.stdin.readline()
+                stop.set()
+    except KeyboardInterrupt:
+        stop.set()
+
+
+# ---------- STT-upload (16 kHz mono, pakkaus, pilkonta) ----------
+
+STT_SR = 16000
+STT_MAX_BYTES = 25 * 1024 * 1024   # whisper-1 upload-raja
+UPLOAD_FORMATS = {"flac": ("FLAC", "PCM_16", ".flac"), "opus": ("OGG", "OPUS", ".ogg"), "wav": (None, None, ".wav")}
+
+
+def read_audio_any(path: Path):
+    """Lukee äänen float32-muodossa (frames, channels). soundfile jos asennettu, muuten scipy (vain WAV)."""
+    try:
+        import soundfile as sf
+        data, rate = sf.read(str(path), dtype="float32", always_2d=True)
+        return data, rate
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    if path.suffix.lower() != ".wav":
+        return None
+    from scipy.io.wavfile import read as wav_read
+    rate, data = wav_read(str(path))
+    if np.issubdtype(data.dtype, np.integer):
+        data = data.astype(np.float32) / float(np.iinfo(data.dtype).max)
+    return data.astype(np.float32, copy=False).reshape(len(data), -1), rate
+
+
+def to_mono_16k(data: np.ndarray, rate: int, sr: int = STT_SR) -> np.ndarray:
+    from math import gcd
+    from scipy.signal import resample_poly
+    mono = data.mean(axis=1) if data.ndim > 1 else data
+    if rate != sr:
+        g = gcd(int(rate), sr)
+        mono = resample_poly(mono, sr // g, int(rate) // g)
+    return np.clip(mono, -1, 1).astype(np.float32)
+
+
+def encode_for_upload(audio: np.ndarray, sr: int, fmt: str = "flac"):
+    """Palauttaa (bytes, tiedostonimi). FLAC/Opus soundfilella, muuten 16-bit WAV."""
+    import io
+    container, subtype, ext = UPLOAD_FORMATS[fmt]
+    if container:
+        try:
+            import soundfile as sf
+            buf = io.BytesIO()
+            sf.write(buf, audio, sr, format=container, subtype=subtype)
+            return buf.getvalue(), f"audio{ext}"
+        except Exception:
+            pass  # ei soundfilea / ei codec-tukea → WAV
+    buf = io.BytesIO()
+    wav_write(buf, sr, np.int16(audio * 32767))
+    return buf.getvalue(), "audio.wav"
+
+
+def split_on_silence(audio: np.ndarray, sr: int, n_chunks: int, search_s: float = 10.0) -> list:
+    """Jakaa äänen n_chunks osaan; jokainen raja siirretään hiljaisimpaan kohtaan tavoitteen ympärillä."""
+    energy, _ = frame_features(audio, sr)
+    n = sr * VAD_FRAME_MS // 1000
+    # hakuikkuna enintään ±1/4 osan pituudesta → yksikään osa ei kasva yli 1.5× tavoitteen
+    win = min(int(search_s * 1000 / VAD_FRAME_MS), len(energy) // n_chunks // 4)
+    bounds = [0]
+    for k in range(1, n_chunks):
+        target = len(energy) * k // n_chunks
+        lo, hi = max(bounds[-1] // n + 1, target - win), min(len(energy), target + win)
+        cut = lo + int(np.argmin(energy[lo:hi])) if hi > lo else target
+        bounds.append(cut * n)
+    bounds.append(len(audio))
+    return [audio[a:b] for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def encode_chunks(audio: np.ndarray, sr: int, fmt: str = "flac", limit: int = STT_MAX_BYTES) -> list:
+    """
+    Pakkaa äänen upload-osiksi [(bytes, tiedostonimi)], joista jokainen mahtuu `limit`iin.
+    Liian iso osa pilkotaan hiljaisuuksista uudelleen (esim. WAV-fallback on FLACia isompi).
+    """
+    payload, name = encode_for_upload(audio, sr, fmt)
+    if len(payload) <= limit:
+        return [(payload, name)]
+    parts = split_on_silence(audio, sr, max(2, int(np.ceil(len(payload) * 1.5 / limit))))
+    if len(parts) < 2:
+        raise ValueError(f"äänen osaa ({len(payload) / 1e6:.1f} MB) ei voi pilkkoa upload-rajan alle")
+    return [chunk for part in parts for chunk in encode_chunks(part, sr, fmt, limit)]
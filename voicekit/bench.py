@@ -0,0 +1,87 @@
+"""bench-alikomennon yhteiset osat: fixturet, tilastot, tulostiedostot ja vertailu."""
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+from typing import Optional
+
+from aiclient import add_client_args
+
+from .audio import STT_SR, np, read_audio_any, to_mono_16k, trim_silence, wav_write
+
+
+def stage_summary(samples: list) -> dict:
+    if not samples:
+        return {"n": 0}
+    a = np.asarray(samples, dtype=np.float64)
+    p50, p90, p99 = np.percentile(a, [50, 90, 99])
+    return {"n": int(a.size), "mean": float(a.mean()), "p50": float(p50), "p90": float(p90),
+            "p99": float(p99), "min": float(a.min()), "max": float(a.max())}
+
+
+def write_bench_results(samples: dict, errors: dict, meta: dict, out_json: Path, out_csv: Optional[Path]):
+    import csv, json
+    stages = {name: stage_summary(vals) for name, vals in samples.items()}
+    out_json.parent.mkdir(parents=True, exist_ok=True)
+    out_json.write_text(json.dumps({"meta": meta, "stages": stages, "errors": errors, "samples": samples},
+                                   indent=2), encoding="utf-8")
+    if out_csv:
+        cols = ["n", "mean", "p50", "p90", "p99", "min", "max"]
+        with out_csv.open("w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["stage", *cols, "errors"])
+            for name, st in stages.items():
+                w.writerow([name, *[st.get(c, "") for c in cols], errors.get(name, 0)])
+    print(f"\n=== BENCH ({meta['iterations']} iter × {meta['fixtures']} fixtures, warm-up {meta['warmup']}) ===")
+    print(f"{'stage':<10} {'n':>4} {'p50':>7} {'p90':>7} {'p99':>7} {'mean':>7} {'err':>4}")
+    for name, st in stages.items():
+        if st["n"]:
+            print(f"{name:<10} {st['n']:>4} {st['p50']:>7.3f} {st['p90']:>7.3f} {st['p99']:>7.3f} "
+                  f"{st['mean']:>7.3f} {errors.get(name, 0):>4}")
+        elif errors.get(name):
+            print(f"{name:<10} {0:>4} {'-':>7} {'-':>7} {'-':>7} {'-':>7} {errors[name]:>4}")
+    print(f"saved: {out_json}" + (f", {out_csv}" if out_csv else ""))
+
+
+def compare_bench(old_path: Path, new_path: Path, threshold: float) -> int:
+    """Vertaa kahta tulostiedostoa; palauttaa 1 jos jonkin vaiheen p50/p90 huononi yli kynnyksen."""
+    import json
+    old = json.loads(old_path.read_text(encoding="utf-8"))["stages"]
+    new = json.loads(new_path.read_text(encoding="utf-8"))["stages"]
+    regressions = 0
+    print(f"{'stage':<10} {'metric':<5} {'old':>8} {'new':>8} {'Δ%':>7}")
+    for name in sorted(set(old) & set(new)):
+        for metric in ("p50", "p90"):
+            a, b = old[name].get(metric), new[name].get(metric)
+            if not a or b is None:
+                continue
+            delta = (b - a) / a
+            flag = "  REGRESSION" if delta > threshold else ""
+            regressions += bool(flag)
+            print(f"{name:<10} {metric:<5} {a:>8.3f} {b:>8.3f} {delta * 100:>6.1f}%{flag}")
+    print(f"{regressions} regression(s) over {threshold * 100:.0f}%")
+    return 1 if regressions else 0
+
+
+def bench_arg_parser(prog: str) -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog=f"{prog} bench", description="Viivebenchmark WAV-fixtureilla")
+    ap.add_argument("--fixtures", help="Kansio, jossa *.wav-fixturet")
+    ap.add_argument("--iterations", type=int, default=5)
+    ap.add_argument("--warmup", type=int, default=1, help="Lämmittelykierrokset (ei tilastoihin)")
+    ap.add_argument("--base-url", default=None, help="OpenAI-yhteensopiva endpoint (esim. paikallinen stub)")
+    ap.add_argument("--out", default="bench/results.json")
+    ap.add_argument("--csv", default=None)
+    ap.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Vertaa kahta tulos-JSONia")
+    ap.add_argument("--threshold", type=float, default=0.10, help="Regressiokynnys (0.10 = +10 %%)")
+    add_client_args(ap)
+    return ap
+
+
+def load_fixture(path: Path, out_wav: Path) -> float:
+    """'record'-vaihe fixturelle: dekoodaus + 16 kHz mono + VAD-trimmaus + WAV. Palauttaa keston."""
+    t0 = time.perf_counter()
+    audio = to_mono_16k(*read_audio_any(path))
+    wav_write(out_wav, STT_SR, np.int16(trim_silence(audio, STT_SR) * 32767))
+    return time.perf_counter() - t0
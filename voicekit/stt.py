@@ -0,0 +1,104 @@
+"""whisper-1-transkriptio (pilkonta upload-rajan yli) ja SQLite-transkriptiovälimuisti."""
+
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .audio import STT_MAX_BYTES, STT_SR, encode_chunks, read_audio_any, to_mono_16k
+
+if TYPE_CHECKING:
+    from aiclient import AIClient
+
+
+def transcribe_audio(client: AIClient, path: Path, fmt: str = "flac", workers: int = 4):
+    """
+    Downmix + resample 16 kHz monoksi, pakkaa ja lähetä whisper-1:lle. Yli upload-rajan menevä ääni
+    pilkotaan hiljaisuuksista ja osat transkriboidaan rinnakkain. Palauttaa (teksti, lähetetyt tavut).
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    decoded = read_audio_any(path)
+    if decoded is None:
+        # ei dekoodattavissa (esim. MP3 ilman soundfilea) → lähetetään sellaisenaan, jos mahtuu
+        size = path.stat().st_size
+        if size > STT_MAX_BYTES:
+            raise ValueError(f"{path.name}: {size / 1e6:.1f} MB > whisper-1 upload-raja "
+                             f"{STT_MAX_BYTES / 1e6:.1f} MB, eikä tiedostoa voi dekoodata pilkottavaksi "
+                             f"(asenna soundfile tai muunna WAViksi)")
+        with open(path, "rb") as f:
+            tr = client.transcribe(model="whisper-1", file=f)
+        return tr.text.strip(), size
+
+    audio = to_mono_16k(*decoded)
+    chunks = encode_chunks(audio, STT_SR, fmt)
+    if len(chunks) > 1:
+        print(f"[stt] {sum(len(c[0]) for c in chunks) / 1e6:.1f} MB > limit → {len(chunks)} chunks")
+
+    def _one(chunk):
+        data, fname = chunk
+        return client.transcribe(model="whisper-1", file=(fname, data)).text.strip()
+
+    if len(chunks) == 1:
+        texts = [_one(chunks[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(chunks))) as ex:
+            texts = list(ex.map(_one, chunks))   # map säilyttää järjestyksen
+    return " ".join(t for t in texts if t), sum(len(c[0]) for c in chunks)
+
+
+def audio_sha256(path: Path, chunk: int = 1 << 20) -> str:
+    import hashlib
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class TranscriptCache:
+    """
+    Transkriptiovälimuisti: avain = SHA-256(äänitiedoston tavut) + STT-malli + kieli.
+    SQLite WAL-tilassa → useampi prosessi voi käyttää samaa tiedostoa. Koko rajataan
+    max_entries-riviin; vanhimmin käytetyt poistetaan (LRU).
+    """
+
+    def __init__(self, path: Path, max_entries: int = 10000):
+        import sqlite3, threading
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS transcripts (
+            key TEXT PRIMARY KEY, text TEXT NOT NULL, bytes INTEGER NOT NULL,
+            created REAL NOT NULL, last_used REAL NOT NULL)""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS transcripts_last_used ON transcripts(last_used)")
+        self.db.commit()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(path: Path, model: str, language) -> str:
+        return f"{audio_sha256(path)}:{model}:{language or '-'}"
+
+    def get(self, key: str):
+        with self.lock:
+            row = self.db.execute("SELECT text FROM transcripts WHERE key=?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.db.execute("UPDATE transcripts SET last_used=? WHERE key=?", (time.time(), key))
+            self.db.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, text: str, size: int):
+        now = time.time()
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO transcripts (key, text, bytes, created, last_used) "
+                            "VALUES (?, ?, ?, ?, ?)", (key, text, size, now, now))
+            self.db.execute("DELETE FROM transcripts WHERE key IN (SELECT key FROM transcripts "
+                            "ORDER BY last_used DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+            self.db.commit()